@@ -0,0 +1,198 @@
+import asyncio
+import importlib
+import logging
+import time
+from typing import Dict, List, Optional, Sequence
+
+from fastapi import FastAPI, params
+from fastapi.responses import JSONResponse, Response
+from starlette.types import Receive, Scope, Send
+
+from ..memory.snowflake_pool import bootstrap_snowflake_tables
+
+logger = logging.getLogger(__name__)
+
+# Agent name: URL prefix of its endpoints, see BOT_NAME in app/api/endpoints
+AGENT_PREFIXES = {
+    "general": "generalagent",
+    "engineering": "engineeringagent",
+    "realestate": "realestateagent",
+    "finance": "financeagent",
+    "hr": "hragent",
+    "operations": "operationsagent",
+    "analytics": "analyticsagent",
+    "workflow": "workflowagent",
+    "procurement": "procurementagent",
+    "automation": "automationagent",
+}
+
+
+class _RouteAgain(Response):
+    """Response routing the request again, to the routes of a built agent."""
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        await scope["app"].router(scope, receive, send)
+
+
+class _LazyAgentEndpoint:
+    """Catch-all route of an agent that is not built yet.
+
+    The route runs the dependencies of the agent routes, e.g. the API key
+    check, before the agent is built.
+    """
+
+    def __init__(self, registry: "AgentRegistry", name: str):
+        self.registry = registry
+        self.name = name
+
+    async def dispatch(self) -> Response:
+        if self.registry.is_ready(self.name):
+            # The agent is built, so none of its routes matches the request
+            return JSONResponse({"detail": "Not Found"}, status_code=404)
+
+        try:
+            await self.registry.load(self.name)
+        except Exception:
+            return JSONResponse(
+                {"detail": "The agent is unavailable. Please try again later."},
+                status_code=503,
+            )
+        return _RouteAgain()
+
+
+class AgentRegistry:
+    """Registry building the agents of a deployment on first use.
+
+    Importing the endpoint module of an agent builds its chains, compiles its
+    graphs and connects its knowledge base to Qdrant. At startup the registry
+    only adds a catch-all route per enabled agent. The first request to an
+    agent, or the background warmup, imports its endpoint module and adds its
+    routes to the application, then creates the Snowflake tables its chat
+    histories and checkpoints registered. A failed build is retried by the
+    next request instead of preventing the application from starting.
+
+    Args:
+        enabled: names of the agents served by the deployment, or ["all"]
+    """
+
+    def __init__(self, enabled: Sequence[str]):
+        if "all" in enabled:
+            enabled = list(AGENT_PREFIXES)
+        unknown = sorted(set(enabled) - set(AGENT_PREFIXES))
+        if unknown:
+            raise ValueError(f"Unknown agents enabled: {', '.join(unknown)}")
+        self.enabled: List[str] = list(dict.fromkeys(enabled))
+        self._app: Optional[FastAPI] = None
+        self._prefix = ""
+        self._dependencies: List[params.Depends] = []
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._status = {name: {"state": "pending"} for name in self.enabled}
+        self._warmup_task: Optional[asyncio.Task] = None
+
+    def register(
+        self,
+        app: FastAPI,
+        prefix: str = "",
+        dependencies: Optional[Sequence[params.Depends]] = None,
+    ):
+        """Add the catch-all routes of the enabled agents to the application.
+
+        Args:
+            app: the application
+            prefix: prefix of the agent routes
+            dependencies: dependencies of the agent routes
+        """
+        self._app = app
+        self._prefix = prefix
+        self._dependencies = list(dependencies or [])
+        for name in self.enabled:
+            app.router.add_api_route(
+                f"{prefix}/{AGENT_PREFIXES[name]}/{{path:path}}",
+                endpoint=_LazyAgentEndpoint(self, name).dispatch,
+                # POST for the runnables, GET for the playground and schemas
+                methods=["GET", "POST"],
+                dependencies=self._dependencies,
+                include_in_schema=False,
+            )
+        logger.info(f"Registered agents: {', '.join(self.enabled)}")
+
+    def is_ready(self, name: str) -> bool:
+        return self._status[name]["state"] == "ready"
+
+    async def load(self, name: str):
+        """Build an agent and add its routes, once.
+
+        Raises:
+            Exception: the error building the agent
+        """
+        if self.is_ready(name):
+            return
+        lock = self._locks.setdefault(name, asyncio.Lock())
+        async with lock:
+            if self.is_ready(name):
+                return
+            logger.info(f"Building agent-{name}")
+            self._status[name]["state"] = "loading"
+            start = time.perf_counter()
+            try:
+                # Building an agent blocks on imports and Qdrant requests
+                module = await asyncio.to_thread(
+                    importlib.import_module, f"app.api.endpoints.agent-{name}"
+                )
+            except Exception as e:
+                logger.error(f"Unable to build agent-{name}: {e}", exc_info=True)
+                self._status[name] = {"state": "failed", "error": str(e)}
+                raise
+            self._include(module.router)
+            # The tables of the agent are registered when its module is imported,
+            # after the tables were bootstrapped at startup
+            await asyncio.to_thread(bootstrap_snowflake_tables)
+            self._status[name] = {
+                "state": "ready",
+                "build_time": round(time.perf_counter() - start, 3),
+            }
+            logger.info(f"Built agent-{name} in {self._status[name]['build_time']}s")
+
+    def _include(self, router):
+        routes = self._app.router.routes
+        count = len(routes)
+        self._app.include_router(
+            router, prefix=self._prefix, dependencies=self._dependencies
+        )
+        # Match the agent routes before the catch-all routes of the agents
+        added = routes[count:]
+        del routes[count:]
+        position = next(
+            i
+            for i, route in enumerate(routes)
+            if isinstance(
+                getattr(getattr(route, "endpoint", None), "__self__", None),
+                _LazyAgentEndpoint,
+            )
+        )
+        routes[position:position] = added
+        self._app.openapi_schema = None
+
+    async def warmup(self):
+        """Build all the enabled agents, one at a time."""
+        for name in self.enabled:
+            try:
+                await self.load(name)
+            except Exception:
+                pass
+
+    def start_warmup(self):
+        """Build the enabled agents in the background."""
+        if self._warmup_task is None:
+            self._warmup_task = asyncio.create_task(self.warmup())
+
+    def stop_warmup(self):
+        if self._warmup_task is not None:
+            self._warmup_task.cancel()
+            self._warmup_task = None
+
+    def stats(self) -> dict:
+        return {
+            "ready": all(self.is_ready(name) for name in self.enabled),
+            "agents": {name: dict(status) for name, status in self._status.items()},
+        }
@@ -1,14 +1,15 @@
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 
 from ...llm_model.azure_llm import grader_model
+from ...llm_model.llm_cache import cached_model
 from ...model.grader_model import SimpleSQLGradeQuery
 from ...prompt.query_classifier import simple_kp_sql_system_prompt
 
 ## Simple vs SQL query classifier
 # LLM with function call
-structured_grader_model = grader_model.with_structured_output(
-    SimpleSQLGradeQuery,
-)
+structured_grader_model = cached_model(
+    grader_model, "grader_model", chain_name="analytics_query_classifier"
+).with_structured_output(SimpleSQLGradeQuery)
 
 answer_prompt = ChatPromptTemplate.from_messages(
     [
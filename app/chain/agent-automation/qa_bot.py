@@ -12,12 +12,15 @@ from langchain_core.runnables import (
 from langchain_core.runnables.history import RunnableWithMessageHistory
 
 from ...graph.agent_automation.graph_bot import app as chat_agent
+from ...helpers.sse_coalescer import stream_custom_events
 from ...memory.session_factory import create_session_factory
 from ...model.agent_automation.bot_model import (
     ConversationInputChat,
     ConversationOutputChat,
 )
 from ..utils import (
+    aformat_username,
+    aget_image_type_data,
     format_username,
     get_current_timestamp,
     get_image_type_data,
@@ -33,10 +36,10 @@ conversational_chain = (
         {
             "query": itemgetter("query"),
             "username": itemgetter("username", "oauth_token")
-            | RunnableLambda(format_username),
+            | RunnableLambda(format_username, afunc=aformat_username),
             "timestamp": RunnableLambda(get_current_timestamp),
             "image_type_data": itemgetter("uploaded_image_blob_url")
-            | RunnableLambda(get_image_type_data),
+            | RunnableLambda(get_image_type_data, afunc=aget_image_type_data),
             "web_search": itemgetter("web_search"),
             "doc_ids": itemgetter("doc_ids"),
             "user_id": itemgetter("username"),
@@ -97,10 +100,10 @@ streaming_conversational_chain = (
         {
             "query": itemgetter("query"),
             "username": itemgetter("username", "oauth_token")
-            | RunnableLambda(format_username),
+            | RunnableLambda(format_username, afunc=aformat_username),
             "timestamp": RunnableLambda(get_current_timestamp),
             "image_type_data": itemgetter("uploaded_image_blob_url")
-            | RunnableLambda(get_image_type_data),
+            | RunnableLambda(get_image_type_data, afunc=aget_image_type_data),
             "web_search": itemgetter("web_search"),
             "doc_ids": itemgetter("doc_ids"),
             "user_id": itemgetter("username"),
@@ -162,16 +165,13 @@ async def custom_stream(
     Yields:
         strings that are streamed to the client.
     """
-    async for event in streaming_conversational_chain.astream_events(
+    events = streaming_conversational_chain.astream_events(
         input,
         config,
         version="v2",
-    ):
-        tags = event.get("tags", [])
-        if event["event"] == "on_custom_event":
-            data = event["data"]
-            if data:
-                yield data
+    )
+    async for data in stream_custom_events(events):
+        yield data
 
 
 conversational_chain_stream = RunnableLambda(custom_stream)
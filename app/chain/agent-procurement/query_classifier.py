@@ -1,14 +1,15 @@
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 
 from ...llm_model.azure_llm import grader_model
+from ...llm_model.llm_cache import cached_model
 from ...model.grader_model import SimpleRAGWebSoWGradeQuery
 from ...prompt.query_classifier import simple_rag_web_sow_doc_system_prompt
 
 ## Simple vs RAG vs Web vs SoW Doc query classifier
 # LLM with function call
-structured_grader_model = grader_model.with_structured_output(
-    SimpleRAGWebSoWGradeQuery,
-)
+structured_grader_model = cached_model(
+    grader_model, "grader_model", chain_name="procurement_query_classifier"
+).with_structured_output(SimpleRAGWebSoWGradeQuery)
 
 answer_prompt = ChatPromptTemplate.from_messages(
     [
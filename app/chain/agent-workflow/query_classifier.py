@@ -1,14 +1,15 @@
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 
 from ...llm_model.azure_llm import grader_model
+from ...llm_model.llm_cache import cached_model
 from ...model.grader_model import SimpleRAGWebSQLGradeQuery
 from ...prompt.query_classifier import simple_milahi_sql_system_prompt
 
 ## Simple vs RAG vs Web vs SQL query classifier
 # LLM with function call
-structured_grader_model = grader_model.with_structured_output(
-    SimpleRAGWebSQLGradeQuery,
-)
+structured_grader_model = cached_model(
+    grader_model, "grader_model", chain_name="workflow_query_classifier"
+).with_structured_output(SimpleRAGWebSQLGradeQuery)
 
 answer_prompt = ChatPromptTemplate.from_messages(
     [
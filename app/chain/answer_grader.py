@@ -1,10 +1,13 @@
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 
 from ..llm_model.azure_llm import grader_model
+from ..llm_model.llm_cache import cached_model
 from ..model.grader_model import GradeAnswer
 
 # LLM with function call
-structured_grader_model = grader_model.with_structured_output(GradeAnswer)
+structured_grader_model = cached_model(
+    grader_model, "grader_model", chain_name="answer_grader"
+).with_structured_output(GradeAnswer)
 
 # System Prompt
 system = (
@@ -2,6 +2,7 @@ from langchain_core.output_parsers import StrOutputParser
 from langchain_core.prompts import ChatPromptTemplate
 
 from ..llm_model.azure_llm import helper_model
+from ..llm_model.llm_cache import cached_model
 
 # System Prompt
 system_prompt = (
@@ -26,4 +27,8 @@ prompt = ChatPromptTemplate.from_messages(
 )
 
 # Chain
-summarizer = prompt | helper_model | StrOutputParser()
+summarizer = (
+    prompt
+    | cached_model(helper_model, "helper_model", chain_name="documents_summarizer")
+    | StrOutputParser()
+)
@@ -0,0 +1,35 @@
+from langchain_core.output_parsers import StrOutputParser
+from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
+
+from ..llm_model.azure_llm import helper_model
+from ..llm_model.llm_cache import cached_model
+
+# System Prompt
+system_prompt = (
+    "You maintain the running summary of a conversation between an employee "
+    "and an LLM-based assistant of the organization. You are given the "
+    "current summary of the earlier conversation, which might be empty, and "
+    "the conversation turns that follow it.\n\n"
+    "Update the summary with the new turns. Keep the facts, names, numbers, "
+    "documents, decisions and open questions that later queries might refer "
+    "to, and drop greetings, pleasantries and answer formatting. Write at "
+    "most 200 words, in the language of the conversation, in the third "
+    "person, e.g. 'The user asked about ...'. Only return the summary.\n\n"
+    "Current summary: \n\n {summary}"
+)
+
+# Prompt
+prompt = ChatPromptTemplate.from_messages(
+    [
+        ("system", system_prompt),
+        MessagesPlaceholder("messages"),
+        ("human", "Return the updated summary of the conversation."),
+    ]
+)
+
+# Chain
+history_summarizer = (
+    prompt
+    | cached_model(helper_model, "helper_model", chain_name="history_summarizer")
+    | StrOutputParser()
+)
@@ -1,10 +1,13 @@
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 
 from ..llm_model.azure_llm import grader_model
+from ..llm_model.llm_cache import cached_model
 from ..model.grader_model import GradeModeration
 
 # LLM with function call
-structured_grader_model = grader_model.with_structured_output(GradeModeration)
+structured_grader_model = cached_model(
+    grader_model, "grader_model", chain_name="moderator"
+).with_structured_output(GradeModeration)
 
 # System Prompt
 system_prompt = (
@@ -355,6 +355,7 @@ async def _process_file(
             collection_name=kbm.collection_name,
             points_selector=points_selector,
         )
+        await kbm.abump_kb_version()
 
         # Notify user the doc processing progress
         logger.info(f"Processing file: {request.filename}... {80.0}% complete")
@@ -369,6 +370,7 @@ async def _process_file(
             docs,
             batch_size=kbm.max_batch_size,
         )
+        await kbm.abump_kb_version()
 
         # Notify user the doc processing progress
         logger.info(f"Processing file: {request.filename}... {100.0}% complete")
@@ -200,6 +200,7 @@ async def _delete_qdrant(
         collection_name=kbm.collection_name,
         points_selector=points_selector,
     )
+    await kbm.abump_kb_version()
     resp_status = result.status.lower()
 
     return {"Status": resp_status, "Details": result.dict()}
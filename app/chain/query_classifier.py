@@ -1,6 +1,7 @@
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 
 from ..llm_model.azure_llm import grader_model
+from ..llm_model.llm_cache import cached_model
 from ..model.grader_model import (
     SimpleRAGWebGradeQuery,
     SimpleRAGWebImgGradeQuery,
@@ -14,9 +15,9 @@ from ..prompt.query_classifier import (
 
 ## Simple vs RAG vs Web query classifier
 # LLM with function call
-structured_grader_model = grader_model.with_structured_output(
-    SimpleRAGWebGradeQuery,
-)
+structured_grader_model = cached_model(
+    grader_model, "grader_model", chain_name="simple_rag_web_query_classifier"
+).with_structured_output(SimpleRAGWebGradeQuery)
 
 answer_prompt = ChatPromptTemplate.from_messages(
     [
@@ -36,9 +37,9 @@ simple_rag_web_query_classifier = answer_prompt | structured_grader_model
 
 ## Simple vs RAG vs Web vs Image generation query classifier
 # LLM with function call
-structured_grader_model = grader_model.with_structured_output(
-    SimpleRAGWebImgGradeQuery,
-)
+structured_grader_model = cached_model(
+    grader_model, "grader_model", chain_name="simple_rag_web_img_query_classifier"
+).with_structured_output(SimpleRAGWebImgGradeQuery)
 
 answer_prompt = ChatPromptTemplate.from_messages(
     [
@@ -58,9 +59,9 @@ simple_rag_web_img_query_classifier = answer_prompt | structured_grader_model
 
 ## Simple vs RAG vs Web vs Image vs PDF generation query classifier
 # LLM with function call
-structured_grader_model = grader_model.with_structured_output(
-    SimpleRAGWebImgPDFGradeQuery,
-)
+structured_grader_model = cached_model(
+    grader_model, "grader_model", chain_name="simple_rag_web_img_pdf_query_classifier"
+).with_structured_output(SimpleRAGWebImgPDFGradeQuery)
 
 answer_prompt = ChatPromptTemplate.from_messages(
     [
@@ -2,6 +2,7 @@ from langchain_core.output_parsers import StrOutputParser
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 
 from ..llm_model.azure_llm import helper_model
+from ..llm_model.llm_cache import cached_model
 
 # System Prompt
 system_prompt = (
@@ -43,4 +44,8 @@ prompt = ChatPromptTemplate.from_messages(
 )
 
 # Chain
-query_rewriter = prompt | helper_model | StrOutputParser()
+query_rewriter = (
+    prompt
+    | cached_model(helper_model, "helper_model", chain_name="query_web_search_rewriter")
+    | StrOutputParser()
+)
@@ -1,6 +1,7 @@
 from langchain.prompts import ChatPromptTemplate
 
 from ..llm_model.azure_llm import topic_model
+from ..llm_model.llm_cache import cached_model
 
 ### Chain to get the topic summary from the query of a user.
 prompt = ChatPromptTemplate.from_messages(
@@ -50,4 +51,6 @@ prompt = ChatPromptTemplate.from_messages(
     ]
 )
 
-topic_summary_chain = prompt | topic_model
+topic_summary_chain = prompt | cached_model(
+    topic_model, "topic_model", chain_name="topic_summary_chain"
+)
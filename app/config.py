@@ -14,6 +14,212 @@ search_type = (
     "similarity_score_threshold"  # "similarity", "mmr", "similarity_score_threshold"
 )
 search_kwargs = {"score_threshold": 0.75, "k": 10}  # "k", "score_threshold", "fetch_k"
+semantic_cache_kwargs = {
+    "enabled": True,
+    "score_threshold": 0.95,  # minimum cosine similarity between rag queries
+    "ttl": 3600,  # seconds
+    "max_entries": 256,  # per AI Agent app
+}
+retrieval_cache_kwargs = {
+    "enabled": True,
+    "score_threshold": 0.98,  # minimum cosine similarity between embedded queries
+    "ttl": 600,  # seconds
+    "max_entries": 128,  # per collection, filter and k
+    "max_buckets": 1024,  # collection, filter and k combinations
+}
+kb_version_kwargs = {
+    "collection_name": "kb-versions",  # Qdrant collection shared by all replicas
+    "ttl": 5,  # seconds a replica reuses the version it read
+}
+snowflake_pool_kwargs = {
+    "max_size": 8,  # open connections per Snowflake identity
+    "acquire_timeout": 30,  # seconds
+    "max_idle_time": 1800,  # seconds
+    "health_check_interval": 60,  # seconds
+}
+history_write_behind_kwargs = {
+    "enabled": True,
+    "flush_interval": 1.0,  # seconds
+    "max_batch_size": 200,  # queued messages that trigger an early flush
+    "max_attempts": 3,  # failed flushes before messages go to the dead-letter file
+    "dead_letter_path": os.getenv(
+        "HISTORY_DEAD_LETTER_PATH", "history_dead_letter.jsonl"
+    ),
+}
+history_cache_kwargs = {
+    "enabled": True,
+    "max_sessions": 2048,  # cached conversations per process
+    "ttl": 1800,  # seconds
+    # Seconds a cached conversation is served before its message count is
+    # checked in Snowflake, to catch writes made through another replica
+    "check_interval": 30,
+}
+memory_kwargs = {
+    # "snowflake" for shared deployments, "sqlite" for a single node or load tests
+    "backend": os.getenv("MEMORY_BACKEND", "snowflake"),
+    "sqlite_path": os.getenv("SQLITE_MEMORY_PATH", "memory.sqlite3"),
+    "checkpoint_compact_every": 20,  # checkpoint deltas folded into a snapshot
+}
+request_log_kwargs = {
+    "table_name": "AI_AGENT_API_REQUESTS",
+    "max_queue_size": 10000,  # queued logs before the oldest are dropped
+    "flush_interval": 2.0,  # seconds
+    "max_batch_size": 500,  # logs per insert
+    "sample_rate": float(os.getenv("REQUEST_LOG_SAMPLE_RATE", "1.0")),
+    "max_field_size": 2048,  # characters kept of long strings
+    # Replaced by their size and SHA-256 digest, e.g. base64 uploads
+    "hashed_fields": ["file", "oauth_token"],
+    "redacted_headers": ["authorization", "cookie", "api-key"],
+    "redacted_query_params": ["api-key", "api_key", "token", "access_token", "code"],
+    "max_attempts": 3,  # failed inserts before a batch of logs is dropped
+}
+image_cache_kwargs = {
+    "max_entries": 256,  # cached uploaded images per process
+    "max_bytes": 256 * 1024 * 1024,  # total base64 size of the cached images
+    "max_concurrency": 8,  # concurrent blob downloads
+}
+image_normalization_kwargs = {
+    "enabled": True,
+    # Effective resolution of high detail image inputs of GPT-4o models
+    "max_long_side": 2048,  # pixels
+    "max_short_side": 768,  # pixels
+    "output_format": "jpeg",
+    "quality": 85,
+}
+ms_graph_kwargs = {
+    "request_timeout": 5.0,  # seconds per Microsoft Graph request
+    # Seconds to wait for the user profile before using the email-derived name
+    "username_timeout": 1.5,
+    "cache_ttl": 1800,  # seconds, profiles are keyed by OAuth token hash
+    "max_cache_entries": 4096,
+}
+# Stream RAG answers while generated and retract them on a failed grade
+stream_first_kwargs = {
+    "enabled": os.getenv("STREAM_FIRST_GENERATION", "false").lower() == "true",
+}
+sse_coalescing_kwargs = {
+    # Merge consecutive answer text events of the custom streams into one frame
+    "enabled": os.getenv("SSE_COALESCING", "true").lower() == "true",
+    "window": 0.03,  # seconds answer text is held back at most
+    "max_chars": 256,  # buffered characters that trigger a flush
+}
+agent_registry_kwargs = {
+    # Comma separated agents served by the deployment, e.g. "general,hr"
+    "enabled": [
+        agent.strip()
+        for agent in os.getenv("ENABLED_AGENTS", "all").split(",")
+        if agent.strip()
+    ],
+    # Build the enabled agents in the background at startup
+    "warmup": os.getenv("AGENT_WARMUP", "true").lower() == "true",
+}
+context_packer_kwargs = {
+    # Fit the context of the RAG generator and graders into a token budget
+    "enabled": True,
+    "token_budget": 6000,  # estimated tokens, for agents not listed below
+    "agent_token_budgets": {
+        "general": 6000,
+        "hr": 6000,
+        "finance": 6000,
+        "engineering": 6000,
+        "operations": 6000,
+        "procurement": 6000,
+        "realestate": 6000,
+        "automation": 6000,
+        "workflow": 6000,
+        "analytics": 6000,
+    },
+    "max_cached_embeddings": 20000,  # sentence embeddings kept for compression
+}
+generation_grader_kwargs = {
+    # Grade grounding and usefulness of RAG answers in a single LLM call instead
+    # of the hallucination and answer graders in sequence, per agent
+    "combined": {
+        "general": True,
+        "hr": True,
+        "finance": True,
+        "engineering": True,
+        "operations": True,
+        "procurement": True,
+        "realestate": True,
+        "automation": True,
+        "workflow": True,
+        "analytics": True,
+    },
+}
+web_search_kwargs = {
+    "request_timeout": 10.0,  # seconds per Bing search request
+    "max_connections": 20,  # pooled connections to the Bing API
+    "cache_ttl": 3600,  # seconds, results are keyed by normalized web query
+    "max_cache_entries": 1024,
+    "quota_cooldown": 3600,  # seconds web search is skipped once over quota
+}
+cortex_analyst_kwargs = {
+    "request_timeout": 60.0,  # seconds per Cortex Analyst request
+    "max_connections": 20,  # pooled HTTP connections to Cortex Analyst
+    # Sessions of an OAuth user are reused for the lifetime of their token
+    "oauth_session_ttl": 3000,  # seconds
+    "max_oauth_sessions": 256,  # OAuth users with pooled sessions
+    "oauth_pool_size": 2,  # open connections per OAuth user
+}
+sql_result_cache_kwargs = {
+    # Results of SELECT statements keyed by normalized SQL, role, warehouse,
+    # database and schema, and by OAuth user, per agent, a ttl of 0 disables
+    "analytics": {
+        "ttl": 900,  # seconds
+        "max_entries": 256,
+        "max_bytes": 64 * 1024 * 1024,
+    },
+    "workflow": {
+        "ttl": 300,  # seconds, workflow data changes during the day
+        "max_entries": 256,
+        "max_bytes": 64 * 1024 * 1024,
+    },
+}
+sql_result_kwargs = {
+    # SQL results are fetched in Arrow batches up to these caps, and flagged
+    # as truncated beyond them
+    "max_rows": 100000,
+    "max_bytes": 64 * 1024 * 1024,
+    # Rows given verbatim to the LLM, with the schema and column aggregates
+    "head_rows": 50,
+    # Full results are kept in memory for the charts of the turn
+    "artifact_ttl": 3600,  # seconds
+    "max_artifacts": 256,
+    "max_artifact_bytes": 512 * 1024 * 1024,
+}
+history_summary_kwargs = {
+    # Keep the last turns verbatim and a running summary of older turns
+    "enabled": os.getenv("HISTORY_SUMMARY", "false").lower() == "true",
+    "verbatim_turns": 3,  # at most max_len_history of the agent
+    # Turns read back to the last summarized turn after a failed update
+    "max_catchup_turns": 20,
+    # Last turns of the summarized chat history given to each chain role,
+    # None for all, not applied without summaries
+    "windows": {
+        "moderator": 2,
+        "classifier": 2,
+        "rewriter": 3,
+        "image_parser": 2,
+        "grader": 2,
+        "generator": None,
+    },
+}
+llm_cache_kwargs = {
+    "enabled": True,
+    # Opt-in persistence: prompts and generations are stored unencrypted on disk
+    "database_path": os.getenv("LLM_CACHE_PATH") or None,
+    "trim_every": 100,  # SQLite writes between two trims of expired entries
+    # Deterministic (temperature=0.0) model roles, see app/llm_model/azure_llm.py
+    "roles": {
+        "topic_model": {"ttl": 7 * 24 * 3600, "max_entries": 4096},  # seconds
+        "retriever_model": {"ttl": 24 * 3600, "max_entries": 4096},
+        "grader_model": {"ttl": 24 * 3600, "max_entries": 8192},
+        "helper_model": {"ttl": 3600, "max_entries": 2048},
+    },
+    # Never cached, even if listed in roles
+    "excluded_roles": ["chat_model", "document_generator_model", "rpa_model"],
+}
 
 
 class Config:
@@ -35,6 +241,28 @@ class DevelopmentConfig(Config):
     child_chunk_size = child_chunk_size
     search_type = search_type
     search_kwargs = search_kwargs
+    semantic_cache_kwargs = semantic_cache_kwargs
+    retrieval_cache_kwargs = retrieval_cache_kwargs
+    kb_version_kwargs = kb_version_kwargs
+    llm_cache_kwargs = llm_cache_kwargs
+    snowflake_pool_kwargs = snowflake_pool_kwargs
+    history_write_behind_kwargs = history_write_behind_kwargs
+    history_cache_kwargs = history_cache_kwargs
+    memory_kwargs = memory_kwargs
+    request_log_kwargs = request_log_kwargs
+    image_cache_kwargs = image_cache_kwargs
+    image_normalization_kwargs = image_normalization_kwargs
+    ms_graph_kwargs = ms_graph_kwargs
+    stream_first_kwargs = stream_first_kwargs
+    sse_coalescing_kwargs = sse_coalescing_kwargs
+    agent_registry_kwargs = agent_registry_kwargs
+    context_packer_kwargs = context_packer_kwargs
+    generation_grader_kwargs = generation_grader_kwargs
+    history_summary_kwargs = history_summary_kwargs
+    web_search_kwargs = web_search_kwargs
+    cortex_analyst_kwargs = cortex_analyst_kwargs
+    sql_result_cache_kwargs = sql_result_cache_kwargs
+    sql_result_kwargs = sql_result_kwargs
 
     # AzureOpenAI Access
     AZURE_OPENAI_LLM_DEPLOYMENT_NAME = os.getenv("AZURE_OPENAI_LLM_DEPLOYMENT_NAME")
@@ -117,6 +345,28 @@ class TestingConfig(Config):
     child_chunk_size = child_chunk_size
     search_type = search_type
     search_kwargs = search_kwargs
+    semantic_cache_kwargs = semantic_cache_kwargs
+    retrieval_cache_kwargs = retrieval_cache_kwargs
+    kb_version_kwargs = kb_version_kwargs
+    llm_cache_kwargs = llm_cache_kwargs
+    snowflake_pool_kwargs = snowflake_pool_kwargs
+    history_write_behind_kwargs = history_write_behind_kwargs
+    history_cache_kwargs = history_cache_kwargs
+    memory_kwargs = memory_kwargs
+    request_log_kwargs = request_log_kwargs
+    image_cache_kwargs = image_cache_kwargs
+    image_normalization_kwargs = image_normalization_kwargs
+    ms_graph_kwargs = ms_graph_kwargs
+    stream_first_kwargs = stream_first_kwargs
+    sse_coalescing_kwargs = sse_coalescing_kwargs
+    agent_registry_kwargs = agent_registry_kwargs
+    context_packer_kwargs = context_packer_kwargs
+    generation_grader_kwargs = generation_grader_kwargs
+    history_summary_kwargs = history_summary_kwargs
+    web_search_kwargs = web_search_kwargs
+    cortex_analyst_kwargs = cortex_analyst_kwargs
+    sql_result_cache_kwargs = sql_result_cache_kwargs
+    sql_result_kwargs = sql_result_kwargs
 
     # AzureOpenAI Access
     AZURE_OPENAI_LLM_DEPLOYMENT_NAME = os.getenv("AZURE_OPENAI_LLM_DEPLOYMENT_NAME")
@@ -199,6 +449,28 @@ class ProductionConfig(Config):
     child_chunk_size = child_chunk_size
     search_type = search_type
     search_kwargs = search_kwargs
+    semantic_cache_kwargs = semantic_cache_kwargs
+    retrieval_cache_kwargs = retrieval_cache_kwargs
+    kb_version_kwargs = kb_version_kwargs
+    llm_cache_kwargs = llm_cache_kwargs
+    snowflake_pool_kwargs = snowflake_pool_kwargs
+    history_write_behind_kwargs = history_write_behind_kwargs
+    history_cache_kwargs = history_cache_kwargs
+    memory_kwargs = memory_kwargs
+    request_log_kwargs = request_log_kwargs
+    image_cache_kwargs = image_cache_kwargs
+    image_normalization_kwargs = image_normalization_kwargs
+    ms_graph_kwargs = ms_graph_kwargs
+    stream_first_kwargs = stream_first_kwargs
+    sse_coalescing_kwargs = sse_coalescing_kwargs
+    agent_registry_kwargs = agent_registry_kwargs
+    context_packer_kwargs = context_packer_kwargs
+    generation_grader_kwargs = generation_grader_kwargs
+    history_summary_kwargs = history_summary_kwargs
+    web_search_kwargs = web_search_kwargs
+    cortex_analyst_kwargs = cortex_analyst_kwargs
+    sql_result_cache_kwargs = sql_result_cache_kwargs
+    sql_result_kwargs = sql_result_kwargs
 
     # AzureOpenAI Access
     AZURE_OPENAI_LLM_DEPLOYMENT_NAME = os.getenv("AZURE_OPENAI_LLM_DEPLOYMENT_NAME")
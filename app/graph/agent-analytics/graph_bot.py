@@ -1,11 +1,12 @@
 import logging
 from functools import partial
-from typing import Any, Dict, List, Tuple
+from typing import Any, Dict, List, Optional, Tuple
 
 from langchain.schema import Document
 from langgraph.graph import END, START, StateGraph
 from typing_extensions import TypedDict
 
+from ...config import config
 from ...prompt.agent_analytics.bot import prompt as enterprise_context
 from ..response_graph_node import generate, generate_simple, request_refined_query
 from ..utils_graph_edge import decide_how_to_respond
@@ -37,8 +38,11 @@ class GraphState(TypedDict):
     answer: str
     sql_search: bool
     sql_result: str
+    sql_artifact: Optional[str]
     sql_charts: Dict[str, Any]
     num_generations: int
+    answer_streamed: bool
+    packed_context: List[Document]
 
 
 class InputState(TypedDict):
@@ -83,7 +87,15 @@ workflow.add_node(
 workflow.add_node("generate_simple", generate_simple)  # generate
 workflow.add_node("sql_query", sql_query)  # sql query
 workflow.add_node("sql_charts_node", sql_charts)  # sql charts
-workflow.add_node("generate", generate)  # generate
+workflow.add_node(
+    "generate",
+    partial(
+        generate,
+        context_token_budget=config.context_packer_kwargs["agent_token_budgets"][
+            "analytics"
+        ],
+    ),
+)
 workflow.add_node("final_answer", final_answer)  # final accepted answer
 
 # Build graph
@@ -102,7 +114,10 @@ workflow.add_edge("sql_query", "sql_charts_node")
 workflow.add_edge("sql_charts_node", END)
 workflow.add_conditional_edges(
     "generate",
-    decide_how_to_respond,
+    partial(
+        decide_how_to_respond,
+        combined_grader=config.generation_grader_kwargs["combined"]["analytics"],
+    ),
     {
         "need refined query": "request_refined_query",
         "not supported": "generate",
@@ -4,10 +4,6 @@ import logging
 import re
 from io import BytesIO
 
-import matplotlib.pyplot as plt
-import matplotlib.ticker as ticker
-import pandas as pd
-import seaborn as sns
 from langchain.schema import Document
 from langchain_core.callbacks.manager import adispatch_custom_event
 from langchain_core.messages import AIMessage, HumanMessage
@@ -27,6 +23,8 @@ get_session_history = create_session_factory(
         f"{re.sub('-', '_', BOT_NAME).upper()}_" "CORTEX_ANALYST_MESSAGES_STORE"
     ),
     max_len_history=5,
+    # Cortex Analyst is sent the messages as they were exchanged
+    summarize=False,
 )
 
 
@@ -67,11 +65,12 @@ async def sql_query(
     session_id = configurable["session_id"]
     message_timereceived = configurable["message_timereceived"]
 
-    messages = get_session_history(
+    session_history = get_session_history(
         user_id=user_id,
         session_id=session_id,
         message_timereceived=message_timereceived,
-    ).messages
+    )
+    messages = await session_history.aget_messages()
 
     if len(messages) == 0:
         messages = [HumanMessage(content=query)]
@@ -88,17 +87,36 @@ async def sql_query(
                 f"<<<\n{sql_result['human_query']}\n>>>, "
                 "the following SQL query was generated: "
                 f"<<<\n{sql_result['sql_query']}\n>>>, "
-                "and the following information was retrieved:\n\n"
+                "and the following information was retrieved, as the columns, "
+                "number of rows and first rows of the result, with the "
+                "aggregates of each column for larger results:\n\n"
                 f"{sql_result['sql_result']}.",
                 metadata={
                     "sql_request_id": sql_result["request_id"],
                     "human_query": sql_result["human_query"],
                     "sql_query": sql_result["sql_query"],
                     "sql_result": sql_result["sql_result"],
+                    "sql_artifact": sql_result["sql_artifact"],
+                    "truncated": sql_result["truncated"],
+                    "from_cache": sql_result["from_cache"],
                     "context_type": "sql_search",
                 },
             )
         )
+        if sql_result["from_cache"]:
+            # Notify user that the SQL result was served from cache
+            await adispatch_custom_event(
+                "sql_result_cached",
+                {"sql_from_cache": True},
+                config=config,
+            )
+        if sql_result["truncated"]:
+            # Notify user that only part of the SQL result was retrieved
+            await adispatch_custom_event(
+                "sql_result_truncated",
+                {"sql_truncated": True},
+                config=config,
+            )
     except ToolException as e:
         logger.error(e)
         sql_result = {
@@ -106,6 +124,9 @@ async def sql_query(
             "human_query": "We could not interpret your question.",
             "sql_query": "SELECT * FROM table",
             "sql_result": "[]",
+            "sql_artifact": None,
+            "truncated": False,
+            "from_cache": False,
         }
         context.append(
             Document(
@@ -117,37 +138,34 @@ async def sql_query(
                     "human_query": sql_result["human_query"],
                     "sql_query": sql_result["sql_query"],
                     "sql_result": sql_result["sql_result"],
+                    "sql_artifact": sql_result["sql_artifact"],
+                    "truncated": sql_result["truncated"],
+                    "from_cache": sql_result["from_cache"],
                     "context_type": "sql_search",
                 },
             )
         )
 
     # Add messages to store
-    get_session_history(
-        user_id=user_id,
-        session_id=session_id,
-        message_timereceived=message_timereceived,
-    ).add_message(HumanMessage(content=query))
-
-    get_session_history(
-        user_id=user_id,
-        session_id=session_id,
-        message_timereceived=message_timereceived,
-    ).add_message(
-        AIMessage(
-            content=json.dumps(
-                {
-                    "text": sql_result["human_query"],
-                    "sql": sql_result["sql_query"],
-                }
-            )
-        )
+    await session_history.aadd_messages(
+        [
+            HumanMessage(content=query),
+            AIMessage(
+                content=json.dumps(
+                    {
+                        "text": sql_result["human_query"],
+                        "sql": sql_result["sql_query"],
+                    }
+                )
+            ),
+        ]
     )
 
     return {
         "context": context,
         "sql_search": True,
         "sql_result": sql_result["sql_result"],
+        "sql_artifact": sql_result["sql_artifact"],
     }
 
 
@@ -167,17 +185,23 @@ async def sql_charts(
     """
     logger.info("---ANALYSE SQL DATA---")
     sql_result = state["sql_result"]
+    sql_artifact = state["sql_artifact"]
     user_id = state["user_id"]
 
     configurable = config.get("configurable", {})
     user_id = configurable["user_id"]
     session_id = configurable["session_id"]
 
+    # Whether a chart only plots the first rows of an expired SQL result, as a
+    # SQL result fetched in part was already reported by sql_query
+    head_only = False
+
     # Bar Chart generation
     bar_chart_blob_url = None
     chart_blob_result = await sql_chart_gen_tool.ainvoke(
         {
             "sql_result": sql_result,
+            "sql_artifact": sql_artifact,
             "chart_type": "bar",
             "user_id": user_id,
             "session_id": session_id,
@@ -185,12 +209,14 @@ async def sql_charts(
     )
     if chart_blob_result["status"] == "success":
         bar_chart_blob_url = chart_blob_result["chart_blob_url"]
+        head_only = head_only or chart_blob_result["head_only"]
 
     # Line Chart generation
     line_chart_blob_url = None
     chart_blob_result = await sql_chart_gen_tool.ainvoke(
         {
             "sql_result": sql_result,
+            "sql_artifact": sql_artifact,
             "chart_type": "line",
             "user_id": user_id,
             "session_id": session_id,
@@ -198,12 +224,14 @@ async def sql_charts(
     )
     if chart_blob_result["status"] == "success":
         line_chart_blob_url = chart_blob_result["chart_blob_url"]
+        head_only = head_only or chart_blob_result["head_only"]
 
     # Pie Chart generation
     pie_chart_blob_url = None
     chart_blob_result = await sql_chart_gen_tool.ainvoke(
         {
             "sql_result": sql_result,
+            "sql_artifact": sql_artifact,
             "chart_type": "pie",
             "user_id": user_id,
             "session_id": session_id,
@@ -211,6 +239,7 @@ async def sql_charts(
     )
     if chart_blob_result["status"] == "success":
         pie_chart_blob_url = chart_blob_result["chart_blob_url"]
+        head_only = head_only or chart_blob_result["head_only"]
 
     sql_charts = {
         "bar_chart_blob_url": bar_chart_blob_url,
@@ -218,6 +247,14 @@ async def sql_charts(
         "pie_chart_blob_url": pie_chart_blob_url,
     }
 
+    if head_only:
+        # Notify user that the charts only plot part of the SQL result
+        await adispatch_custom_event(
+            "sql_result_truncated",
+            {"sql_truncated": True},
+            config=config,
+        )
+
     # Write chart result
     await adispatch_custom_event(
         "final_bar_chart",
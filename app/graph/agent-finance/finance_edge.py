@@ -4,6 +4,7 @@ from openai import BadRequestError
 
 from ...chain.moderator import query_grader as moderator
 from ...chain.query_classifier import simple_rag_web_query_classifier
+from ...tools.web_search_tool import web_search_client
 
 logger = logging.getLogger(__name__)
 
@@ -56,7 +57,8 @@ async def get_info_gathering_state(state):
     chat_history = state["chat_history"]
     enterprise_context = state["enterprise_context"]
     image_context = state["image_context"]
-    web_search = state["web_search"]
+    # Web search is skipped while the search quota is exceeded
+    web_search = state["web_search"] and web_search_client.available
     finance_details = state["finance_details"]
 
     if finance_details.tool_calls:
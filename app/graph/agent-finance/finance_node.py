@@ -3,6 +3,7 @@ import logging
 from qdrant_client import models
 
 from ...chain.agent_finance.finance_info_gatherer import gatherer
+from ...embedding_model.azure_emb import embeddings_model
 from ...vector_db.utils import KnowledgeBaseManager
 
 logger = logging.getLogger(__name__)
@@ -84,8 +85,9 @@ async def retrieve(
     filter = models.Filter(must=public_doc_fitlers)
 
     # Retrieval
-    results = await kbm.vectorstore.asimilarity_search_with_relevance_scores(
-        query=query, k=kbm.search_kwargs["k"], filter=filter
+    query_embedding = await embeddings_model.aembed_query(query)
+    results = await kbm.asimilarity_search_by_vector_with_relevance_scores(
+        query_embedding, k=kbm.search_kwargs["k"], filter=filter
     )
     documents = []
     unique_page_contents = set()
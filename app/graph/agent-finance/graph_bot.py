@@ -7,6 +7,7 @@ from langchain.schema import Document
 from langgraph.graph import END, START, StateGraph
 from typing_extensions import TypedDict
 
+from ...config import config
 from ...prompt.agent_finance.bot import prompt as enterprise_context
 from ...vector_db.agent_finance import kbm
 from ..rag_graph_node import grade_rag, transform_query_for_rag
@@ -49,6 +50,8 @@ class GraphState(TypedDict):
     context: Annotated[List[Document], add]
     answer: Annotated[str, get_update]
     num_generations: int
+    answer_streamed: bool
+    packed_context: List[Document]
 
 
 class InputState(TypedDict):
@@ -99,7 +102,15 @@ workflow.add_node(
 )  # transform query
 workflow.add_node("web_search_node", web_search)  # web search
 workflow.add_node("grade_web_docs", grade_web)  # grade documents
-workflow.add_node("generate", generate)  # generate
+workflow.add_node(
+    "generate",
+    partial(
+        generate,
+        context_token_budget=config.context_packer_kwargs["agent_token_budgets"][
+            "finance"
+        ],
+    ),
+)
 workflow.add_node("final_answer", final_answer)  # final accepted answer
 
 # Build graph
@@ -137,7 +148,10 @@ workflow.add_edge("web_search_node", "grade_web_docs")
 workflow.add_edge("grade_web_docs", "generate")
 workflow.add_conditional_edges(
     "generate",
-    decide_how_to_respond,
+    partial(
+        decide_how_to_respond,
+        combined_grader=config.generation_grader_kwargs["combined"]["finance"],
+    ),
     {
         "need refined query": "request_refined_query",
         "not supported": "generate",
@@ -7,6 +7,7 @@ from langchain.schema import Document
 from langgraph.graph import END, START, StateGraph
 from typing_extensions import TypedDict
 
+from ...config import config
 from ...prompt.agent_general.bot import prompt as enterprise_context
 from ...vector_db.agent_general import kbm
 from ..file_gen_graph_node import image_generation, transform_query_for_image_gen
@@ -51,6 +52,8 @@ class GraphState(TypedDict):
     context: Annotated[List[Document], add]
     answer: Annotated[str, get_update]
     num_generations: int
+    answer_streamed: bool
+    packed_context: List[Document]
     image_blob_url: str
 
 
@@ -109,7 +112,15 @@ workflow.add_node(
 )  # transform query
 workflow.add_node("web_search_node", web_search)  # web search
 workflow.add_node("grade_web_docs", grade_web)  # grade documents
-workflow.add_node("generate", generate)  # generate
+workflow.add_node(
+    "generate",
+    partial(
+        generate,
+        context_token_budget=config.context_packer_kwargs["agent_token_budgets"][
+            "general"
+        ],
+    ),
+)
 workflow.add_node("final_answer", final_answer)  # final accepted answer
 
 # Build graph
@@ -148,7 +159,10 @@ workflow.add_edge("web_search_node", "grade_web_docs")
 workflow.add_edge("grade_web_docs", "generate")
 workflow.add_conditional_edges(
     "generate",
-    decide_how_to_respond,
+    partial(
+        decide_how_to_respond,
+        combined_grader=config.generation_grader_kwargs["combined"]["general"],
+    ),
     {
         "need refined query": "request_refined_query",
         "not supported": "generate",
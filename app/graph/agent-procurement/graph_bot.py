@@ -8,13 +8,18 @@ from langchain.schema import Document
 from langgraph.graph import END, START, StateGraph
 from typing_extensions import TypedDict
 
+from ...config import config
 from ...memory.checkpoint_factory import create_checkpoint_factory
 from ...prompt.agent_procurement.bot import prompt as enterprise_context
 from ...vector_db.agent_procurement import kbm
 from ..rag_graph_node import grade_rag, retrieve, transform_query_for_rag
 from ..response_graph_node import generate, generate_simple, request_refined_query
 from ..utils import get_update
-from ..utils_graph_edge import decide_how_to_respond, decide_to_search_web
+from ..utils_graph_edge import (
+    decide_how_to_respond,
+    decide_to_search_web,
+    decide_to_use_cached_answer,
+)
 from ..utils_graph_node import final_answer, image_parsing
 from ..web_search_graph_node import (
     grade_web,
@@ -56,6 +61,10 @@ class GraphState(TypedDict):
     context: Annotated[List[Document], add]
     answer: Annotated[str, get_update]
     num_generations: int
+    answer_streamed: bool
+    packed_context: List[Document]
+    semantic_cache_key: dict
+    semantic_cache_hit: bool
 
 
 class InputState(TypedDict):
@@ -100,7 +109,9 @@ workflow.add_node(
 )  # request refined query
 workflow.add_node("generate_simple", generate_simple)  # generate
 workflow.add_node("transform_query_for_rag", transform_query_for_rag)  # transform query
-workflow.add_node("retrieve", partial(retrieve, kbm=kbm))  # retrieve
+workflow.add_node(
+    "retrieve", partial(retrieve, kbm=kbm, use_semantic_cache=True)
+)  # retrieve
 workflow.add_node("grade_rag_docs", grade_rag)  # grade documents
 workflow.add_node(
     "transform_query_for_web_search", transform_query_for_web_search
@@ -118,7 +129,15 @@ workflow.add_node(
         ),
     ),
 )  # generate
-workflow.add_node("generate", generate)  # generate
+workflow.add_node(
+    "generate",
+    partial(
+        generate,
+        context_token_budget=config.context_packer_kwargs["agent_token_budgets"][
+            "procurement"
+        ],
+    ),
+)
 workflow.add_node("final_answer", final_answer)  # final accepted answer
 
 # Build graph
@@ -135,7 +154,14 @@ workflow.add_conditional_edges(
     },
 )
 workflow.add_edge("transform_query_for_rag", "retrieve")
-workflow.add_edge("retrieve", "grade_rag_docs")
+workflow.add_conditional_edges(
+    "retrieve",
+    decide_to_use_cached_answer,
+    {
+        "cache hit": "final_answer",
+        "cache miss": "grade_rag_docs",
+    },
+)
 workflow.add_conditional_edges(
     "grade_rag_docs",
     decide_to_search_web,
@@ -149,7 +175,10 @@ workflow.add_edge("web_search_node", "grade_web_docs")
 workflow.add_edge("grade_web_docs", "generate")
 workflow.add_conditional_edges(
     "generate",
-    decide_how_to_respond,
+    partial(
+        decide_how_to_respond,
+        combined_grader=config.generation_grader_kwargs["combined"]["procurement"],
+    ),
     {
         "need refined query": "request_refined_query",
         "not supported": "generate",
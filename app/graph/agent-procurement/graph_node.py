@@ -11,7 +11,8 @@ from ...chain.agent_procurement.sow_info_gatherer import (
 )
 from ...chain.file_gen_assistant import assistant
 from ...chain.filename_generator import filename_generator
-from ...memory.checkpointer_snowflake import SnowflakeSaver
+from ...memory.base_checkpointer import BaseCheckpointer
+from ...memory.snowflake_pool import run_in_snowflake_executor
 from ...tools.agent_procurement.doc_gen_tool import consultancy_services_sow_tool
 
 # from ...tools.agent_procurement.send_email_tool import (
@@ -142,7 +143,7 @@ async def gather_sow_details(
 async def sow_doc_generation(
     state,
     config: RunnableConfig,
-    checkpoint_saver: Callable[[str], Callable[[str, str], SnowflakeSaver]],
+    checkpoint_saver: Callable[[str], Callable[[str, str], BaseCheckpointer]],
 ):
     """
     Generate an SOW document.
@@ -258,17 +259,18 @@ async def sow_doc_generation(
         usage_metadata=generation[-1].usage_metadata,
     )
 
-    # Update checkpoint
-    checkpoint = checkpoint_saver(user_id, session_id)._load_checkpoint
-    checkpoint["LatestGeneratedSoWFileName"] = sow_filename
-    checkpoint["LatestGeneratedSoWBlobURL"] = sow_blob_url
-    if "ListGeneratedSoWBlobURL" in checkpoint.keys():
-        checkpoint["ListGeneratedSoWFileName"].append(sow_filename)
-        checkpoint["ListGeneratedSoWBlobURL"].append(sow_blob_url)
-    else:
-        checkpoint["ListGeneratedSoWFileName"] = [sow_filename]
-        checkpoint["ListGeneratedSoWBlobURL"] = [sow_blob_url]
-    checkpoint_saver(user_id, session_id).add_checkpoint(checkpoint)
+    # Update checkpoint with a single delta instead of a full copy
+    await run_in_snowflake_executor(
+        checkpoint_saver(user_id, session_id).update_checkpoint,
+        latest={
+            "LatestGeneratedSoWFileName": sow_filename,
+            "LatestGeneratedSoWBlobURL": sow_blob_url,
+        },
+        appended={
+            "ListGeneratedSoWFileName": sow_filename,
+            "ListGeneratedSoWBlobURL": sow_blob_url,
+        },
+    )
 
     return {
         "sow_filename": sow_filename,
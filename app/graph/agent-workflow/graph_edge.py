@@ -7,6 +7,7 @@ from ...chain.agent_workflow.query_classifier import classifier as query_classif
 from ...chain.documents_summarizer import summarizer
 from ...chain.moderator import query_grader as moderator
 from ...chain.query_rag_rewriter import query_rewriter
+from ...tools.web_search_tool import web_search_client
 from ...vector_db.utils import KnowledgeBaseManager
 
 logger = logging.getLogger(__name__)
@@ -35,7 +36,8 @@ async def query_router(
     chat_history = state["chat_history"]
     enterprise_context = state["enterprise_context"]
     image_context = state["image_context"]
-    web_search = state["web_search"]
+    # Web search is skipped while the search quota is exceeded
+    web_search = state["web_search"] and web_search_client.available
 
     try:
         score = await moderator.ainvoke(
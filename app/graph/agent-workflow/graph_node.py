@@ -20,6 +20,8 @@ get_session_history = create_session_factory(
         f"{re.sub('-', '_', BOT_NAME).upper()}_" "CORTEX_ANALYST_MESSAGES_STORE"
     ),
     max_len_history=5,
+    # Cortex Analyst is sent the messages as they were exchanged
+    summarize=False,
 )
 
 
@@ -54,11 +56,12 @@ async def sql_query(
     session_id = configurable["session_id"]
     message_timereceived = configurable["message_timereceived"]
 
-    messages = get_session_history(
+    session_history = get_session_history(
         user_id=user_id,
         session_id=session_id,
         message_timereceived=message_timereceived,
-    ).messages
+    )
+    messages = await session_history.aget_messages()
 
     if len(messages) == 0:
         messages = [HumanMessage(content=query)]
@@ -81,17 +84,36 @@ async def sql_query(
                 f"<<<\n{sql_result['human_query']}\n>>>, "
                 "the following SQL query was generated: "
                 f"<<<\n{sql_result['sql_query']}\n>>>, "
-                "and the following information was retrieved:\n\n"
+                "and the following information was retrieved, as the columns, "
+                "number of rows and first rows of the result, with the "
+                "aggregates of each column for larger results:\n\n"
                 f"{sql_result['sql_result']}.",
                 metadata={
                     "sql_request_id": sql_result["request_id"],
                     "human_query": sql_result["human_query"],
                     "sql_query": sql_result["sql_query"],
                     "sql_result": sql_result["sql_result"],
+                    "sql_artifact": sql_result["sql_artifact"],
+                    "truncated": sql_result["truncated"],
+                    "from_cache": sql_result["from_cache"],
                     "context_type": "sql_search",
                 },
             )
         )
+        if sql_result["from_cache"]:
+            # Notify user that the SQL result was served from cache
+            await adispatch_custom_event(
+                "sql_result_cached",
+                {"sql_from_cache": True},
+                config=config,
+            )
+        if sql_result["truncated"]:
+            # Notify user that only part of the SQL result was retrieved
+            await adispatch_custom_event(
+                "sql_result_truncated",
+                {"sql_truncated": True},
+                config=config,
+            )
     except ToolException as e:
         logger.error(e)
         sql_result = {
@@ -99,6 +121,9 @@ async def sql_query(
             "human_query": "We could not interpret your question.",
             "sql_query": "SELECT * FROM table",
             "sql_result": "[]",
+            "sql_artifact": None,
+            "truncated": False,
+            "from_cache": False,
         }
         context.append(
             Document(
@@ -110,6 +135,9 @@ async def sql_query(
                     "human_query": sql_result["human_query"],
                     "sql_query": sql_result["sql_query"],
                     "sql_result": sql_result["sql_result"],
+                    "sql_artifact": sql_result["sql_artifact"],
+                    "truncated": sql_result["truncated"],
+                    "from_cache": sql_result["from_cache"],
                     "context_type": "sql_search",
                 },
             )
@@ -130,25 +158,18 @@ async def sql_query(
         }
 
     # Add messages to store
-    get_session_history(
-        user_id=user_id,
-        session_id=session_id,
-        message_timereceived=message_timereceived,
-    ).add_message(HumanMessage(content=query))
-
-    get_session_history(
-        user_id=user_id,
-        session_id=session_id,
-        message_timereceived=message_timereceived,
-    ).add_message(
-        AIMessage(
-            content=json.dumps(
-                {
-                    "text": sql_result["human_query"],
-                    "sql": sql_result["sql_query"],
-                }
-            )
-        )
+    await session_history.aadd_messages(
+        [
+            HumanMessage(content=query),
+            AIMessage(
+                content=json.dumps(
+                    {
+                        "text": sql_result["human_query"],
+                        "sql": sql_result["sql_query"],
+                    }
+                )
+            ),
+        ]
     )
 
     return {
@@ -9,7 +9,8 @@ from ..chain.file_gen_assistant import assistant
 from ..chain.file_generator import html_writer
 from ..chain.filename_generator import html_filename_generator as filename_generator
 from ..chain.query_image_gen_rewriter import query_rewriter
-from ..memory.checkpointer_snowflake import SnowflakeSaver
+from ..memory.base_checkpointer import BaseCheckpointer
+from ..memory.snowflake_pool import run_in_snowflake_executor
 from ..tools.agent_general.file_gen_tool import image_gen_tool, pdf_gen_tool
 
 logger = logging.getLogger(__name__)
@@ -95,7 +96,7 @@ async def transform_query_for_image_gen(
 async def image_generation(
     state,
     config: RunnableConfig,
-    checkpoint_saver: Callable[[str], Callable[[str, str], SnowflakeSaver]],
+    checkpoint_saver: Callable[[str], Callable[[str, str], BaseCheckpointer]],
 ):
     """
     Image generation based on the re-phrased question.
@@ -205,17 +206,18 @@ async def image_generation(
         usage_metadata=generation[-1].usage_metadata,
     )
 
-    # Update checkpoint
-    checkpoint = checkpoint_saver(user_id, session_id)._load_checkpoint
-    checkpoint["LatestGeneratedImageBlobURL"] = image_blob_url
-    checkpoint["LatestGeneratedImageRevisedPrompt"] = image_gen_message
-    if "ListGeneratedImageBlobURL" in checkpoint.keys():
-        checkpoint["ListGeneratedImageBlobURL"].append(image_blob_url)
-        checkpoint["ListGeneratedImageRevisedPrompt"].append(image_gen_message)
-    else:
-        checkpoint["ListGeneratedImageBlobURL"] = [image_blob_url]
-        checkpoint["ListGeneratedImageRevisedPrompt"] = [image_gen_message]
-    checkpoint_saver(user_id, session_id).add_checkpoint(checkpoint)
+    # Update checkpoint with a single delta instead of a full copy
+    await run_in_snowflake_executor(
+        checkpoint_saver(user_id, session_id).update_checkpoint,
+        latest={
+            "LatestGeneratedImageBlobURL": image_blob_url,
+            "LatestGeneratedImageRevisedPrompt": image_gen_message,
+        },
+        appended={
+            "ListGeneratedImageBlobURL": image_blob_url,
+            "ListGeneratedImageRevisedPrompt": image_gen_message,
+        },
+    )
 
     return {
         "context": [],
@@ -227,7 +229,7 @@ async def image_generation(
 async def pdf_generation(
     state,
     config: RunnableConfig,
-    checkpoint_saver: Callable[[str], Callable[[str, str], SnowflakeSaver]],
+    checkpoint_saver: Callable[[str], Callable[[str, str], BaseCheckpointer]],
 ):
     """
     PDF document generation based on the user's requirement.
@@ -393,17 +395,18 @@ async def pdf_generation(
         usage_metadata=generation[-1].usage_metadata,
     )
 
-    # Update checkpoint
-    checkpoint = checkpoint_saver(user_id, session_id)._load_checkpoint
-    checkpoint["LatestGeneratedPDFFileName"] = pdf_filename
-    checkpoint["LatestGeneratedPDFBlobURL"] = pdf_blob_url
-    if "ListGeneratedPDFBlobURL" in checkpoint.keys():
-        checkpoint["ListGeneratedPDFFileName"].append(pdf_filename)
-        checkpoint["ListGeneratedPDFBlobURL"].append(pdf_blob_url)
-    else:
-        checkpoint["ListGeneratedPDFFileName"] = [pdf_filename]
-        checkpoint["ListGeneratedPDFBlobURL"] = [pdf_blob_url]
-    checkpoint_saver(user_id, session_id).add_checkpoint(checkpoint)
+    # Update checkpoint with a single delta instead of a full copy
+    await run_in_snowflake_executor(
+        checkpoint_saver(user_id, session_id).update_checkpoint,
+        latest={
+            "LatestGeneratedPDFFileName": pdf_filename,
+            "LatestGeneratedPDFBlobURL": pdf_blob_url,
+        },
+        appended={
+            "ListGeneratedPDFFileName": pdf_filename,
+            "ListGeneratedPDFBlobURL": pdf_blob_url,
+        },
+    )
 
     return {
         "context": [],
@@ -1,7 +1,13 @@
 import logging
 
+from langchain_core.messages import AIMessage
+
 from ..chain.query_rag_rewriter import query_rewriter
 from ..chain.retrieval_grader import retrieval_grader
+from ..config import config
+from ..embedding_model.azure_emb import embeddings_model
+from ..memory.summary_memory import history_window
+from ..vector_db.semantic_cache import prompt_scope, semantic_answer_cache
 from ..vector_db.utils import KnowledgeBaseManager
 from .utils import generate_individual_docs_filter, generate_public_docs_filter
 
@@ -31,7 +37,7 @@ async def transform_query_for_rag(state):
         {
             "query": query,
             "timestamp": timestamp,
-            "chat_history": chat_history,
+            "chat_history": history_window(chat_history, "rewriter"),
             "enterprise_context": enterprise_context,
             "image_context": image_context,
         }
@@ -58,8 +64,9 @@ async def doc_retrieve(
     doc_ids = state["doc_ids"]
 
     # Retrieval
-    results = await kbm.vectorstore.asimilarity_search_with_relevance_scores(
-        query=query,
+    query_embedding = await embeddings_model.aembed_query(query)
+    results = await kbm.asimilarity_search_by_vector_with_relevance_scores(
+        query_embedding,
         k=kbm.search_kwargs["k"] * 2,
         filter=generate_individual_docs_filter(doc_ids),
     )
@@ -82,15 +89,35 @@ async def doc_retrieve(
     return {"rag_context": documents}
 
 
+def _is_semantic_cache_eligible(state) -> bool:
+    """
+    Check whether the answer to the query only depends on the rag query,
+    public documents and the scope of the prompt, i.e. no chat history, user
+    documents, web search results or user-shared images are involved.
+    """
+    image_type, image_data = state.get("image_type_data", ([], []))
+    return (
+        config.semantic_cache_kwargs["enabled"]
+        and not state.get("chat_history")
+        and not state.get("doc_ids")
+        and not state.get("web_search", False)
+        and len(image_data) == 0
+    )
+
+
 async def retrieve(
     state,
     kbm: KnowledgeBaseManager,
+    use_semantic_cache: bool = False,
 ):
     """
     Retrieve public documents only
 
     Args:
         state (dict): The current graph state
+        kbm (KnowledgeBaseManager): Knowledge base of the AI Agent app
+        use_semantic_cache (bool): Serve previously graded answers for
+            semantically equivalent queries
 
     Returns:
         state (dict):   New key added to state, documents,
@@ -99,9 +126,35 @@ async def retrieve(
     logger.info("---RETRIEVE---")
     query = state["rag_query"]
 
+    query_embedding = await embeddings_model.aembed_query(query)
+
+    semantic_cache_key = None
+    kb_version = None
+    if use_semantic_cache and _is_semantic_cache_eligible(state):
+        kb_version = await kbm.aget_kb_version()
+    if kb_version is not None:
+        semantic_cache_key = {
+            "ai_agent_app_name": kbm.ai_agent_app_name,
+            "query_embedding": query_embedding,
+            "kb_version": kb_version,
+            "scope": prompt_scope(
+                state["username"], state["timestamp"], state["enterprise_context"]
+            ),
+        }
+        cached_answer = semantic_answer_cache.lookup(**semantic_cache_key)
+        if cached_answer is not None:
+            logger.info("---DECISION: SERVE CACHED ANSWER---")
+            answer, context = cached_answer
+            return {
+                "rag_context": context,
+                "context": context,
+                "answer": AIMessage(content=answer),
+                "semantic_cache_hit": True,
+            }
+
     # Retrieval
-    results = await kbm.vectorstore.asimilarity_search_with_relevance_scores(
-        query=query,
+    results = await kbm.asimilarity_search_by_vector_with_relevance_scores(
+        query_embedding,
         k=kbm.search_kwargs["k"],
         filter=generate_public_docs_filter(),
     )
@@ -121,7 +174,11 @@ async def retrieve(
                 unique_page_contents.add(doc.page_content)
         else:
             continue
-    return {"rag_context": documents}
+    return {
+        "rag_context": documents,
+        "semantic_cache_key": semantic_cache_key,
+        "semantic_cache_hit": False,
+    }
 
 
 async def grade_rag(state):
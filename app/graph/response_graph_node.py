@@ -1,4 +1,5 @@
 import logging
+from typing import List, Optional
 
 from langchain_core.callbacks.manager import adispatch_custom_event
 from langchain_core.messages import AIMessage
@@ -6,16 +7,43 @@ from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 from langchain_core.runnables import RunnableConfig
 from openai import BadRequestError
 
+from ..config import config as app_config
 from ..llm_model.azure_llm import chat_model
+from ..memory.summary_memory import history_window
 from ..prompt.response_generator import (
     context_system_prompt,
     refined_response_system_prompt,
     simple_system_prompt,
 )
+from ..vector_db.context_packer import context_packer
 
 logger = logging.getLogger(__name__)
 
 
+async def retract_streamed_answer(state, config: RunnableConfig, reason: str):
+    """Tell the client to discard the answer streamed so far, if any.
+
+    Answer chunks streamed after this event replace the retracted answer.
+    """
+    if state.get("answer_streamed", False):
+        logger.info(f"---RETRACT STREAMED ANSWER: {reason}---")
+        await adispatch_custom_event(
+            "final_answer_retract",
+            {"retract_answer": True, "reason": reason},
+            config=config,
+        )
+
+
+def _aggregate_chunks(chunks: List[AIMessage]) -> AIMessage:
+    return AIMessage(
+        content="".join(chunk.content for chunk in chunks),
+        additional_kwargs=chunks[-1].additional_kwargs,
+        id=chunks[-1].id,
+        response_metadata=chunks[-1].response_metadata,
+        usage_metadata=chunks[-1].usage_metadata,
+    )
+
+
 async def request_refined_query(
     state,
     config: RunnableConfig,
@@ -31,6 +59,7 @@ async def request_refined_query(
     """
 
     logger.info("---REQUEST FOR A REFINED QUERY---")
+    await retract_streamed_answer(state, config, "could not generate a grounded answer")
     query = state["query"]
     username = state["username"]
     timestamp = state["timestamp"]
@@ -53,7 +82,7 @@ async def request_refined_query(
             "query": query,
             "username": username,
             "timestamp": timestamp,
-            "chat_history": chat_history,
+            "chat_history": history_window(chat_history, "generator"),
             "enterprise_context": enterprise_context,
             "web_search": web_search,
         }
@@ -178,7 +207,7 @@ async def generate_simple(
             "query": query,
             "username": username,
             "timestamp": timestamp,
-            "chat_history": chat_history,
+            "chat_history": history_window(chat_history, "generator"),
             "enterprise_context": enterprise_context,
             "web_search": web_search,
         }
@@ -269,12 +298,23 @@ async def generate_simple(
 async def generate(
     state,
     config: RunnableConfig,
+    stream_first: Optional[bool] = None,
+    context_token_budget: Optional[int] = None,
 ):
     """
     Generate answer
 
+    In stream-first mode the answer is streamed to the client while it is
+    generated, before it is graded. A failed grade retracts it, see
+    `retract_streamed_answer`.
+
     Args:
         state (dict): The current graph state
+        stream_first (bool): Stream the answer before grading it, defaults to
+            the stream_first_kwargs setting
+        context_token_budget (int): Token budget of the context in the prompt,
+            set per agent by its graph, defaults to the context_packer_kwargs
+            token_budget
 
     Returns:
         state (dict):   New key added to state, generation, that
@@ -292,6 +332,18 @@ async def generate(
     context = state.get("context", [])
     num_generations = state.get("num_generations", 0)
     num_generations += 1
+    if stream_first is None:
+        stream_first = app_config.stream_first_kwargs["enabled"]
+
+    # The generator and graders get the context packed into the token budget,
+    # the client gets the full context for its citations
+    packed_context = context
+    if app_config.context_packer_kwargs["enabled"]:
+        packed_context = await context_packer.apack(
+            state.get("rag_query") or query,
+            context,
+            token_budget=context_token_budget,
+        )
 
     # RAG generation
     try:
@@ -299,9 +351,9 @@ async def generate(
             "query": query,
             "username": username,
             "timestamp": timestamp,
-            "chat_history": chat_history,
+            "chat_history": history_window(chat_history, "generator"),
             "enterprise_context": enterprise_context,
-            "context": context,
+            "context": packed_context,
             "web_search": web_search,
         }
         human_prompt = [
@@ -335,7 +387,31 @@ async def generate(
         )
         # Chain
         response_generator = prompt | chat_model
-        generation = await response_generator.ainvoke(human_input)
+        if stream_first:
+            await retract_streamed_answer(state, config, "regenerating answer")
+            await adispatch_custom_event(
+                "final_context",
+                {"context": [doc.dict() for doc in context]},
+                config=config,
+            )
+            chunks = []
+            async for msg in response_generator.astream(
+                human_input,
+                config=config,
+            ):
+                chunks.append(msg)
+                await adispatch_custom_event(
+                    "final_answer",
+                    {"answer": msg.content},
+                    config=config,
+                )
+            generation = _aggregate_chunks(chunks)
+        else:
+            generation = await response_generator.ainvoke(human_input)
+        if generation.usage_metadata:
+            logger.info(
+                f"Generate input tokens: {generation.usage_metadata['input_tokens']}"
+            )
     except BadRequestError:
         content_safety_fallback_message = AIMessage(
             content=(
@@ -347,6 +423,10 @@ async def generate(
                 "Kindly start a new chat. Goodbye!"
             )
         )
+        # Drop whatever was streamed before the content filter kicked in
+        await retract_streamed_answer(
+            {"answer_streamed": stream_first}, config, "content filtered"
+        )
         for chunk in content_safety_fallback_message.content.split(" "):
             await adispatch_custom_event(
                 "final_answer",
@@ -358,9 +438,13 @@ async def generate(
             "image_gen_base64": "",
             "answer": content_safety_fallback_message,
             "num_generations": num_generations,
+            "answer_streamed": stream_first,
+            "packed_context": packed_context,
         }
     return {
         "answer": generation,
         "image_gen_base64": "",
         "num_generations": num_generations,
+        "answer_streamed": stream_first,
+        "packed_context": packed_context,
     }
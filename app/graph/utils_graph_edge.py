@@ -1,9 +1,11 @@
 import logging
 
+from langchain_core.callbacks import get_usage_metadata_callback
 from openai import BadRequestError
 
 from ..chain.answer_grader import answer_grader
 from ..chain.documents_summarizer import summarizer
+from ..chain.generation_grader import generation_grader
 from ..chain.hallucination_grader import hallucination_grader
 from ..chain.moderator import query_grader as moderator
 from ..chain.query_classifier import (
@@ -12,6 +14,8 @@ from ..chain.query_classifier import (
     simple_rag_web_query_classifier,
 )
 from ..chain.query_rag_rewriter import query_rewriter
+from ..memory.summary_memory import history_window
+from ..tools.web_search_tool import web_search_client
 from ..vector_db.utils import KnowledgeBaseManager
 from .utils import generate_individual_docs_filter
 
@@ -40,14 +44,15 @@ async def simple_rag_web_query_router(
     chat_history = state["chat_history"]
     enterprise_context = state["enterprise_context"]
     image_context = state["image_context"]
-    web_search = state["web_search"]
+    # Web search is skipped while the search quota is exceeded
+    web_search = state["web_search"] and web_search_client.available
 
     try:
         score = await moderator.ainvoke(
             {
                 "query": query,
                 "timestamp": timestamp,
-                "chat_history": chat_history,
+                "chat_history": history_window(chat_history, "moderator"),
                 "enterprise_context": enterprise_context,
                 "image_context": image_context,
             }
@@ -70,7 +75,7 @@ async def simple_rag_web_query_router(
                 {
                     "query": query,
                     "timestamp": timestamp,
-                    "chat_history": chat_history,
+                    "chat_history": history_window(chat_history, "rewriter"),
                     "enterprise_context": enterprise_context,
                     "image_context": image_context,
                 }
@@ -109,7 +114,7 @@ async def simple_rag_web_query_router(
             {
                 "query": query,
                 "timestamp": timestamp,
-                "chat_history": chat_history,
+                "chat_history": history_window(chat_history, "classifier"),
                 "enterprise_context": enterprise_context,
                 "summary_docs": summary_docs,
                 "image_context": image_context,
@@ -158,14 +163,15 @@ async def simple_rag_web_img_query_router(
     chat_history = state["chat_history"]
     enterprise_context = state["enterprise_context"]
     image_context = state["image_context"]
-    web_search = state["web_search"]
+    # Web search is skipped while the search quota is exceeded
+    web_search = state["web_search"] and web_search_client.available
 
     try:
         score = await moderator.ainvoke(
             {
                 "query": query,
                 "timestamp": timestamp,
-                "chat_history": chat_history,
+                "chat_history": history_window(chat_history, "moderator"),
                 "enterprise_context": enterprise_context,
                 "image_context": image_context,
             }
@@ -188,7 +194,7 @@ async def simple_rag_web_img_query_router(
                 {
                     "query": query,
                     "timestamp": timestamp,
-                    "chat_history": chat_history,
+                    "chat_history": history_window(chat_history, "rewriter"),
                     "enterprise_context": enterprise_context,
                     "image_context": image_context,
                 }
@@ -228,7 +234,7 @@ async def simple_rag_web_img_query_router(
             {
                 "query": query,
                 "timestamp": timestamp,
-                "chat_history": chat_history,
+                "chat_history": history_window(chat_history, "classifier"),
                 "enterprise_context": enterprise_context,
                 "summary_docs": summary_docs,
                 "image_context": image_context,
@@ -283,14 +289,15 @@ async def simple_rag_web_img_pdf_query_router(
     chat_history = state["chat_history"]
     enterprise_context = state["enterprise_context"]
     image_context = state["image_context"]
-    web_search = state["web_search"]
+    # Web search is skipped while the search quota is exceeded
+    web_search = state["web_search"] and web_search_client.available
 
     try:
         score = await moderator.ainvoke(
             {
                 "query": query,
                 "timestamp": timestamp,
-                "chat_history": chat_history,
+                "chat_history": history_window(chat_history, "moderator"),
                 "enterprise_context": enterprise_context,
                 "image_context": image_context,
             }
@@ -313,7 +320,7 @@ async def simple_rag_web_img_pdf_query_router(
                 {
                     "query": query,
                     "timestamp": timestamp,
-                    "chat_history": chat_history,
+                    "chat_history": history_window(chat_history, "rewriter"),
                     "enterprise_context": enterprise_context,
                     "image_context": image_context,
                 }
@@ -353,7 +360,7 @@ async def simple_rag_web_img_pdf_query_router(
             {
                 "query": query,
                 "timestamp": timestamp,
-                "chat_history": chat_history,
+                "chat_history": history_window(chat_history, "classifier"),
                 "enterprise_context": enterprise_context,
                 "summary_docs": summary_docs,
                 "image_context": image_context,
@@ -413,6 +420,25 @@ def rag_router(state):
         return "public retrieval"
 
 
+def decide_to_use_cached_answer(state):
+    """
+    Determines whether a semantically cached answer was found at retrieval.
+
+    Args:
+        state (dict): The current graph state
+
+    Returns:
+        str: Decision for the next node to call.
+    """
+
+    if state.get("semantic_cache_hit", False):
+        logger.info("---DECISION: SEND CACHED ANSWER---")
+        return "cache hit"
+    else:
+        logger.info("---DECISION: GRADE RETRIEVED DOCUMENTS---")
+        return "cache miss"
+
+
 def decide_to_search_web(state):
     """
     Determines whether to add web search results or not.
@@ -425,7 +451,8 @@ def decide_to_search_web(state):
     """
 
     logger.info("---ASSESS GRADED DOCUMENTS---")
-    web_search = state["web_search"]
+    # Web search is skipped while the search quota is exceeded
+    web_search = state["web_search"] and web_search_client.available
 
     if web_search:
         # We will re-generate a new query for web search
@@ -437,13 +464,30 @@ def decide_to_search_web(state):
         return "no web search"
 
 
-async def decide_how_to_respond(state):
+async def _agrade(grader, grader_input: dict, grader_name: str):
+    """Run a grader and log the input tokens of its prompt, which holds the
+    packed context."""
+    with get_usage_metadata_callback() as usage:
+        score = await grader.ainvoke(grader_input)
+    # No usage is reported for cached responses
+    input_tokens = sum(
+        usage_metadata["input_tokens"]
+        for usage_metadata in usage.usage_metadata.values()
+    )
+    if input_tokens:
+        logger.info(f"{grader_name} input tokens: {input_tokens}")
+    return score
+
+
+async def decide_how_to_respond(state, combined_grader: bool = True):
     """
     Determines whether the generation is grounded in the document
     and answers question.
 
     Args:
         state (dict): The current graph state
+        combined_grader (bool): Grade grounding and usefulness in a single
+            LLM call instead of two sequential calls
 
     Returns:
         str: Decision for the next node to call.
@@ -455,7 +499,7 @@ async def decide_how_to_respond(state):
     chat_history = state["chat_history"]
     enterprise_context = state["enterprise_context"]
     image_context = state["image_context"]
-    context = state["context"]
+    context = state.get("packed_context") or state["context"]
     generation = state["answer"]
     num_generations = state["num_generations"]
 
@@ -466,45 +510,38 @@ async def decide_how_to_respond(state):
         )
         return "need refined query"
 
+    grader_input = {
+        "query": query,
+        "timestamp": timestamp,
+        "chat_history": history_window(chat_history, "grader"),
+        "enterprise_context": enterprise_context,
+        "image_context": image_context,
+        "context": context,
+        "generation": generation,
+    }
+    if combined_grader:
+        score = await _agrade(generation_grader, grader_input, "Generation grader")
+        grounded, useful = score.grounded_score, score.useful_score
     else:
-        score = await hallucination_grader.ainvoke(
-            {
-                "query": query,
-                "timestamp": timestamp,
-                "chat_history": chat_history,
-                "enterprise_context": enterprise_context,
-                "image_context": image_context,
-                "context": context,
-                "generation": generation,
-            }
+        score = await _agrade(
+            hallucination_grader, grader_input, "Hallucination grader"
         )
-        grade = score.binary_score
-
-        # Check hallucination
-        if grade == "yes":
-            logger.info("---DECISION: GENERATION IS GROUNDED IN DOCUMENTS---")
-            # Check question-answering
-            logger.info("---GRADE GENERATION vs QUESTION---")
-            score = await answer_grader.ainvoke(
-                {
-                    "query": query,
-                    "timestamp": timestamp,
-                    "chat_history": chat_history,
-                    "enterprise_context": enterprise_context,
-                    "image_context": image_context,
-                    "context": context,
-                    "generation": generation,
-                }
-            )
-            grade = score.binary_score
-            if grade == "yes":
-                logger.info("---DECISION: GENERATION ADDRESSES QUESTION---")
-                return "useful"
-            else:
-                logger.info("---DECISION: GENERATION DOES NOT ADDRESS QUESTION---")
-                return "not useful"
-        else:
-            logger.info(
-                "---DECISION: GENERATION IS NOT GROUNDED IN DOCUMENTS, RE-TRY---"
-            )
-            return "not supported"
+        grounded, useful = score.binary_score, None
+
+    # Check hallucination
+    if grounded != "yes":
+        logger.info("---DECISION: GENERATION IS NOT GROUNDED IN DOCUMENTS, RE-TRY---")
+        return "not supported"
+
+    logger.info("---DECISION: GENERATION IS GROUNDED IN DOCUMENTS---")
+    # Check question-answering
+    logger.info("---GRADE GENERATION vs QUESTION---")
+    if useful is None:
+        score = await _agrade(answer_grader, grader_input, "Answer grader")
+        useful = score.binary_score
+    if useful == "yes":
+        logger.info("---DECISION: GENERATION ADDRESSES QUESTION---")
+        return "useful"
+    else:
+        logger.info("---DECISION: GENERATION DOES NOT ADDRESS QUESTION---")
+        return "not useful"
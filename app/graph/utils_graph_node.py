@@ -7,6 +7,8 @@ from langchain_core.runnables import RunnableConfig
 from openai import BadRequestError
 
 from ..llm_model.azure_llm import helper_model
+from ..memory.summary_memory import history_window
+from ..vector_db.semantic_cache import semantic_answer_cache
 
 logger = logging.getLogger(__name__)
 
@@ -55,7 +57,7 @@ async def image_parsing(
         human_input = {
             "query": query,
             "timestamp": timestamp,
-            "chat_history": chat_history,
+            "chat_history": history_window(chat_history, "image_parser"),
             "enterprise_context": enterprise_context,
         }
         human_prompt = [
@@ -132,16 +134,26 @@ async def final_answer(
     context = state["context"]
     answer = state["answer"]
 
-    # Write chunks of final answer
-    final_context = [doc.dict() for doc in context]
-    await adispatch_custom_event(
-        "final_context",
-        {"context": final_context},
-        config=config,
-    )
-    for chunk in answer.content.split(" "):
+    # Write chunks of final answer, unless they were streamed while generated
+    if not state.get("answer_streamed", False):
+        final_context = [doc.dict() for doc in context]
         await adispatch_custom_event(
-            "final_answer",
-            {"answer": chunk + " "},
+            "final_context",
+            {"context": final_context},
             config=config,
         )
+        for chunk in answer.content.split(" "):
+            await adispatch_custom_event(
+                "final_answer",
+                {"answer": chunk + " "},
+                config=config,
+            )
+
+    # Cache the graded answer for semantically equivalent public-doc queries
+    semantic_cache_key = state.get("semantic_cache_key")
+    if semantic_cache_key and not state.get("semantic_cache_hit", False):
+        semantic_answer_cache.store(
+            **semantic_cache_key,
+            answer=answer.content,
+            context=context,
+        )
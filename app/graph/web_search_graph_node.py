@@ -1,4 +1,3 @@
-import json
 import logging
 
 from langchain.schema import Document
@@ -7,21 +6,12 @@ from langchain_core.runnables import RunnableConfig
 
 from ..chain.query_web_search_rewriter import query_rewriter
 from ..chain.retrieval_grader import retrieval_grader
+from ..memory.summary_memory import history_window
 from ..tools.web_search_tool import web_search_tool
 
 logger = logging.getLogger(__name__)
 
 
-def preprocess_json_string(json_string):
-    # Replace single quotes with double quotes
-    json_string = json_string.replace("'", '"')
-
-    # Escape backslashes
-    json_string = json_string.replace("\\", "\\\\")
-
-    return json_string
-
-
 async def transform_query_for_web_search(
     state,
     config: RunnableConfig,
@@ -55,7 +45,7 @@ async def transform_query_for_web_search(
         {
             "query": query,
             "timestamp": timestamp,
-            "chat_history": chat_history,
+            "chat_history": history_window(chat_history, "rewriter"),
             "enterprise_context": enterprise_context,
             "image_context": image_context,
         }
@@ -76,37 +66,23 @@ async def web_search(state):
 
     logger.info("---WEB SEARCH---")
     query = state["web_query"]
-    context = []
 
-    # Web search
+    # Web search, skipped while the search quota is exceeded
     web_results = await web_search_tool.ainvoke({"query": query})
-    if "HTTPError('403 Client Error: Quota Exceeded" not in str(web_results):
-        try:
-            prepared_json_string = preprocess_json_string(web_results)
-            web_results = json.loads(prepared_json_string)
-            if len(web_results) > 0:
-                web_results_docs = [
-                    Document(
-                        page_content=f"On the website titled: '{r['title']}' "
-                        f"(URL '{r['link']}'), "
-                        f"the following information was found: '{r['snippet']}'.",
-                        metadata={
-                            "title": r["title"],
-                            "URL": r["link"],
-                            "snippet": r["snippet"],
-                            "context_type": "web_search_result",
-                        },
-                    )
-                    for r in web_results
-                    if ("title" in r.keys())
-                    and ("link" in r.keys())
-                    and ("snippet" in r.keys())
-                ]
-                context.extend(web_results_docs)
-        except json.JSONDecodeError as e:
-            logger.error("JSONDecodeError:", e)
-        except Exception as e:
-            logger.error("An unexpected error occurred:", e)
+    context = [
+        Document(
+            page_content=f"On the website titled: '{r['title']}' "
+            f"(URL '{r['link']}'), "
+            f"the following information was found: '{r['snippet']}'.",
+            metadata={
+                "title": r["title"],
+                "URL": r["link"],
+                "snippet": r["snippet"],
+                "context_type": "web_search_result",
+            },
+        )
+        for r in web_results
+    ]
 
     return {"web_context": context}
 
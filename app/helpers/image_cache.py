@@ -0,0 +1,299 @@
+import asyncio
+import base64
+import logging
+import math
+import threading
+from collections import OrderedDict
+from typing import TYPE_CHECKING, List, Optional, Sequence, Tuple
+
+from azure.core.exceptions import ResourceNotFoundError, ResourceNotModifiedError
+
+from ..config import config
+from .image_normalizer import ImageNormalizer
+
+# The Azure Storage and Identity SDKs are imported on the first download, to
+# keep them out of the server startup
+if TYPE_CHECKING:
+    from azure.identity import ClientSecretCredential
+    from azure.identity.aio import ClientSecretCredential as AsyncClientSecretCredential
+
+logger = logging.getLogger(__name__)
+
+# Magic numbers of the image formats, named like PIL's Image.format
+IMAGE_SIGNATURES = (
+    (b"\x89PNG\r\n\x1a\n", "png"),
+    (b"\xff\xd8\xff", "jpeg"),
+    (b"GIF87a", "gif"),
+    (b"GIF89a", "gif"),
+    (b"BM", "bmp"),
+    (b"II*\x00", "tiff"),
+    (b"MM\x00*", "tiff"),
+)
+
+
+def detect_image_format(data: bytes) -> Optional[str]:
+    """Detect the format of an image from its header bytes.
+
+    Returns:
+        The lowercase format name, or None if the data is not a known image.
+    """
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "webp"
+    for signature, image_format in IMAGE_SIGNATURES:
+        if data.startswith(signature):
+            return image_format
+    return None
+
+
+class BlobImageCache:
+    """LRU cache of the images uploaded to Azure Blob Storage.
+
+    Entries are keyed by blob URL and validated against the blob ETag with a
+    conditional download, so an unchanged image referenced again in a later
+    turn costs a single 304 round trip instead of a full download.
+
+    Args:
+        max_entries: maximum number of cached images
+        max_bytes: maximum total size of the cached base64 data
+        max_concurrency: maximum number of concurrent downloads
+        normalizer: shrinks images before they are cached, if given
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 256,
+        max_bytes: int = 256 * 1024 * 1024,
+        max_concurrency: int = 8,
+        normalizer: Optional[ImageNormalizer] = None,
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.max_concurrency = max_concurrency
+        self.normalizer = normalizer
+        self._entries: OrderedDict = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self._credential = None
+        self._async_credential = None
+        self._semaphore = None
+        self.hits = 0
+        self.misses = 0
+        # Base64 prompt bytes and image tokens sent, before and after normalization
+        self.turn_totals = {
+            "images": 0,
+            "bytes_before": 0,
+            "bytes_after": 0,
+            "tokens_before": 0,
+            "tokens_after": 0,
+        }
+
+    @property
+    def credential(self) -> "ClientSecretCredential":
+        if self._credential is None:
+            from azure.identity import ClientSecretCredential
+
+            self._credential = ClientSecretCredential(
+                config.AZ_TENANT_ID,
+                config.AZ_CLIENT_ID,
+                config.AZ_SECRET_ID,
+            )
+        return self._credential
+
+    @property
+    def async_credential(self) -> "AsyncClientSecretCredential":
+        if self._async_credential is None:
+            from azure.identity.aio import (
+                ClientSecretCredential as AsyncClientSecretCredential,
+            )
+
+            self._async_credential = AsyncClientSecretCredential(
+                config.AZ_TENANT_ID,
+                config.AZ_CLIENT_ID,
+                config.AZ_SECRET_ID,
+            )
+        return self._async_credential
+
+    def _get(self, blob_url: str) -> Optional[dict]:
+        with self._lock:
+            entry = self._entries.get(blob_url)
+            if entry is not None:
+                self._entries.move_to_end(blob_url)
+            return entry
+
+    def _make_entry(self, etag: str, blob_bytes: bytes) -> dict:
+        image_type = detect_image_format(blob_bytes)
+        if image_type is None:
+            raise ValueError("Provided file is not an image")
+        entry = {
+            "etag": etag,
+            "image_type": image_type,
+            "prompt_bytes_before": math.ceil(len(blob_bytes) / 3) * 4,
+            "tokens_before": None,
+            "tokens_after": None,
+        }
+        if self.normalizer is not None:
+            try:
+                image_type, blob_bytes, tokens = self.normalizer.normalize(
+                    blob_bytes, image_type
+                )
+                entry["image_type"] = image_type
+                entry.update(tokens)
+            except Exception as e:
+                logger.error(f"Unable to normalize image, sending it as is: {e}")
+        entry["image_data"] = base64.b64encode(blob_bytes).decode("utf-8")
+        return entry
+
+    def _put(self, blob_url: str, entry: dict) -> dict:
+        with self._lock:
+            self.misses += 1
+            previous = self._entries.pop(blob_url, None)
+            if previous is not None:
+                self._size -= len(previous["image_data"])
+            self._entries[blob_url] = entry
+            self._size += len(entry["image_data"])
+            while self._entries and (
+                len(self._entries) > self.max_entries or self._size > self.max_bytes
+            ):
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted["image_data"])
+        return entry
+
+    def _hit(self, entry: dict) -> dict:
+        with self._lock:
+            self.hits += 1
+        return entry
+
+    @staticmethod
+    def _download_kwargs(entry: Optional[dict]) -> dict:
+        if entry is None:
+            return {}
+        from azure.core import MatchConditions
+
+        return {"etag": entry["etag"], "match_condition": MatchConditions.IfModified}
+
+    def fetch(self, blob_url: str) -> Optional[dict]:
+        """Return the cache entry of an image, or None if unavailable."""
+        from azure.storage.blob import BlobClient
+
+        entry = self._get(blob_url)
+        try:
+            blob_client = BlobClient.from_blob_url(
+                blob_url=blob_url,
+                credential=self.credential,
+            )
+            with blob_client:
+                download_stream = blob_client.download_blob(
+                    **self._download_kwargs(entry)
+                )
+                blob_bytes = download_stream.readall()
+            return self._put(
+                blob_url,
+                self._make_entry(download_stream.properties.etag, blob_bytes),
+            )
+        except ResourceNotModifiedError:
+            return self._hit(entry)
+        except ResourceNotFoundError:
+            logger.error(f"Azure Blob URL does not exist: {blob_url}")
+        except Exception as e:
+            logger.error(f"Unable to get image file extension: {e}")
+        return None
+
+    async def afetch(self, blob_url: str) -> Optional[dict]:
+        """Return the cache entry of an image, or None if unavailable."""
+        from azure.storage.blob.aio import BlobClient as AsyncBlobClient
+
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        entry = self._get(blob_url)
+        try:
+            async with self._semaphore:
+                async with AsyncBlobClient.from_blob_url(
+                    blob_url=blob_url,
+                    credential=self.async_credential,
+                ) as blob_client:
+                    download_stream = await blob_client.download_blob(
+                        **self._download_kwargs(entry)
+                    )
+                    blob_bytes = await download_stream.readall()
+            # Decoding and re-encoding is CPU bound, keep it off the event loop
+            new_entry = await asyncio.to_thread(
+                self._make_entry, download_stream.properties.etag, blob_bytes
+            )
+            return self._put(blob_url, new_entry)
+        except ResourceNotModifiedError:
+            return self._hit(entry)
+        except ResourceNotFoundError:
+            logger.error(f"Azure Blob URL does not exist: {blob_url}")
+        except Exception as e:
+            logger.error(f"Unable to get image file extension: {e}")
+        return None
+
+    def _split(
+        self, blob_urls: Sequence[str], results: dict
+    ) -> Tuple[List[str], List[str]]:
+        image_type, image_data = [], []
+        report = {"images": 0, "bytes_before": 0, "bytes_after": 0}
+        report.update(tokens_before=0, tokens_after=0)
+        for blob_url in blob_urls:
+            entry = results.get(blob_url)
+            if entry is None:
+                continue
+            image_type.append(entry["image_type"])
+            image_data.append(entry["image_data"])
+            report["images"] += 1
+            report["bytes_before"] += entry["prompt_bytes_before"]
+            report["bytes_after"] += len(entry["image_data"])
+            report["tokens_before"] += entry["tokens_before"] or 0
+            report["tokens_after"] += entry["tokens_after"] or 0
+
+        if report["images"]:
+            with self._lock:
+                for key, value in report.items():
+                    self.turn_totals[key] += value
+            logger.info(
+                f"Images in turn: {report['images']}, "
+                f"prompt bytes {report['bytes_before']} -> {report['bytes_after']}, "
+                f"image tokens {report['tokens_before']} -> {report['tokens_after']}"
+            )
+        return image_type, image_data
+
+    def fetch_many(self, blob_urls: Sequence[str]) -> Tuple[List[str], List[str]]:
+        """Fetch images, downloading each distinct URL once."""
+        unique_urls = list(dict.fromkeys(blob_urls or []))
+        results = {blob_url: self.fetch(blob_url) for blob_url in unique_urls}
+        return self._split(blob_urls or [], results)
+
+    async def afetch_many(
+        self, blob_urls: Sequence[str]
+    ) -> Tuple[List[str], List[str]]:
+        """Fetch images concurrently, downloading each distinct URL once."""
+        unique_urls = list(dict.fromkeys(blob_urls or []))
+        fetched = await asyncio.gather(*(self.afetch(url) for url in unique_urls))
+        return self._split(blob_urls or [], dict(zip(unique_urls, fetched)))
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": len(self._entries),
+                "bytes": self._size,
+                "turn_totals": dict(self.turn_totals),
+            }
+
+
+image_cache = BlobImageCache(
+    max_entries=config.image_cache_kwargs["max_entries"],
+    max_bytes=config.image_cache_kwargs["max_bytes"],
+    max_concurrency=config.image_cache_kwargs["max_concurrency"],
+    normalizer=(
+        ImageNormalizer(
+            max_long_side=config.image_normalization_kwargs["max_long_side"],
+            max_short_side=config.image_normalization_kwargs["max_short_side"],
+            output_format=config.image_normalization_kwargs["output_format"],
+            quality=config.image_normalization_kwargs["quality"],
+        )
+        if config.image_normalization_kwargs["enabled"]
+        else None
+    ),
+)
@@ -0,0 +1,94 @@
+import io
+import logging
+import math
+from typing import Tuple
+
+from PIL import Image, ImageOps
+
+logger = logging.getLogger(__name__)
+
+
+def estimate_image_tokens(width: int, height: int) -> int:
+    """Estimate the tokens of a high detail image input to a GPT-4o model.
+
+    The image is fit within 2048x2048, its shortest side scaled down to 768,
+    and billed 170 tokens per 512px tile on top of a base of 85 tokens.
+    """
+    scale = min(1.0, 2048 / max(width, height))
+    width, height = width * scale, height * scale
+    scale = min(1.0, 768 / min(width, height))
+    width, height = width * scale, height * scale
+    tiles = math.ceil(width / 512) * math.ceil(height / 512)
+    return 85 + 170 * tiles
+
+
+class ImageNormalizer:
+    """Shrink uploaded images to what the vision model actually looks at.
+
+    Images are downscaled to the model's effective resolution, rotated per
+    their EXIF orientation and re-encoded without metadata. The original is
+    kept when re-encoding would not make it smaller.
+
+    Args:
+        max_long_side: maximum length of the longest side, in pixels
+        max_short_side: maximum length of the shortest side, in pixels
+        output_format: format the images are re-encoded to, e.g. "jpeg" or "webp"
+        quality: encoder quality of lossy output formats
+    """
+
+    def __init__(
+        self,
+        max_long_side: int = 2048,
+        max_short_side: int = 768,
+        output_format: str = "jpeg",
+        quality: int = 85,
+    ):
+        self.max_long_side = max_long_side
+        self.max_short_side = max_short_side
+        self.output_format = output_format
+        self.quality = quality
+
+    def normalize(self, data: bytes, image_format: str) -> Tuple[str, bytes, dict]:
+        """Normalize an image.
+
+        Args:
+            data: encoded image
+            image_format: lowercase format name of the image
+
+        Returns:
+            The format and bytes of the image to send, and the estimated image
+            tokens before and after normalization.
+        """
+        image = Image.open(io.BytesIO(data))
+        tokens_before = estimate_image_tokens(*image.size)
+
+        image = ImageOps.exif_transpose(image)
+        width, height = image.size
+        scale = min(
+            1.0,
+            self.max_long_side / max(width, height),
+            self.max_short_side / min(width, height),
+        )
+        if scale < 1.0:
+            size = (max(1, round(width * scale)), max(1, round(height * scale)))
+            image = image.resize(size, Image.Resampling.LANCZOS)
+
+        if self.output_format == "jpeg" and image.mode != "RGB":
+            # JPEG has no alpha channel, flatten transparent images on white
+            background = Image.new("RGB", image.size, (255, 255, 255))
+            rgba = image.convert("RGBA")
+            background.paste(rgba, mask=rgba.getchannel("A"))
+            image = background
+
+        buffer = io.BytesIO()
+        image.save(buffer, format=self.output_format.upper(), quality=self.quality)
+        normalized = buffer.getvalue()
+        tokens = {
+            "tokens_before": tokens_before,
+            "tokens_after": estimate_image_tokens(*image.size),
+        }
+
+        if len(normalized) >= len(data):
+            tokens["tokens_after"] = tokens_before
+            return image_format, data, tokens
+        return self.output_format, normalized, tokens
@@ -0,0 +1,269 @@
+import hashlib
+import json
+import logging
+import random
+import threading
+from collections import deque
+from typing import Any, Iterable
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from ..config import config
+from ..memory.snowflake_pool import get_snowflake_pool
+
+logger = logging.getLogger(__name__)
+
+connection_parameters = {
+    "account": config.SF_MAIN_ACCOUNT,
+    "user": config.SF_MAIN_USER,
+    "password": config.SF_MAIN_PASSWORD,
+    "role": config.SF_MAIN_ROLE,
+    "warehouse": config.SF_MAIN_WH,
+    "database": config.SF_MAIN_DB,
+    "schema": config.SF_MAIN_SCHEMA,
+}
+
+
+class RequestLogShipper:
+    """Bounded, batched shipper of API request logs to Snowflake.
+
+    Request logs are queued in memory and written by a background thread every
+    `flush_interval` seconds as one multi-row insert, so that logging never
+    blocks a request. When the queue is full the oldest logs are dropped, and a
+    batch that fails to be written is queued again, up to `max_attempts`
+    times. Large or sensitive fields are hashed, other long strings truncated,
+    and sensitive headers and query parameters masked, before being queued.
+
+    Args:
+        table_name: name of the Snowflake table storing the request logs
+        max_queue_size: number of queued logs after which the oldest are dropped
+        flush_interval: seconds between two background flushes
+        max_batch_size: maximum number of logs written by a single insert
+        sample_rate: fraction of successful requests that are logged
+        max_field_size: length above which strings are truncated
+        hashed_fields: body fields replaced by their size and SHA-256 digest
+        redacted_headers: headers whose value is never logged
+        redacted_query_params: query parameters of the URL whose value is never
+            logged
+        max_attempts: number of failed writes after which logs are dropped
+    """
+
+    def __init__(
+        self,
+        table_name: str = "AI_AGENT_API_REQUESTS",
+        max_queue_size: int = 10000,
+        flush_interval: float = 2.0,
+        max_batch_size: int = 500,
+        sample_rate: float = 1.0,
+        max_field_size: int = 2048,
+        hashed_fields: Iterable[str] = ("file", "oauth_token"),
+        redacted_headers: Iterable[str] = ("authorization", "cookie", "api-key"),
+        redacted_query_params: Iterable[str] = ("api-key", "token", "code"),
+        max_attempts: int = 3,
+    ):
+        self.table_name = table_name
+        self.flush_interval = flush_interval
+        self.max_batch_size = max_batch_size
+        self.sample_rate = sample_rate
+        self.max_field_size = max_field_size
+        self.hashed_fields = set(hashed_fields)
+        self.redacted_headers = {header.lower() for header in redacted_headers}
+        self.redacted_query_params = {param.lower() for param in redacted_query_params}
+        self.max_attempts = max_attempts
+
+        self.pool = get_snowflake_pool(connection_parameters)
+        self.create_table_statement = (
+            "CREATE TABLE IF NOT EXISTS "
+            f"{connection_parameters['database']}."
+            f"{connection_parameters['schema']}."
+            f"{self.table_name} ( "
+            "REQUEST_DETAILS VARIANT, "
+            "MESSAGE_TIMERECEIVED TIMESTAMP, "
+            "LOGGING_TIMERECEIVED TIMESTAMP "
+            ");"
+        )
+        self.pool.register_table(self.table_name, self.create_table_statement)
+
+        self._queue = deque(maxlen=max_queue_size)
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+
+        self.shipped = 0
+        self.dropped = 0
+        self.sampled_out = 0
+        self.failed = 0
+
+    def _start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stopped.clear()
+            self._thread = threading.Thread(
+                target=self._run,
+                name="request-log-shipper",
+                daemon=True,
+            )
+            self._thread.start()
+
+    def _run(self):
+        while not self._stopped.is_set():
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+
+    def redact(self, value: Any, key: str = None) -> Any:
+        """Hash large or sensitive fields and truncate long strings."""
+        if key in self.hashed_fields and value is not None:
+            raw = value if isinstance(value, str) else json.dumps(value)
+            return {
+                "size": len(raw),
+                "sha256": hashlib.sha256(raw.encode("utf-8")).hexdigest(),
+            }
+        if isinstance(value, dict):
+            return {k: self.redact(v, k) for k, v in value.items()}
+        if isinstance(value, list):
+            return [self.redact(item) for item in value]
+        if isinstance(value, str) and len(value) > self.max_field_size:
+            return f"{value[:self.max_field_size]}... [truncated {len(value)} chars]"
+        return value
+
+    def redact_headers(self, headers: dict) -> dict:
+        """Mask the values of sensitive headers."""
+        return {
+            name: "[redacted]" if name.lower() in self.redacted_headers else value
+            for name, value in headers.items()
+        }
+
+    def redact_url(self, url: str) -> str:
+        """Mask the values of sensitive query parameters."""
+        parts = urlsplit(url)
+        if not parts.query:
+            return url
+        query = [
+            (
+                name,
+                "[redacted]" if name.lower() in self.redacted_query_params else value,
+            )
+            for name, value in parse_qsl(parts.query, keep_blank_values=True)
+        ]
+        return urlunsplit(parts._replace(query=urlencode(query, safe="[]")))
+
+    def submit(self, request_data: dict, message_timereceived: str, force=False):
+        """Queue a request log without blocking.
+
+        Args:
+            request_data: details of the request, with its parsed body
+            message_timereceived: timestamp when the request was received
+            force: log the request regardless of the sample rate, e.g. on errors
+        """
+        if not force and random.random() >= self.sample_rate:
+            self.sampled_out += 1
+            return
+
+        if "url" in request_data:
+            # Before long strings are truncated, which could keep a secret
+            request_data = {**request_data, "url": self.redact_url(request_data["url"])}
+        request_data = self.redact(request_data)
+        if "headers" in request_data:
+            request_data["headers"] = self.redact_headers(request_data["headers"])
+        row = (json.dumps(request_data), message_timereceived, 0)
+
+        with self._lock:
+            if len(self._queue) == self._queue.maxlen:
+                self.dropped += 1
+            self._queue.append(row)
+            queued = len(self._queue)
+            self._start()
+        if queued >= self.max_batch_size:
+            self._wakeup.set()
+
+    def insert_rows(self, rows: list):
+        """Insert request logs in a single statement."""
+        values = " UNION ALL ".join(
+            "SELECT "
+            f"PARSE_JSON( $${request_json}$$ ), "
+            f"'{message_timereceived}', "
+            "CURRENT_TIMESTAMP"
+            for request_json, message_timereceived, _ in rows
+        )
+        self.pool.ensure_table(self.table_name, self.create_table_statement)
+        with self.pool.connection() as connection:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "INSERT INTO "
+                    f"{connection_parameters['database']}."
+                    f"{connection_parameters['schema']}."
+                    f"{self.table_name} ( "
+                    "REQUEST_DETAILS, "
+                    "MESSAGE_TIMERECEIVED, "
+                    "LOGGING_TIMERECEIVED "
+                    f") {values};"
+                )
+
+    def flush(self):
+        """Write all queued request logs, in batches of `max_batch_size`."""
+        with self._flush_lock:
+            while True:
+                with self._lock:
+                    rows = [
+                        self._queue.popleft()
+                        for _ in range(min(self.max_batch_size, len(self._queue)))
+                    ]
+                if not rows:
+                    return
+                try:
+                    self.insert_rows(rows)
+                    self.shipped += len(rows)
+                except Exception as error:
+                    logger.error(f"Could not ship {len(rows)} request logs: {error}")
+                    self.requeue(rows)
+                    return
+
+    def requeue(self, rows: list):
+        """Queue a failed batch again ahead of newer logs, while there is room
+        and attempts left; the other logs are dropped."""
+        retried = [
+            (request_json, message_timereceived, attempts + 1)
+            for request_json, message_timereceived, attempts in rows
+            if attempts + 1 < self.max_attempts
+        ]
+        with self._lock:
+            # Like a full queue, drop the oldest logs if newer ones took the room
+            room = self._queue.maxlen - len(self._queue)
+            if len(retried) > room:
+                retried = retried[len(retried) - room :]
+            self._queue.extendleft(reversed(retried))
+        self.failed += len(rows) - len(retried)
+
+    def close(self):
+        """Stop the background thread and write all queued request logs."""
+        self._stopped.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.flush_interval + 30)
+        self.flush()
+
+    def stats(self) -> dict:
+        with self._lock:
+            queued = len(self._queue)
+        return {
+            "queued": queued,
+            "shipped": self.shipped,
+            "dropped": self.dropped,
+            "sampled_out": self.sampled_out,
+            "failed": self.failed,
+        }
+
+
+request_log_shipper = RequestLogShipper(
+    table_name=config.request_log_kwargs["table_name"],
+    max_queue_size=config.request_log_kwargs["max_queue_size"],
+    flush_interval=config.request_log_kwargs["flush_interval"],
+    max_batch_size=config.request_log_kwargs["max_batch_size"],
+    sample_rate=config.request_log_kwargs["sample_rate"],
+    max_field_size=config.request_log_kwargs["max_field_size"],
+    hashed_fields=config.request_log_kwargs["hashed_fields"],
+    redacted_headers=config.request_log_kwargs["redacted_headers"],
+    redacted_query_params=config.request_log_kwargs["redacted_query_params"],
+    max_attempts=config.request_log_kwargs["max_attempts"],
+)
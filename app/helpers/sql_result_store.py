@@ -0,0 +1,109 @@
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Optional
+
+from ..config import config
+
+# pyarrow takes a while to import, so it is only imported with a SQL result
+if TYPE_CHECKING:
+    import pyarrow as pa
+
+
+class SQLResult:
+    """Result of a SQL query, kept as an Arrow table.
+
+    Args:
+        table: the rows of the result, at most the fetch caps of the query
+        truncated: whether rows were dropped because of the fetch caps
+    """
+
+    def __init__(self, table: "pa.Table", truncated: bool = False):
+        self.table = table
+        self.truncated = truncated
+        self.artifact_id = uuid.uuid4().hex
+
+    @property
+    def num_rows(self) -> int:
+        return self.table.num_rows
+
+    @property
+    def nbytes(self) -> int:
+        return self.table.nbytes
+
+
+class SQLResultStore:
+    """In-memory LRU store of the SQL results of recent turns.
+
+    The full result of a query stays here, by artifact ID, for the nodes of
+    the graph that need more than the summary given to the LLM, e.g. charts.
+
+    Args:
+        ttl: seconds a result is kept
+        max_entries: maximum number of stored results
+        max_bytes: maximum total size of the stored Arrow tables
+    """
+
+    def __init__(
+        self,
+        ttl: int = 3600,
+        max_entries: int = 256,
+        max_bytes: int = 512 * 1024 * 1024,
+    ):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _pop(self, artifact_id: str):
+        entry = self._entries.pop(artifact_id, None)
+        if entry is not None:
+            self._size -= entry["result"].nbytes
+
+    def put(self, result: SQLResult) -> str:
+        """Store a result, or refresh it, and return its artifact ID."""
+        with self._lock:
+            self._pop(result.artifact_id)
+            self._entries[result.artifact_id] = {
+                "result": result,
+                "expires_at": time.monotonic() + self.ttl,
+            }
+            self._size += result.nbytes
+            while len(self._entries) > 1 and (
+                len(self._entries) > self.max_entries or self._size > self.max_bytes
+            ):
+                self._pop(next(iter(self._entries)))
+        return result.artifact_id
+
+    def get(self, artifact_id: str) -> Optional[SQLResult]:
+        """Return a stored result, or None if it expired or was evicted."""
+        with self._lock:
+            entry = self._entries.get(artifact_id)
+            if entry is None or entry["expires_at"] <= time.monotonic():
+                self._pop(artifact_id)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(artifact_id)
+            self.hits += 1
+            return entry["result"]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": len(self._entries),
+                "bytes": self._size,
+            }
+
+
+sql_result_store = SQLResultStore(
+    ttl=config.sql_result_kwargs["artifact_ttl"],
+    max_entries=config.sql_result_kwargs["max_artifacts"],
+    max_bytes=config.sql_result_kwargs["max_artifact_bytes"],
+)
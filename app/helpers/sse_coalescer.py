@@ -0,0 +1,133 @@
+import asyncio
+import logging
+from typing import AsyncIterator, List
+
+from ..config import config
+
+logger = logging.getLogger(__name__)
+
+_END = object()
+_TICK = object()
+
+
+def _is_answer_text(data: dict) -> bool:
+    return len(data) == 1 and isinstance(data.get("answer"), str)
+
+
+async def coalesce_answer_events(
+    events: AsyncIterator[dict],
+    window: float = 0.03,
+    max_chars: int = 256,
+) -> AsyncIterator[dict]:
+    """Merge consecutive answer text events into fewer SSE frames.
+
+    Answer text is buffered until `max_chars` characters are buffered or
+    `window` seconds have passed since the first buffered chunk, whichever
+    comes first, also when the producer is idle. Any other event flushes the
+    buffered text and is passed through unchanged, so the order of the events
+    is preserved.
+
+    Args:
+        events: data of the custom events, e.g. {"answer": "token"}
+        window: maximum time answer text is held back, in seconds
+        max_chars: number of buffered characters that triggers a flush
+
+    Yields:
+        The data of the events, with consecutive answer text merged.
+    """
+    loop = asyncio.get_running_loop()
+    # A single task pulls the events into the queue, where a timer also wakes
+    # the consumer up when the window expires while the producer is idle
+    queue: asyncio.Queue = asyncio.Queue(maxsize=64)
+    failure: List[BaseException] = []
+
+    async def pump():
+        try:
+            async for data in events:
+                await queue.put(data)
+        except Exception as e:
+            failure.append(e)
+        await queue.put(_END)
+
+    def wake_up():
+        try:
+            queue.put_nowait(_TICK)
+        except asyncio.QueueFull:
+            # Events are pending, the window is checked when they are read
+            pass
+
+    pump_task = asyncio.create_task(pump())
+    buffer: List[str] = []
+    size = 0
+    timer = None
+    try:
+        while True:
+            data = await queue.get()
+            if timer is not None and loop.time() >= timer.when():
+                timer = None
+                yield {"answer": "".join(buffer)}
+                buffer, size = [], 0
+
+            if data is _TICK:
+                continue
+            if data is _END:
+                break
+            if _is_answer_text(data):
+                buffer.append(data["answer"])
+                size += len(data["answer"])
+                if timer is None:
+                    timer = loop.call_later(window, wake_up)
+                if size >= max_chars:
+                    timer.cancel()
+                    timer = None
+                    yield {"answer": "".join(buffer)}
+                    buffer, size = [], 0
+                continue
+
+            if buffer:
+                timer.cancel()
+                timer = None
+                yield {"answer": "".join(buffer)}
+                buffer, size = [], 0
+            yield data
+
+        if buffer:
+            yield {"answer": "".join(buffer)}
+        if failure:
+            raise failure[0]
+    finally:
+        if timer is not None:
+            timer.cancel()
+        pump_task.cancel()
+
+
+async def stream_custom_events(events: AsyncIterator[dict]) -> AsyncIterator[dict]:
+    """Yield the data of the custom events of an `astream_events` stream.
+
+    Answer text events are coalesced as configured in `sse_coalescing_kwargs`.
+
+    Args:
+        events: the events of `astream_events(..., version="v2")`
+
+    Yields:
+        The non-empty data of the custom events.
+    """
+
+    async def custom_events():
+        async for event in events:
+            if event["event"] == "on_custom_event":
+                data = event["data"]
+                if data:
+                    yield data
+
+    if not config.sse_coalescing_kwargs["enabled"]:
+        async for data in custom_events():
+            yield data
+        return
+
+    async for data in coalesce_answer_events(
+        custom_events(),
+        window=config.sse_coalescing_kwargs["window"],
+        max_chars=config.sse_coalescing_kwargs["max_chars"],
+    ):
+        yield data
@@ -1,33 +1,20 @@
 import json
 import logging
-import sys
-import time
 from datetime import datetime
 from typing import Any, Dict
 from zoneinfo import ZoneInfo
 
 from fastapi import HTTPException, Request
-from snowflake.connector import connect
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.responses import JSONResponse
+from starlette.responses import JSONResponse, PlainTextResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
-from ..config import config
+from .request_log_shipper import RequestLogShipper, request_log_shipper
 
 logger = logging.getLogger(__name__)
 
 # get timezone for standard timestamps
 tzinfo = ZoneInfo("Asia/Dubai")
 
-connection_parameters = {
-    "account": config.SF_MAIN_ACCOUNT,
-    "user": config.SF_MAIN_USER,
-    "password": config.SF_MAIN_PASSWORD,
-    "role": config.SF_MAIN_ROLE,
-    "warehouse": config.SF_MAIN_WH,
-    "database": config.SF_MAIN_DB,
-    "schema": config.SF_MAIN_SCHEMA,
-}
-
 
 async def _per_request_config_modifier(
     config: Dict[str, Any], request: Request
@@ -91,111 +78,112 @@ def _per_avatar_request_config_modifier(
         )
 
 
-class RequestLoggingMiddleware(BaseHTTPMiddleware):
+class RequestLoggingMiddleware:
+    """Pure ASGI middleware logging API requests and their response status.
+
+    The request body is copied while the endpoint reads it, instead of being
+    read ahead by the middleware, and response messages are passed through
+    untouched so that streamed (SSE) responses are never buffered. Requests are
+    logged once handled, including streams aborted by a client disconnect.
+
+    Args:
+        app: the ASGI application to wrap
+        shipper: queue shipping the POST request logs to Snowflake
+        max_body_size: bytes of request body kept for logging
+    """
+
     def __init__(
         self,
-        app,
-        snowflake_logging_table_name: str = "AI_AGENT_API_REQUESTS",
-        snowflake_connect_timeout: int = 30,
-        snowflake_connect_retries: int = 2,
+        app: ASGIApp,
+        shipper: RequestLogShipper = request_log_shipper,
+        max_body_size: int = 16 * 1024 * 1024,  # 16MB
     ):
-        super().__init__(app)
-        self.snowflake_logging_table_name = snowflake_logging_table_name
-        self.connection_parameters = connection_parameters
-        self.snowflake_connect_timeout = snowflake_connect_timeout
-        self.snowflake_connect_retries = snowflake_connect_retries
-
-    async def log(self, request_json: str, message_timereceived: str):
-        attempt = 0
-        while attempt < self.snowflake_connect_retries:
-            try:
-                with connect(
-                    **self.connection_parameters,
-                    timeout=self.snowflake_connect_timeout,
-                ) as connection:
-                    with connection.cursor() as cursor:
-                        cursor.execute(
-                            "CREATE TABLE IF NOT EXISTS "
-                            f"{self.connection_parameters['database']}."
-                            f"{self.connection_parameters['schema']}."
-                            f"{self.snowflake_logging_table_name} ( "
-                            "REQUEST_DETAILS VARIANT, "
-                            "MESSAGE_TIMERECEIVED TIMESTAMP, "
-                            "LOGGING_TIMERECEIVED TIMESTAMP "
-                            ");"
-                        )
-                        cursor.execute(
-                            "INSERT INTO "
-                            f"{self.connection_parameters['database']}."
-                            f"{self.connection_parameters['schema']}."
-                            f"{self.snowflake_logging_table_name} ( "
-                            "REQUEST_DETAILS, "
-                            "MESSAGE_TIMERECEIVED, "
-                            "LOGGING_TIMERECEIVED "
-                            ") SELECT "
-                            f"PARSE_JSON( $${request_json}$$ ), "
-                            f"'{message_timereceived}', "
-                            "CURRENT_TIMESTAMP"
-                            ";"
-                        )
-                break
-
-            except Exception as error:
-                logger.error(error)
-                attempt += 1
-                time.sleep(2)
-
-    async def dispatch(self, request: Request, call_next):
-        message_timereceived = datetime.now(tzinfo).strftime("%Y-%m-%d %H:%M:%S.%f %Z")
-
-        # Log the POST request details
-        if request.method == "POST":
-            request_data = {
-                "method": request.method,
-                "url": str(request.url),
-                "headers": dict(request.headers),
-                "client": request.client.host,
+        self.app = app
+        self.shipper = shipper
+        self.max_body_size = max_body_size
+
+    def log(self, request_data: dict, message_timereceived: str, force=False):
+        # Queued and shipped in batches by a background thread
+        self.shipper.submit(request_data, message_timereceived, force=force)
+
+    def _parse_body(self, chunks: list, body_size: int, complete: bool) -> Any:
+        if body_size > self.max_body_size:
+            return {
+                "Message Processing Exception": (
+                    f"Body too large to log ({body_size} bytes)"
+                )
             }
+        if not complete:
+            return {"Message Processing Exception": "Body was not read"}
+        try:
+            return json.loads(b"".join(chunks))
+        except Exception as e:
+            return {"Message Processing Exception": str(e)}
 
-            try:
-                body = await request.json()
-                request_data["body"] = body
-                body_size = sys.getsizeof(body)
-                if body_size > 16 * 1024 * 1024:  # 16MB
-                    error_message = {
-                        "Message Processing Exception": (
-                            f"Body too large to log ({body_size} bytes)"
-                        )
-                    }
-                    request_data["body"] = error_message
-                else:
-                    request_data["body"] = body
-            except Exception as e:
-                error_message = {"Message Processing Exception": str(e)}
-                request_data["body"] = error_message
-                logger.error(json.dumps(request_data, indent=2))
-
-            logger.info(json.dumps(request_data, indent=2))
-            await self.log(
-                json.dumps(request_data),
-                message_timereceived,
-            )
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
 
+        message_timereceived = datetime.now(tzinfo).strftime("%Y-%m-%d %H:%M:%S.%f %Z")
+        request = Request(scope)
+        url = self.shipper.redact_url(str(request.url))
+        logger.info(f"Received request: {request.method} {url}")
+
+        log_body = request.method == "POST"
+        chunks = []
+        body = {"size": 0, "complete": False}
+        status = {"code": None, "complete": False}
+
+        async def receive_and_copy() -> Message:
+            message = await receive()
+            if log_body and message["type"] == "http.request":
+                chunk = message.get("body", b"")
+                body["size"] += len(chunk)
+                if body["size"] <= self.max_body_size:
+                    chunks.append(chunk)
+                body["complete"] = not message.get("more_body", False)
+            return message
+
+        async def send_and_record(message: Message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            elif message["type"] == "http.response.body":
+                status["complete"] = not message.get("more_body", False)
+            await send(message)
+
+        request_data = {
+            "method": request.method,
+            "url": url,
+            "headers": dict(request.headers),
+            "client": request.client.host if request.client else None,
+        }
+
+        error = None
         try:
             # Process the request
-            response = await call_next(request)
-            return response
+            await self.app(scope, receive_and_copy, send_and_record)
         except Exception as e:
-            error_message = {"API Endpoint Exception": str(e)}
-            request_data["error"] = error_message
-            logger.error(json.dumps(request_data, indent=2))
-            await self.log(
-                json.dumps(request_data),
-                message_timereceived,
-            )
-            raise HTTPException(
+            logger.error(f"Request to {url} failed: {e}")
+            error = {"API Endpoint Exception": str(e)}
+            if status["code"] is not None:
+                raise
+            response = PlainTextResponse(
+                "An internal server error occurred. Please try again later.",
                 status_code=500,
-                detail=(
-                    "An internal server error occurred. " "Please try again later."
-                ),
             )
+            await response(scope, receive, send)
+        finally:
+            # Also reached when the client disconnects or the request task is
+            # cancelled mid-stream, so that aborted requests are still logged
+            if error is None and not status["complete"]:
+                logger.warning(f"Request to {url} was aborted")
+                error = {"API Endpoint Exception": "Response was not completed"}
+            logger.info(f"Response status: {status['code']}")
+            if log_body or error is not None:
+                request_data["body"] = self._parse_body(
+                    chunks, body["size"], body["complete"]
+                )
+                if error is not None:
+                    request_data["error"] = error
+                self.log(request_data, message_timereceived, force=error is not None)
@@ -0,0 +1,284 @@
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Optional
+
+from langchain_core.caches import RETURN_VAL_TYPE, BaseCache
+from langchain_core.language_models import BaseChatModel
+from langchain_core.load import dumps, loads
+from langchain_core.runnables.config import run_in_executor
+
+from ..config import config
+
+logger = logging.getLogger(__name__)
+
+# Hits and misses of every cached chain, keyed by chain name
+_chain_stats: Dict[str, Dict[str, int]] = {}
+# One response store per model role, shared by all the chains using it
+_stores: Dict[str, "LLMResponseStore"] = {}
+_stores_lock = threading.Lock()
+# Single thread writing the generations of every store to SQLite, in order
+_writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="llm-cache-writer")
+
+
+class LLMResponseStore:
+    """
+    Exact-match store of LLM generations for one model role.
+
+    Generations are kept in an in-memory LRU. If a database path is given,
+    they are also written to a local SQLite table, so that they survive
+    restarts of the server. Writes run on a background thread and expired or
+    extra generations are trimmed every `trim_every` writes, so that callers
+    never wait on SQLite.
+
+    Args:
+        role: name of the model role, e.g. "grader_model"
+        database_path: path of the SQLite database file, or None to keep
+            generations in memory only
+        ttl: time to live of a cached generation, in seconds
+        max_entries: maximum number of cached generations, in memory and on disk
+        trim_every: number of writes between two trims of the SQLite table
+    """
+
+    def __init__(
+        self,
+        role: str,
+        database_path: Optional[str],
+        ttl: int,
+        max_entries: int,
+        trim_every: int = 100,
+    ):
+        self.role = role
+        self.database_path = database_path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.trim_every = trim_every
+        self._memory: OrderedDict[str, tuple] = OrderedDict()
+        self._lock = threading.Lock()
+        # SQLite connections are not safe to share between threads on their own
+        self._db_lock = threading.Lock()
+        self._connection: Optional[sqlite3.Connection] = None
+        self._writes = 0
+
+    def _connect(self) -> Optional[sqlite3.Connection]:
+        """Open the SQLite database once; the store stays memory-only on failure."""
+        if self._connection is None:
+            try:
+                connection = sqlite3.connect(
+                    self.database_path,
+                    check_same_thread=False,
+                )
+                connection.execute("PRAGMA journal_mode=WAL;")
+                connection.execute(
+                    "CREATE TABLE IF NOT EXISTS LLM_CACHE ( "
+                    "ROLE TEXT, "
+                    "KEY TEXT, "
+                    "VALUE TEXT, "
+                    "EXPIRES_AT REAL, "
+                    "PRIMARY KEY (ROLE, KEY) "
+                    ");"
+                )
+                connection.commit()
+                self._connection = connection
+            except sqlite3.Error as error:
+                logger.error(f"LLM cache database unavailable: {error}")
+                self.database_path = None
+        return self._connection
+
+    def get_from_memory(self, key: str) -> Optional[RETURN_VAL_TYPE]:
+        with self._lock:
+            item = self._memory.get(key)
+            if item is None:
+                return None
+            expires_at, value = item
+            if expires_at <= time.time():
+                del self._memory[key]
+                return None
+            self._memory.move_to_end(key)
+            return value
+
+    def _set_in_memory(self, key: str, expires_at: float, value: RETURN_VAL_TYPE):
+        with self._lock:
+            self._memory[key] = (expires_at, value)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+    def get(self, key: str) -> Optional[RETURN_VAL_TYPE]:
+        value = self.get_from_memory(key)
+        if value is not None or self.database_path is None:
+            return value
+
+        with self._db_lock:
+            connection = self._connect()
+            if connection is None:
+                return None
+            row = connection.execute(
+                "SELECT VALUE, EXPIRES_AT FROM LLM_CACHE "
+                "WHERE ROLE = ? AND KEY = ? AND EXPIRES_AT > ?;",
+                (self.role, key, time.time()),
+            ).fetchone()
+        if row is None:
+            return None
+
+        try:
+            value = [loads(generation) for generation in json.loads(row[0])]
+        except Exception as error:
+            logger.error(f"Could not load cached generation: {error}")
+            return None
+        self._set_in_memory(key, row[1], value)
+        return value
+
+    def set(self, key: str, value: RETURN_VAL_TYPE):
+        expires_at = time.time() + self.ttl
+        self._set_in_memory(key, expires_at, value)
+        if self.database_path is not None:
+            _writer.submit(self._persist, key, expires_at, value)
+
+    def _persist(self, key: str, expires_at: float, value: RETURN_VAL_TYPE):
+        """Write a generation to SQLite, on the writer thread."""
+        try:
+            serialized = json.dumps([dumps(generation) for generation in value])
+            with self._db_lock:
+                connection = self._connect()
+                if connection is None:
+                    return
+                connection.execute(
+                    "INSERT OR REPLACE INTO LLM_CACHE "
+                    "(ROLE, KEY, VALUE, EXPIRES_AT) VALUES (?, ?, ?, ?);",
+                    (self.role, key, serialized, expires_at),
+                )
+                self._writes += 1
+                if self._writes % self.trim_every == 0:
+                    # Drop expired generations and keep the newest max_entries
+                    connection.execute(
+                        "DELETE FROM LLM_CACHE WHERE ROLE = ? AND ( EXPIRES_AT <= ? "
+                        "OR KEY NOT IN ( SELECT KEY FROM LLM_CACHE WHERE ROLE = ? "
+                        "ORDER BY EXPIRES_AT DESC LIMIT ? ) );",
+                        (self.role, time.time(), self.role, self.max_entries),
+                    )
+                connection.commit()
+        except Exception as error:
+            logger.error(f"Could not persist cached generation: {error}")
+
+    def flush(self):
+        """Wait for the queued writes to SQLite."""
+        _writer.submit(lambda: None).result()
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+        if self.database_path is None:
+            return
+        self.flush()
+        with self._db_lock:
+            connection = self._connect()
+            if connection is not None:
+                connection.execute(
+                    "DELETE FROM LLM_CACHE WHERE ROLE = ?;",
+                    (self.role,),
+                )
+                connection.commit()
+
+
+class LLMResponseCache(BaseCache):
+    """
+    LangChain cache of a chain, backed by the response store of its model role.
+
+    Args:
+        store: response store of the model role
+        chain_name: name of the chain, used to report hit rates
+    """
+
+    def __init__(self, store: LLMResponseStore, chain_name: str):
+        self.store = store
+        self.chain_name = chain_name
+        _chain_stats.setdefault(chain_name, {"hits": 0, "misses": 0})
+
+    @staticmethod
+    def _key(prompt: str, llm_string: str) -> str:
+        return hashlib.sha256(f"{llm_string}\n{prompt}".encode()).hexdigest()
+
+    def _record(self, value: Optional[RETURN_VAL_TYPE]) -> Optional[RETURN_VAL_TYPE]:
+        _chain_stats[self.chain_name]["hits" if value else "misses"] += 1
+        return value
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[RETURN_VAL_TYPE]:
+        return self._record(self.store.get(self._key(prompt, llm_string)))
+
+    async def alookup(self, prompt: str, llm_string: str) -> Optional[RETURN_VAL_TYPE]:
+        key = self._key(prompt, llm_string)
+        # Memory hits are cheap, only go through the executor for SQLite
+        value = self.store.get_from_memory(key)
+        if value is None:
+            value = await run_in_executor(None, self.store.get, key)
+        return self._record(value)
+
+    def update(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE):
+        self.store.set(self._key(prompt, llm_string), return_val)
+
+    async def aupdate(
+        self,
+        prompt: str,
+        llm_string: str,
+        return_val: RETURN_VAL_TYPE,
+    ):
+        # Only updates memory, SQLite is written on the writer thread
+        self.store.set(self._key(prompt, llm_string), return_val)
+
+    def clear(self, **kwargs: Any):
+        self.store.clear()
+
+
+def _get_store(role: str) -> LLMResponseStore:
+    with _stores_lock:
+        if role not in _stores:
+            _stores[role] = LLMResponseStore(
+                role=role,
+                database_path=config.llm_cache_kwargs["database_path"],
+                trim_every=config.llm_cache_kwargs["trim_every"],
+                **config.llm_cache_kwargs["roles"][role],
+            )
+        return _stores[role]
+
+
+def cached_model(model: BaseChatModel, role: str, chain_name: str) -> BaseChatModel:
+    """
+    Return a copy of the model whose responses are cached, if its role allows it.
+
+    Args:
+        model: chat model of the given role
+        role: name of the model role in app/llm_model/azure_llm.py
+        chain_name: name of the chain using the model, used to report hit rates
+
+    Returns:
+        The cached copy of the model, or the model itself if caching is disabled
+        or excluded for the role.
+    """
+    llm_cache_kwargs = config.llm_cache_kwargs
+    if (
+        not llm_cache_kwargs["enabled"]
+        or role in llm_cache_kwargs["excluded_roles"]
+        or role not in llm_cache_kwargs["roles"]
+    ):
+        return model
+    return model.model_copy(
+        update={"cache": LLMResponseCache(_get_store(role), chain_name)}
+    )
+
+
+def get_llm_cache_stats() -> Dict[str, Dict[str, float]]:
+    """Return the hits, misses and hit rate of every cached chain."""
+    stats = {}
+    for chain_name, counts in _chain_stats.items():
+        total = counts["hits"] + counts["misses"]
+        stats[chain_name] = {
+            **counts,
+            "hit_rate": round(counts["hits"] / total, 3) if total else 0.0,
+        }
+    return stats
@@ -0,0 +1,90 @@
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional
+
+# Key marking a checkpoint row as a delta; any other row is a full snapshot
+DELTA_KEY = "__delta__"
+
+
+class BaseCheckpointer(ABC):
+    """Interface of the stores of graph checkpoint objects.
+
+    A checkpoint is a JSON-serializable dict keyed by user ID and session ID.
+    It is stored as a full snapshot followed by append-only deltas, each
+    setting some keys and appending to some lists. Once `compact_every` deltas
+    follow the latest snapshot, they are folded into a new snapshot and the
+    older rows are deleted, which keeps both the table and every write small.
+
+    Args:
+        compact_every: number of deltas after which the checkpoint is compacted
+    """
+
+    compact_every: int = 20
+
+    @abstractmethod
+    def _load_rows(self) -> List[Dict[str, Any]]:
+        """Retrieve the latest snapshot of the session and the deltas following
+        it, oldest first."""
+
+    @abstractmethod
+    def _insert_row(self, row: Dict[str, Any]) -> None:
+        """Append a snapshot or delta row to the session."""
+
+    @abstractmethod
+    def _count_deltas(self) -> int:
+        """Count the deltas following the latest snapshot of the session."""
+
+    @abstractmethod
+    def _delete_before_latest_snapshot(self) -> None:
+        """Delete the rows of the session older than its latest snapshot."""
+
+    @abstractmethod
+    def clear(self) -> None:
+        """Clear all checkpoints of the session."""
+
+    @staticmethod
+    def apply_delta(checkpoint: Dict[str, Any], delta: Dict[str, Any]) -> None:
+        """Apply a delta row to a checkpoint in place."""
+        checkpoint.update(delta.get("set", {}))
+        for key, values in delta.get("append", {}).items():
+            checkpoint.setdefault(key, []).extend(values)
+
+    @property
+    def _load_checkpoint(self) -> Dict[str, Any]:
+        """Retrieve the latest checkpoint of the session, or an empty dict."""
+        checkpoint = {}
+        for row in self._load_rows() or []:
+            if DELTA_KEY in row:
+                self.apply_delta(checkpoint, row[DELTA_KEY])
+            else:
+                checkpoint = row
+        return checkpoint
+
+    def add_checkpoint(self, checkpoint: Dict[str, Any]) -> None:
+        """Append a full checkpoint to the session, as a new snapshot."""
+        self._insert_row(checkpoint)
+
+    def update_checkpoint(
+        self,
+        latest: Optional[Dict[str, Any]] = None,
+        appended: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        """Append a delta to the session, compacting the checkpoint when due.
+
+        Args:
+            latest: keys to set to a new value
+            appended: keys of lists to append a value to
+        """
+        delta = {
+            "set": latest or {},
+            "append": {key: [value] for key, value in (appended or {}).items()},
+        }
+        self._insert_row({DELTA_KEY: delta})
+        if self._count_deltas() >= self.compact_every:
+            self.compact()
+
+    def compact(self) -> None:
+        """Fold the deltas of the session into a new snapshot and delete the
+        older rows."""
+        # Sessions write one file at a time, so no delta lands in between
+        self._insert_row(self._load_checkpoint)
+        self._delete_before_latest_snapshot()
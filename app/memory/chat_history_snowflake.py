@@ -1,12 +1,17 @@
+import asyncio
 import json
 import logging
 import os
 import time
-from typing import List
+from typing import Callable, List, Optional, Sequence, Tuple
 
 from langchain_core.chat_history import BaseChatMessageHistory
-from langchain_core.messages import BaseMessage, message_to_dict, messages_from_dict
-from snowflake.connector import connect
+from langchain_core.messages import BaseMessage, messages_from_dict
+
+from ..config import config
+from .history_cache import history_cache
+from .history_write_buffer import HistoryWriteBuffer, history_write_buffer
+from .snowflake_pool import get_snowflake_pool, run_in_snowflake_executor
 
 logger = logging.getLogger(__name__)
 
@@ -29,6 +34,22 @@ class SnowflakeChatMessageHistory(BaseChatMessageHistory):
         schema_name: name of the schema to use
     """
 
+    @staticmethod
+    def create_table_statement(connection_parameters: dict, table_name: str) -> str:
+        return (
+            "CREATE TABLE IF NOT EXISTS "
+            f"{connection_parameters['database']}."
+            f"{connection_parameters['schema']}."
+            f"{table_name} ( "
+            "HISTORY_ID INT IDENTITY, "
+            "USER_ID STRING, "
+            "SESSION_ID STRING, "
+            "HISTORY VARIANT, "
+            "MESSAGE_TIMERECEIVED TIMESTAMP, "
+            "LOGGING_TIMERECEIVED TIMESTAMP "
+            ");"
+        )
+
     def __init__(
         self,
         connection_parameters: dict,
@@ -48,144 +69,201 @@ class SnowflakeChatMessageHistory(BaseChatMessageHistory):
         self.max_len_history = max_len_history
         self.snowflake_connect_timeout = snowflake_connect_timeout
         self.snowflake_connect_retries = snowflake_connect_retries
+        self.pool = get_snowflake_pool(connection_parameters)
+        self.write_behind = config.history_write_behind_kwargs["enabled"]
+        self.use_cache = config.history_cache_kwargs["enabled"]
+        self.cache_key = (table_name, user_id, session_id)
 
-    @property
-    def messages(self) -> List[BaseMessage]:  # type: ignore
-        """Retrieve the messages from Snowflake"""
+    def _ensure_table(self):
+        """Create the table once per table name, through the shared pool"""
+        self.pool.ensure_table(
+            self.table_name,
+            self.create_table_statement(self.connection_parameters, self.table_name),
+        )
+
+    def _select_messages(self) -> Tuple[List[BaseMessage], int]:
+        """Return the last messages and the number of messages of the session"""
+        # Read your own writes still queued in the write-behind buffer
+        history_write_buffer.flush_if_pending(
+            self.table_name, self.user_id, self.session_id
+        )
+        self._ensure_table()
+        with self.pool.connection() as connection:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT HISTORY, NUM_MESSAGES "
+                    "FROM ( SELECT *, COUNT(*) OVER () AS NUM_MESSAGES FROM "
+                    f"{self.connection_parameters['database']}."
+                    f"{self.connection_parameters['schema']}."
+                    f"{self.table_name} "
+                    f"WHERE SESSION_ID = '{self.session_id}' "
+                    f"AND USER_ID = '{self.user_id}'"
+                    "ORDER BY MESSAGE_TIMERECEIVED DESC, "
+                    "LOGGING_TIMERECEIVED DESC "
+                    f"LIMIT {int(self.max_len_history * 2)} "
+                    ") AS subquery "
+                    "ORDER BY MESSAGE_TIMERECEIVED ASC, "
+                    "LOGGING_TIMERECEIVED ASC"
+                    ";"
+                )
+                # Commit the transaction
+                response = cursor.fetchall()
+
+        if response:
+            items = [json.loads(document[0]) for document in response]
+            num_messages = response[0][1]
+        else:
+            items = []
+            num_messages = 0
+
+        return messages_from_dict(items), num_messages
+
+    def _count_messages(self) -> int:
+        """Count the messages of the session, written or still queued"""
+        # Counted first, so that a write completing meanwhile is a cache miss
+        pending = history_write_buffer.count_pending(
+            self.table_name, self.user_id, self.session_id
+        )
+        self._ensure_table()
+        with self.pool.connection() as connection:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT COUNT(*) FROM "
+                    f"{self.connection_parameters['database']}."
+                    f"{self.connection_parameters['schema']}."
+                    f"{self.table_name} "
+                    f"WHERE SESSION_ID = '{self.session_id}' "
+                    f"AND USER_ID = '{self.user_id}'"
+                    ";"
+                )
+                response = cursor.fetchone()
+        return response[0] + pending
+
+    def _get_cached_messages(self) -> Optional[List[BaseMessage]]:
+        """Return the cached messages, checked at most every check_interval"""
+        if not self.use_cache:
+            return None
+        return history_cache.get(
+            self.cache_key, int(self.max_len_history * 2), self._count_messages
+        )
+
+    def _read_messages(self) -> List[BaseMessage]:
+        """Read the messages from the cache, or Snowflake on a miss"""
+        cached = self._get_cached_messages()
+        if cached is not None:
+            return cached
+        if not self.use_cache:
+            return self._select_messages()[0]
+        generation = history_cache.generation(self.cache_key)
+        start = time.monotonic()
+        messages, num_messages = self._select_messages()
+        history_cache.put(
+            self.cache_key,
+            int(self.max_len_history * 2),
+            messages,
+            generation,
+            time.monotonic() - start,
+            num_messages,
+        )
+        return messages
+
+    def _make_rows(self, messages: Sequence[BaseMessage]) -> List[dict]:
+        return HistoryWriteBuffer.make_rows(
+            pool=self.pool,
+            table_name=self.table_name,
+            create_table_statement=self.create_table_statement(
+                self.connection_parameters, self.table_name
+            ),
+            user_id=self.user_id,
+            session_id=self.session_id,
+            message_timereceived=self.message_timereceived,
+            messages=messages,
+        )
+
+    def _insert_messages(self, messages: Sequence[BaseMessage]) -> None:
+        HistoryWriteBuffer.insert_rows(self._make_rows(messages))
+
+    def _delete_messages(self) -> None:
+        history_write_buffer.flush_if_pending(
+            self.table_name, self.user_id, self.session_id
+        )
+        self._ensure_table()
+        with self.pool.connection() as connection:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "DELETE FROM "
+                    f"{self.connection_parameters['database']}."
+                    f"{self.connection_parameters['schema']}."
+                    f"{self.table_name} "
+                    f"WHERE SESSION_ID = '{self.session_id}' "
+                    f"AND USER_ID = '{self.user_id}'"
+                    ";"
+                )
+
+    def _with_retries(self, func: Callable, *args):
         attempt = 0
         while attempt < self.snowflake_connect_retries:
             try:
-                with connect(
-                    **self.connection_parameters,
-                    timeout=self.snowflake_connect_timeout,
-                ) as connection:
-                    with connection.cursor() as cursor:
-                        cursor.execute(
-                            "CREATE TABLE IF NOT EXISTS "
-                            f"{self.connection_parameters['database']}."
-                            f"{self.connection_parameters['schema']}."
-                            f"{self.table_name} ( "
-                            "HISTORY_ID INT IDENTITY, "
-                            "USER_ID STRING, "
-                            "SESSION_ID STRING, "
-                            "HISTORY VARIANT, "
-                            "MESSAGE_TIMERECEIVED TIMESTAMP, "
-                            "LOGGING_TIMERECEIVED TIMESTAMP "
-                            ");"
-                        )
-                        cursor.execute(
-                            "SELECT HISTORY "
-                            "FROM ( SELECT * FROM "
-                            f"{self.connection_parameters['database']}."
-                            f"{self.connection_parameters['schema']}."
-                            f"{self.table_name} "
-                            f"WHERE SESSION_ID = '{self.session_id}' "
-                            f"AND USER_ID = '{self.user_id}'"
-                            "ORDER BY MESSAGE_TIMERECEIVED DESC, "
-                            "LOGGING_TIMERECEIVED DESC "
-                            f"LIMIT {int(self.max_len_history * 2)} "
-                            ") AS subquery "
-                            "ORDER BY MESSAGE_TIMERECEIVED ASC, "
-                            "LOGGING_TIMERECEIVED ASC"
-                            ";"
-                        )
-                        # Commit the transaction
-                        response = cursor.fetchall()
-
-                if response:
-                    items = [json.loads(document[0]) for document in response]
-                else:
-                    items = []
-
-                messages = messages_from_dict(items)
-                return messages
-
+                return func(*args)
             except Exception as error:
                 logger.error(error)
                 attempt += 1
                 time.sleep(2)
 
-    def add_message(self, message: BaseMessage) -> None:
-        """Append the message to the record in Snowflake"""
+    async def _awith_retries(self, func: Callable, *args):
         attempt = 0
         while attempt < self.snowflake_connect_retries:
             try:
-                with connect(
-                    **self.connection_parameters,
-                    timeout=self.snowflake_connect_timeout,
-                ) as connection:
-                    with connection.cursor() as cursor:
-                        cursor.execute(
-                            "CREATE TABLE IF NOT EXISTS "
-                            f"{self.connection_parameters['database']}."
-                            f"{self.connection_parameters['schema']}."
-                            f"{self.table_name} ( "
-                            "HISTORY_ID INT IDENTITY, "
-                            "USER_ID STRING, "
-                            "SESSION_ID STRING, "
-                            "HISTORY VARIANT, "
-                            "MESSAGE_TIMERECEIVED TIMESTAMP, "
-                            "LOGGING_TIMERECEIVED TIMESTAMP "
-                            ");"
-                        )
-                        cursor.execute(
-                            "INSERT INTO "
-                            f"{self.connection_parameters['database']}."
-                            f"{self.connection_parameters['schema']}."
-                            f"{self.table_name} ( "
-                            "SESSION_ID, "
-                            "HISTORY, "
-                            "USER_ID, "
-                            "MESSAGE_TIMERECEIVED, "
-                            "LOGGING_TIMERECEIVED "
-                            ") SELECT "
-                            f"'{self.session_id}', "
-                            f"PARSE_JSON( $${json.dumps(message_to_dict(message))}$$ ), "
-                            f"'{self.user_id}', "
-                            f"'{self.message_timereceived}', "
-                            "CURRENT_TIMESTAMP"
-                            ";"
-                        )
-                break
-            except Exception as err:
-                logger.error(err)
+                return await run_in_snowflake_executor(func, *args)
+            except Exception as error:
+                logger.error(error)
                 attempt += 1
-                time.sleep(2)
+                await asyncio.sleep(2)
+
+    @property
+    def messages(self) -> List[BaseMessage]:  # type: ignore
+        """Retrieve the messages from the cache, or Snowflake on a miss"""
+        return self._with_retries(self._read_messages) or []
+
+    async def aget_messages(self) -> List[BaseMessage]:
+        """Retrieve the messages without blocking the event loop"""
+        return await self._awith_retries(self._read_messages) or []
+
+    def add_message(self, message: BaseMessage) -> None:
+        """Append the message to the record in Snowflake"""
+        self.add_messages([message])
+
+    def add_messages(self, messages: Sequence[BaseMessage]) -> None:
+        """Append the messages to the record in Snowflake in a single insert"""
+        if not messages:
+            return
+        if self.write_behind:
+            history_write_buffer.enqueue(self._make_rows(messages))
+        else:
+            self._with_retries(self._insert_messages, messages)
+        if self.use_cache:
+            history_cache.append(self.cache_key, messages)
+
+    async def aadd_messages(self, messages: Sequence[BaseMessage]) -> None:
+        """Append the messages to the record in Snowflake without blocking"""
+        if not messages:
+            return
+        if self.write_behind:
+            # Queued in memory, written by the buffer outside of the request
+            history_write_buffer.enqueue(self._make_rows(messages))
+        else:
+            await self._awith_retries(self._insert_messages, messages)
+        if self.use_cache:
+            history_cache.append(self.cache_key, messages)
 
     def clear(self) -> None:
         """Clear session memory from Snowflake"""
-        attempt = 0
-        while attempt < self.snowflake_connect_retries:
-            try:
-                with connect(
-                    **self.connection_parameters,
-                    timeout=self.snowflake_connect_timeout,
-                ) as connection:
-                    with connection.cursor() as cursor:
-                        cursor.execute(
-                            "CREATE TABLE IF NOT EXISTS "
-                            f"{self.connection_parameters['database']}."
-                            f"{self.connection_parameters['schema']}."
-                            f"{self.table_name} ( "
-                            "HISTORY_ID INT IDENTITY, "
-                            "USER_ID STRING, "
-                            "SESSION_ID STRING, "
-                            "HISTORY VARIANT, "
-                            "MESSAGE_TIMERECEIVED TIMESTAMP, "
-                            "LOGGING_TIMERECEIVED TIMESTAMP "
-                            ");"
-                        )
-                        cursor.execute(
-                            "DELETE FROM "
-                            f"{self.connection_parameters['database']}."
-                            f"{self.connection_parameters['schema']}."
-                            f"{self.table_name} "
-                            f"WHERE SESSION_ID = '{self.session_id}' "
-                            f"AND USER_ID = '{self.user_id}'"
-                            ";"
-                        )
-                break
-            except Exception as err:
-                logger.error(err)
-                attempt += 1
-                time.sleep(2)
+        self._with_retries(self._delete_messages)
+        if self.use_cache:
+            history_cache.reset(self.cache_key)
+
+    async def aclear(self) -> None:
+        """Clear session memory from Snowflake without blocking the event loop"""
+        await self._awith_retries(self._delete_messages)
+        if self.use_cache:
+            history_cache.reset(self.cache_key)
@@ -0,0 +1,125 @@
+import json
+import logging
+import os
+from datetime import datetime, timezone
+from typing import List, Sequence
+
+from langchain_core.chat_history import BaseChatMessageHistory
+from langchain_core.messages import BaseMessage, message_to_dict, messages_from_dict
+
+from .sqlite_db import sqlite_connection
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TABLENAME = os.getenv(
+    "SNOWFLAKE_CHAT_HISTORY_TABLENAME",
+    "MESSAGES_STORE",
+)
+
+
+class SQLiteChatMessageHistory(BaseChatMessageHistory):
+    """Chat message history that stores history in a local SQLite database.
+
+    Meant for single-node deployments, local development and load testing.
+
+    Args:
+        database_path: path of the SQLite database file
+        user_id: arbitrary key that is used to store the messages
+            of a single chat session.
+        session_id: arbitrary key that is used to store the messages
+            of a single chat session.
+        message_timereceived: timestamp when the user message was received
+        table_name: name of the table to use
+        max_len_history: number of conversation turns to read back
+    """
+
+    _created_tables = set()
+
+    def __init__(
+        self,
+        database_path: str,
+        user_id: str,
+        session_id: str,
+        message_timereceived: str,
+        table_name: str = DEFAULT_TABLENAME,
+        max_len_history: int = 15,
+    ):
+        self.database_path = database_path
+        self.user_id = user_id
+        self.session_id = session_id
+        self.message_timereceived = message_timereceived
+        self.table_name = table_name
+        self.max_len_history = max_len_history
+
+    def _ensure_table(self, connection):
+        if (self.database_path, self.table_name) in self._created_tables:
+            return
+        connection.execute(
+            f"CREATE TABLE IF NOT EXISTS {self.table_name} ( "
+            "HISTORY_ID INTEGER PRIMARY KEY AUTOINCREMENT, "
+            "USER_ID TEXT, "
+            "SESSION_ID TEXT, "
+            "HISTORY TEXT, "
+            "MESSAGE_TIMERECEIVED TEXT, "
+            "LOGGING_TIMERECEIVED TEXT "
+            ");"
+        )
+        connection.execute(
+            f"CREATE INDEX IF NOT EXISTS {self.table_name}_SESSION_IDX "
+            f"ON {self.table_name} (USER_ID, SESSION_ID);"
+        )
+        self._created_tables.add((self.database_path, self.table_name))
+
+    @property
+    def messages(self) -> List[BaseMessage]:  # type: ignore
+        """Retrieve the messages from SQLite"""
+        with sqlite_connection(self.database_path) as connection:
+            self._ensure_table(connection)
+            response = connection.execute(
+                "SELECT HISTORY FROM ( "
+                f"SELECT HISTORY, MESSAGE_TIMERECEIVED, HISTORY_ID FROM {self.table_name} "
+                "WHERE SESSION_ID = ? AND USER_ID = ? "
+                "ORDER BY MESSAGE_TIMERECEIVED DESC, HISTORY_ID DESC "
+                "LIMIT ? "
+                ") ORDER BY MESSAGE_TIMERECEIVED ASC, HISTORY_ID ASC;",
+                (self.session_id, self.user_id, int(self.max_len_history * 2)),
+            ).fetchall()
+
+        items = [json.loads(document[0]) for document in response]
+        return messages_from_dict(items)
+
+    def add_message(self, message: BaseMessage) -> None:
+        """Append the message to the record in SQLite"""
+        self.add_messages([message])
+
+    def add_messages(self, messages: Sequence[BaseMessage]) -> None:
+        """Append the messages to the record in SQLite in a single transaction"""
+        logging_timereceived = datetime.now(timezone.utc).isoformat()
+        with sqlite_connection(self.database_path) as connection:
+            self._ensure_table(connection)
+            connection.executemany(
+                f"INSERT INTO {self.table_name} ( "
+                "SESSION_ID, HISTORY, USER_ID, "
+                "MESSAGE_TIMERECEIVED, LOGGING_TIMERECEIVED "
+                ") VALUES (?, ?, ?, ?, ?);",
+                [
+                    (
+                        self.session_id,
+                        json.dumps(message_to_dict(message)),
+                        self.user_id,
+                        self.message_timereceived,
+                        logging_timereceived,
+                    )
+                    for message in messages
+                ],
+            )
+
+    def clear(self) -> None:
+        """Clear session memory from SQLite"""
+        with sqlite_connection(self.database_path) as connection:
+            self._ensure_table(connection)
+            connection.execute(
+                f"DELETE FROM {self.table_name} "
+                "WHERE SESSION_ID = ? AND USER_ID = ?;",
+                (self.session_id, self.user_id),
+            )
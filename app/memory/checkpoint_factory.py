@@ -5,7 +5,10 @@ from typing import Callable
 from fastapi import HTTPException
 
 from ..config import config
+from .base_checkpointer import BaseCheckpointer
 from .checkpointer_snowflake import SnowflakeSaver
+from .checkpointer_sqlite import SQLiteSaver
+from .snowflake_pool import get_snowflake_pool
 
 logger = logging.getLogger(__name__)
 
@@ -37,7 +40,7 @@ def _is_valid_session_id(value: str) -> bool:
 
 def create_checkpoint_factory(
     table_name: str,
-) -> Callable[[str, str], SnowflakeSaver]:
+) -> Callable[[str, str], BaseCheckpointer]:
     """Create a factory that can retrieve checkpoints.
 
     The checkpoints are keyed by user ID and session ID.
@@ -48,11 +51,21 @@ def create_checkpoint_factory(
     Returns:
         A factory that can retrieve checkpoints keyed by user ID and session ID.
     """
+    backend = config.memory_kwargs["backend"]
+    if backend not in ("snowflake", "sqlite"):
+        raise ValueError(f"Unknown memory backend: {backend}")
+
+    if backend == "snowflake":
+        # Created once at startup instead of on every read or write
+        get_snowflake_pool(connection_parameters).register_table(
+            table_name,
+            SnowflakeSaver.create_table_statement(connection_parameters, table_name),
+        )
 
     def get_checkpoint(
         user_id: str,
         session_id: str,
-    ) -> SnowflakeSaver:
+    ) -> BaseCheckpointer:
         """Get a checkpoint from a user id and conversation id."""
         if not _is_valid_user_id(user_id):
             error_message = (
@@ -80,11 +93,20 @@ def create_checkpoint_factory(
             )
 
         # Get any checkpoint
+        if backend == "sqlite":
+            return SQLiteSaver(
+                database_path=config.memory_kwargs["sqlite_path"],
+                user_id=user_id,
+                session_id=session_id,
+                table_name=table_name,
+                compact_every=config.memory_kwargs["checkpoint_compact_every"],
+            )
         checkpoint_langgraph_format = SnowflakeSaver(
             user_id=user_id,
             session_id=session_id,
             connection_parameters=connection_parameters,
             table_name=table_name,
+            compact_every=config.memory_kwargs["checkpoint_compact_every"],
         )
         return checkpoint_langgraph_format
 
@@ -2,9 +2,10 @@ import json
 import logging
 import os
 import time
-from typing import Any, Dict
+from typing import Any, Dict, List, Optional
 
-from snowflake.connector import connect
+from .base_checkpointer import DELTA_KEY, BaseCheckpointer
+from .snowflake_pool import get_snowflake_pool
 
 logger = logging.getLogger(__name__)
 
@@ -14,7 +15,7 @@ DEFAULT_TABLENAME = os.getenv(
 )
 
 
-class SnowflakeSaver:
+class SnowflakeSaver(BaseCheckpointer):
     """Class for storing and managing graph checkpoint objects in Snowflake.
 
     Args:
@@ -24,8 +25,24 @@ class SnowflakeSaver:
         table_name (str, optional): Name of the table to store checkpoints. Defaults to DEFAULT_TABLENAME.
         snowflake_connect_timeout (int, optional): Timeout for Snowflake connection. Defaults to 30 seconds.
         snowflake_connect_retries (int, optional): Number of retries for Snowflake connection. Defaults to 2.
+        compact_every (int, optional): Number of deltas after which the checkpoint is compacted. Defaults to 20.
     """
 
+    @staticmethod
+    def create_table_statement(connection_parameters: dict, table_name: str) -> str:
+        return (
+            "CREATE TABLE IF NOT EXISTS "
+            f"{connection_parameters['database']}."
+            f"{connection_parameters['schema']}."
+            f"{table_name} ( "
+            "CHECKPOINT_ID INT IDENTITY, "
+            "USER_ID STRING, "
+            "SESSION_ID STRING, "
+            "CHECKPOINT VARIANT, "
+            "LOGGING_TIMERECEIVED TIMESTAMP "
+            ");"
+        )
+
     def __init__(
         self,
         connection_parameters: dict,
@@ -34,6 +51,7 @@ class SnowflakeSaver:
         table_name: str = DEFAULT_TABLENAME,
         snowflake_connect_timeout: int = 30,
         snowflake_connect_retries: int = 2,
+        compact_every: int = 20,
     ):
         self.connection_parameters = connection_parameters
         self.user_id = user_id
@@ -41,140 +59,101 @@ class SnowflakeSaver:
         self.table_name = table_name
         self.snowflake_connect_timeout = snowflake_connect_timeout
         self.snowflake_connect_retries = snowflake_connect_retries
+        self.compact_every = compact_every
+        self.pool = get_snowflake_pool(connection_parameters)
+
+    def _ensure_table(self):
+        """Create the table once per table name, through the shared pool."""
+        self.pool.ensure_table(
+            self.table_name,
+            self.create_table_statement(self.connection_parameters, self.table_name),
+        )
+
+    @property
+    def _qualified_table_name(self) -> str:
+        return (
+            f"{self.connection_parameters['database']}."
+            f"{self.connection_parameters['schema']}."
+            f"{self.table_name}"
+        )
+
+    @property
+    def _session_filter(self) -> str:
+        return f"SESSION_ID = '{self.session_id}' AND USER_ID = '{self.user_id}' "
 
     @property
-    def _load_checkpoint(self) -> Dict[str, Any]:
-        """Retrieve the latest checkpoint from Snowflake.
+    def _since_snapshot(self) -> str:
+        """Filter on the rows of the session from its latest snapshot on."""
+        return (
+            f"WHERE {self._session_filter}"
+            "AND CHECKPOINT_ID >= COALESCE(( "
+            f"SELECT MAX(CHECKPOINT_ID) FROM {self._qualified_table_name} "
+            f"WHERE {self._session_filter}"
+            f'AND CHECKPOINT:"{DELTA_KEY}" IS NULL '
+            "), 0) "
+        )
 
-        Returns:
-            Dict[str, Any]: The latest checkpoint data.
-        """
+    def _execute(self, statement: str) -> Optional[list]:
+        """Run a statement with retries and return its rows, or None if every
+        attempt failed."""
         attempt = 0
         while attempt < self.snowflake_connect_retries:
             try:
-                with connect(
-                    **self.connection_parameters,
-                    timeout=self.snowflake_connect_timeout,
-                ) as connection:
+                self._ensure_table()
+                with self.pool.connection() as connection:
                     with connection.cursor() as cursor:
-                        cursor.execute(
-                            "CREATE TABLE IF NOT EXISTS "
-                            f"{self.connection_parameters['database']}."
-                            f"{self.connection_parameters['schema']}."
-                            f"{self.table_name} ( "
-                            "CHECKPOINT_ID INT IDENTITY, "
-                            "USER_ID STRING, "
-                            "SESSION_ID STRING, "
-                            "CHECKPOINT VARIANT, "
-                            "LOGGING_TIMERECEIVED TIMESTAMP "
-                            ");"
-                        )
-                        cursor.execute(
-                            "SELECT CHECKPOINT FROM "
-                            f"{self.connection_parameters['database']}."
-                            f"{self.connection_parameters['schema']}."
-                            f"{self.table_name} "
-                            f"WHERE SESSION_ID = '{self.session_id}' "
-                            f"AND USER_ID = '{self.user_id}'"
-                            "ORDER BY LOGGING_TIMERECEIVED DESC "
-                            "LIMIT 1;"
-                        )
-                        # Commit the transaction
-                        response = cursor.fetchall()
-
-                if response:
-                    items = json.loads(response[0][0])
-                else:
-                    items = {}
-
-                return items
-
+                        cursor.execute(statement)
+                        return cursor.fetchall()
             except Exception as error:
                 logger.error(error)
                 attempt += 1
                 time.sleep(2)
 
-    def add_checkpoint(self, checkpoint: Dict[str, Any]) -> None:
-        """Append a new checkpoint to the record in Snowflake.
+    def _load_rows(self) -> List[Dict[str, Any]]:
+        response = self._execute(
+            f"SELECT CHECKPOINT FROM {self._qualified_table_name} "
+            f"{self._since_snapshot}"
+            "ORDER BY CHECKPOINT_ID ASC;"
+        )
+        return [json.loads(row[0]) for row in response or []]
 
-        Args:
-            checkpoint (Dict[str, Any]): The checkpoint data to be added.
-        """
-        attempt = 0
-        while attempt < self.snowflake_connect_retries:
-            try:
-                with connect(
-                    **self.connection_parameters,
-                    timeout=self.snowflake_connect_timeout,
-                ) as connection:
-                    with connection.cursor() as cursor:
-                        cursor.execute(
-                            "CREATE TABLE IF NOT EXISTS "
-                            f"{self.connection_parameters['database']}."
-                            f"{self.connection_parameters['schema']}."
-                            f"{self.table_name} ( "
-                            "CHECKPOINT_ID INT IDENTITY, "
-                            "USER_ID STRING, "
-                            "SESSION_ID STRING, "
-                            "CHECKPOINT VARIANT, "
-                            "LOGGING_TIMERECEIVED TIMESTAMP "
-                            ");"
-                        )
-                        cursor.execute(
-                            "INSERT INTO "
-                            f"{self.connection_parameters['database']}."
-                            f"{self.connection_parameters['schema']}."
-                            f"{self.table_name} ( "
-                            "SESSION_ID, "
-                            "CHECKPOINT, "
-                            "USER_ID, "
-                            "LOGGING_TIMERECEIVED "
-                            ") SELECT "
-                            f"'{self.session_id}', "
-                            f"PARSE_JSON( $${json.dumps(checkpoint)}$$ ), "
-                            f"'{self.user_id}', "
-                            "CURRENT_TIMESTAMP"
-                            ";"
-                        )
-                break
-            except Exception as err:
-                logger.error(err)
-                attempt += 1
-                time.sleep(2)
+    def _insert_row(self, row: Dict[str, Any]) -> None:
+        self._execute(
+            f"INSERT INTO {self._qualified_table_name} ( "
+            "SESSION_ID, "
+            "CHECKPOINT, "
+            "USER_ID, "
+            "LOGGING_TIMERECEIVED "
+            ") SELECT "
+            f"'{self.session_id}', "
+            f"PARSE_JSON( $${json.dumps(row)}$$ ), "
+            f"'{self.user_id}', "
+            "CURRENT_TIMESTAMP"
+            ";"
+        )
+
+    def _count_deltas(self) -> int:
+        response = self._execute(
+            f"SELECT COUNT(*) FROM {self._qualified_table_name} "
+            f"{self._since_snapshot}"
+            f'AND CHECKPOINT:"{DELTA_KEY}" IS NOT NULL;'
+        )
+        return response[0][0] if response else 0
+
+    def _delete_before_latest_snapshot(self) -> None:
+        self._execute(
+            f"DELETE FROM {self._qualified_table_name} "
+            f"WHERE {self._session_filter}"
+            "AND CHECKPOINT_ID < ( "
+            f"SELECT MAX(CHECKPOINT_ID) FROM {self._qualified_table_name} "
+            f"WHERE {self._session_filter}"
+            f'AND CHECKPOINT:"{DELTA_KEY}" IS NULL '
+            ");"
+        )
 
     def clear(self) -> None:
         """Clear all checkpoints for the current session from Snowflake."""
-        attempt = 0
-        while attempt < self.snowflake_connect_retries:
-            try:
-                with connect(
-                    **self.connection_parameters,
-                    timeout=self.snowflake_connect_timeout,
-                ) as connection:
-                    with connection.cursor() as cursor:
-                        cursor.execute(
-                            "CREATE TABLE IF NOT EXISTS "
-                            f"{self.connection_parameters['database']}."
-                            f"{self.connection_parameters['schema']}."
-                            f"{self.table_name} ( "
-                            "CHECKPOINT_ID INT IDENTITY, "
-                            "USER_ID STRING, "
-                            "SESSION_ID STRING, "
-                            "CHECKPOINT VARIANT, "
-                            "LOGGING_TIMERECEIVED TIMESTAMP "
-                            ");"
-                        )
-                        cursor.execute(
-                            "DELETE FROM "
-                            f"{self.connection_parameters['database']}."
-                            f"{self.connection_parameters['schema']}."
-                            f"{self.table_name} "
-                            f"WHERE SESSION_ID = '{self.session_id}' "
-                            f"AND USER_ID = '{self.user_id}'"
-                            ";"
-                        )
-                break
-            except Exception as err:
-                logger.error(err)
-                attempt += 1
-                time.sleep(2)
+        self._execute(
+            f"DELETE FROM {self._qualified_table_name} "
+            f"WHERE {self._session_filter};"
+        )
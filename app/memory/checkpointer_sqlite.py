@@ -0,0 +1,128 @@
+import json
+import logging
+import os
+from typing import Any, Dict, List
+
+from .base_checkpointer import DELTA_KEY, BaseCheckpointer
+from .sqlite_db import sqlite_connection
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TABLENAME = os.getenv(
+    "SNOWFLAKE_CHECKPOINTER_TABLENAME",
+    "SAVER",
+)
+
+
+class SQLiteSaver(BaseCheckpointer):
+    """Class for storing and managing graph checkpoint objects in SQLite.
+
+    Meant for single-node deployments, local development and load testing.
+
+    Args:
+        database_path (str): Path of the SQLite database file.
+        user_id (str): Unique identifier for the user.
+        session_id (str): Unique identifier for the session.
+        table_name (str, optional): Name of the table to store checkpoints. Defaults to DEFAULT_TABLENAME.
+        compact_every (int, optional): Number of deltas after which the checkpoint is compacted. Defaults to 20.
+    """
+
+    _created_tables = set()
+
+    def __init__(
+        self,
+        database_path: str,
+        user_id: str,
+        session_id: str,
+        table_name: str = DEFAULT_TABLENAME,
+        compact_every: int = 20,
+    ):
+        self.database_path = database_path
+        self.user_id = user_id
+        self.session_id = session_id
+        self.table_name = table_name
+        self.compact_every = compact_every
+
+    def _ensure_table(self, connection):
+        if (self.database_path, self.table_name) in self._created_tables:
+            return
+        connection.execute(
+            f"CREATE TABLE IF NOT EXISTS {self.table_name} ( "
+            "CHECKPOINT_ID INTEGER PRIMARY KEY AUTOINCREMENT, "
+            "USER_ID TEXT, "
+            "SESSION_ID TEXT, "
+            "CHECKPOINT TEXT, "
+            "LOGGING_TIMERECEIVED TEXT DEFAULT CURRENT_TIMESTAMP "
+            ");"
+        )
+        connection.execute(
+            f"CREATE INDEX IF NOT EXISTS {self.table_name}_SESSION_IDX "
+            f"ON {self.table_name} (USER_ID, SESSION_ID);"
+        )
+        self._created_tables.add((self.database_path, self.table_name))
+
+    # Rows of the session from its latest snapshot on
+    _since_snapshot = (
+        "WHERE SESSION_ID = ? AND USER_ID = ? AND CHECKPOINT_ID >= COALESCE(( "
+        "SELECT MAX(CHECKPOINT_ID) FROM {table_name} "
+        "WHERE SESSION_ID = ? AND USER_ID = ? "
+        f"AND json_extract(CHECKPOINT, '$.{DELTA_KEY}') IS NULL "
+        "), 0) "
+    )
+
+    def _load_rows(self) -> List[Dict[str, Any]]:
+        with sqlite_connection(self.database_path) as connection:
+            self._ensure_table(connection)
+            response = connection.execute(
+                f"SELECT CHECKPOINT FROM {self.table_name} "
+                + self._since_snapshot.format(table_name=self.table_name)
+                + "ORDER BY CHECKPOINT_ID ASC;",
+                (self.session_id, self.user_id) * 2,
+            ).fetchall()
+
+        return [json.loads(row[0]) for row in response]
+
+    def _insert_row(self, row: Dict[str, Any]) -> None:
+        with sqlite_connection(self.database_path) as connection:
+            self._ensure_table(connection)
+            connection.execute(
+                f"INSERT INTO {self.table_name} ( "
+                "SESSION_ID, CHECKPOINT, USER_ID "
+                ") VALUES (?, ?, ?);",
+                (self.session_id, json.dumps(row), self.user_id),
+            )
+
+    def _count_deltas(self) -> int:
+        with sqlite_connection(self.database_path) as connection:
+            self._ensure_table(connection)
+            response = connection.execute(
+                f"SELECT COUNT(*) FROM {self.table_name} "
+                + self._since_snapshot.format(table_name=self.table_name)
+                + f"AND json_extract(CHECKPOINT, '$.{DELTA_KEY}') IS NOT NULL;",
+                (self.session_id, self.user_id) * 2,
+            ).fetchone()
+
+        return response[0]
+
+    def _delete_before_latest_snapshot(self) -> None:
+        with sqlite_connection(self.database_path) as connection:
+            self._ensure_table(connection)
+            connection.execute(
+                f"DELETE FROM {self.table_name} "
+                "WHERE SESSION_ID = ? AND USER_ID = ? AND CHECKPOINT_ID < ( "
+                f"SELECT MAX(CHECKPOINT_ID) FROM {self.table_name} "
+                "WHERE SESSION_ID = ? AND USER_ID = ? "
+                f"AND json_extract(CHECKPOINT, '$.{DELTA_KEY}') IS NULL "
+                ");",
+                (self.session_id, self.user_id) * 2,
+            )
+
+    def clear(self) -> None:
+        """Clear all checkpoints for the current session from SQLite."""
+        with sqlite_connection(self.database_path) as connection:
+            self._ensure_table(connection)
+            connection.execute(
+                f"DELETE FROM {self.table_name} "
+                "WHERE SESSION_ID = ? AND USER_ID = ?;",
+                (self.session_id, self.user_id),
+            )
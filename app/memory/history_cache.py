@@ -0,0 +1,200 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from langchain_core.messages import BaseMessage, message_to_dict, messages_from_dict
+
+from ..config import config
+
+logger = logging.getLogger(__name__)
+
+HistoryKey = Tuple[str, str, str]  # (table_name, user_id, session_id)
+
+
+class HistoryCache:
+    """In-process LRU/TTL cache of the recent messages of each conversation.
+
+    Entries are filled on a Snowflake read and kept coherent by the writes and
+    clears made through this process. As a session can move between replicas,
+    each entry also keeps the number of messages of the conversation, checked
+    against a count of its messages when the entry was not checked for
+    `check_interval` seconds. A conversation written through another replica
+    is therefore served from the cache for at most `check_interval` seconds.
+
+    Args:
+        max_sessions: maximum number of cached conversations
+        ttl: time to live of a cached conversation, in seconds
+        check_interval: seconds an entry is served without checking its count
+    """
+
+    def __init__(
+        self, max_sessions: int = 2048, ttl: int = 1800, check_interval: float = 30
+    ):
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self.check_interval = check_interval
+        self._entries: OrderedDict = OrderedDict()
+        # Writes to detect reads racing with writes: the last write of each
+        # cached conversation, and the number of writes to the others
+        self._generations: Dict[HistoryKey, int] = {}
+        self._writes = 0
+        self._uncached_writes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        # Entries found outdated by a write made by another replica
+        self.stale = 0
+        self.miss_read_seconds = 0.0
+        self.check_seconds = 0.0
+
+    def get(
+        self,
+        key: HistoryKey,
+        limit: int,
+        count_messages: Optional[Callable[[], int]] = None,
+    ) -> Optional[List[BaseMessage]]:
+        """Return the last `limit` messages of the conversation, if cached.
+
+        Args:
+            key: key of the conversation
+            limit: number of messages cached for the conversation
+            count_messages: returns the current number of messages of the
+                conversation, to detect writes made by another replica
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry["limit"] != limit or entry["expires_at"] <= now:
+                self._drop(key)
+                self.misses += 1
+                return None
+            generation = self._generations.get(key)
+            num_messages = entry["num_messages"]
+            check = (count_messages is not None) and (
+                entry["checked_at"] + self.check_interval <= now
+            )
+            items = list(entry["items"])
+
+        if check:
+            # Counted outside of the lock, as it queries Snowflake
+            current_num_messages = count_messages()
+            check_seconds = time.monotonic() - now
+            with self._lock:
+                self.check_seconds += check_seconds
+                if current_num_messages != num_messages:
+                    if self._generations.get(key) == generation:
+                        self._drop(key)
+                    self.misses += 1
+                    self.stale += 1
+                    return None
+                if key in self._entries:
+                    self._entries[key]["checked_at"] = now
+
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+            self.hits += 1
+        return messages_from_dict(items)
+
+    def generation(self, key: HistoryKey) -> Tuple[Optional[int], int]:
+        """Return the writes to compare with when caching a read, see `put`."""
+        with self._lock:
+            return self._generation(key)
+
+    def _generation(self, key: HistoryKey) -> Tuple[Optional[int], int]:
+        return self._generations.get(key), self._uncached_writes
+
+    def put(
+        self,
+        key: HistoryKey,
+        limit: int,
+        messages: Sequence[BaseMessage],
+        generation: Tuple[Optional[int], int],
+        read_seconds: float,
+        num_messages: int,
+    ):
+        """Cache messages read from Snowflake, unless a write happened meanwhile.
+
+        `num_messages` is the number of messages of the whole conversation.
+        """
+        with self._lock:
+            self.miss_read_seconds += read_seconds
+            if self._generation(key) != generation:
+                return
+            self._set(key, limit, [message_to_dict(m) for m in messages], num_messages)
+            self._entries[key]["checked_at"] = time.monotonic()
+
+    def _set(self, key: HistoryKey, limit: int, items: List[dict], num_messages: int):
+        checked_at = self._entries.get(key, {}).get("checked_at", 0.0)
+        self._entries[key] = {
+            "limit": limit,
+            "items": items[-limit:] if limit > 0 else [],
+            "num_messages": num_messages,
+            "checked_at": checked_at,
+            "expires_at": time.monotonic() + self.ttl,
+        }
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_sessions:
+            evicted, _ = self._entries.popitem(last=False)
+            self._generations.pop(evicted, None)
+
+    def _drop(self, key: HistoryKey):
+        self._entries.pop(key, None)
+        self._generations.pop(key, None)
+
+    def _bump(self, key: HistoryKey) -> Optional[dict]:
+        """Record a write to the conversation and return its cached entry."""
+        entry = self._entries.get(key)
+        if entry is None:
+            self._uncached_writes += 1
+        else:
+            self._writes += 1
+            self._generations[key] = self._writes
+        return entry
+
+    def append(self, key: HistoryKey, messages: Sequence[BaseMessage]):
+        """Add messages written to the conversation to its cached entry."""
+        with self._lock:
+            entry = self._bump(key)
+            if entry is not None:
+                self._set(
+                    key,
+                    entry["limit"],
+                    entry["items"] + [message_to_dict(m) for m in messages],
+                    entry["num_messages"] + len(messages),
+                )
+
+    def reset(self, key: HistoryKey):
+        """Mark the conversation as cleared."""
+        with self._lock:
+            entry = self._bump(key)
+            if entry is not None:
+                self._set(key, entry["limit"], [], 0)
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            avg_read_seconds = (
+                self.miss_read_seconds / self.misses if self.misses else 0.0
+            )
+            # Hits still pay for the count checks
+            seconds_saved = self.hits * avg_read_seconds - self.check_seconds
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "stale": self.stale,
+                "hit_rate": round(self.hits / total, 3) if total else 0.0,
+                "cached_sessions": len(self._entries),
+                "avg_snowflake_read_seconds": round(avg_read_seconds, 4),
+                "snowflake_check_seconds": round(self.check_seconds, 2),
+                "snowflake_read_seconds_saved": round(seconds_saved, 2),
+            }
+
+
+history_cache = HistoryCache(
+    max_sessions=config.history_cache_kwargs["max_sessions"],
+    ttl=config.history_cache_kwargs["ttl"],
+    check_interval=config.history_cache_kwargs["check_interval"],
+)
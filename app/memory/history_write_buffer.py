@@ -0,0 +1,227 @@
+import json
+import logging
+import threading
+from collections import defaultdict
+from typing import List, Optional, Sequence
+
+from langchain_core.messages import BaseMessage, message_to_dict
+
+from ..config import config
+from .snowflake_pool import SnowflakeConnectionPool
+
+logger = logging.getLogger(__name__)
+
+
+class HistoryWriteBuffer:
+    """Write-behind buffer for chat history messages.
+
+    Messages are queued in memory and written by a background thread every
+    `flush_interval` seconds, as one multi-row insert per table across all
+    sessions. A session with queued messages is flushed before being read or
+    cleared, so that readers always see their own writes. Messages that still
+    fail after `max_attempts` flushes are appended to a dead-letter file, as
+    JSON lines, to be replayed once Snowflake is reachable again.
+
+    Args:
+        flush_interval: seconds between two background flushes
+        max_batch_size: number of queued messages that triggers an early flush
+        max_attempts: number of failed flushes after which messages are moved
+            to the dead-letter file
+        dead_letter_path: path of the dead-letter file, or None to drop them
+    """
+
+    def __init__(
+        self,
+        flush_interval: float = 1.0,
+        max_batch_size: int = 200,
+        max_attempts: int = 3,
+        dead_letter_path: Optional[str] = None,
+    ):
+        self.flush_interval = flush_interval
+        self.max_batch_size = max_batch_size
+        self.max_attempts = max_attempts
+        self.dead_letter_path = dead_letter_path
+
+        self._pending: List[dict] = []
+        self._inflight: List[dict] = []
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def _start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stopped.clear()
+            self._thread = threading.Thread(
+                target=self._run,
+                name="history-write-buffer",
+                daemon=True,
+            )
+            self._thread.start()
+
+    def _run(self):
+        while not self._stopped.is_set():
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+
+    @staticmethod
+    def make_rows(
+        pool: SnowflakeConnectionPool,
+        table_name: str,
+        create_table_statement: str,
+        user_id: str,
+        session_id: str,
+        message_timereceived: str,
+        messages: Sequence[BaseMessage],
+    ) -> List[dict]:
+        """Build the rows to insert for messages of a session."""
+        return [
+            {
+                "pool": pool,
+                "table_name": table_name,
+                "create_table_statement": create_table_statement,
+                "user_id": user_id,
+                "session_id": session_id,
+                "message_timereceived": message_timereceived,
+                "history": json.dumps(message_to_dict(message)),
+                "attempts": 0,
+            }
+            for message in messages
+        ]
+
+    def enqueue(self, rows: List[dict]):
+        """Queue rows to be written by the background thread."""
+        with self._lock:
+            self._pending.extend(rows)
+            pending = len(self._pending)
+            self._start()
+        if pending >= self.max_batch_size:
+            self._wakeup.set()
+
+    def count_pending(self, table_name: str, user_id: str, session_id: str) -> int:
+        """Number of messages of the session queued or being written."""
+        with self._lock:
+            return sum(
+                row["table_name"] == table_name
+                and row["user_id"] == user_id
+                and row["session_id"] == session_id
+                for row in self._pending + self._inflight
+            )
+
+    def has_pending(self, table_name: str, user_id: str, session_id: str) -> bool:
+        """Whether messages of the session are queued or being written."""
+        return self.count_pending(table_name, user_id, session_id) > 0
+
+    def flush_if_pending(self, table_name: str, user_id: str, session_id: str):
+        """Flush the buffer if the session has queued messages."""
+        if self.has_pending(table_name, user_id, session_id):
+            self.flush()
+
+    @staticmethod
+    def insert_rows(rows: List[dict]):
+        """Insert rows of the same pool and table in a single statement."""
+        pool = rows[0]["pool"]
+        table_name = rows[0]["table_name"]
+        parameters = pool.connection_parameters
+        # Rows are offset by a millisecond each to keep their order when read back
+        values = " UNION ALL ".join(
+            "SELECT "
+            f"'{row['session_id']}', "
+            f"PARSE_JSON( $${row['history']}$$ ), "
+            f"'{row['user_id']}', "
+            f"'{row['message_timereceived']}', "
+            f"DATEADD(MILLISECOND, {i}, CURRENT_TIMESTAMP)"
+            for i, row in enumerate(rows)
+        )
+        pool.ensure_table(table_name, rows[0]["create_table_statement"])
+        with pool.connection() as connection:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "INSERT INTO "
+                    f"{parameters['database']}."
+                    f"{parameters['schema']}."
+                    f"{table_name} ( "
+                    "SESSION_ID, "
+                    "HISTORY, "
+                    "USER_ID, "
+                    "MESSAGE_TIMERECEIVED, "
+                    "LOGGING_TIMERECEIVED "
+                    f") {values};"
+                )
+
+    def flush(self):
+        """Write all queued messages, one multi-row insert per table."""
+        with self._flush_lock:
+            with self._lock:
+                self._inflight, self._pending = self._pending, []
+            if not self._inflight:
+                return
+
+            batches = defaultdict(list)
+            for row in self._inflight:
+                batches[(id(row["pool"]), row["table_name"])].append(row)
+
+            failed = []
+            dead = []
+            for rows in batches.values():
+                try:
+                    self.insert_rows(rows)
+                except Exception as error:
+                    logger.error(f"Could not write {len(rows)} messages: {error}")
+                    for row in rows:
+                        row["attempts"] += 1
+                        if row["attempts"] < self.max_attempts:
+                            failed.append(row)
+                        else:
+                            dead.append(row)
+            if dead:
+                self.dead_letter(dead)
+
+            with self._lock:
+                # Failed messages go back ahead of the ones queued meanwhile
+                self._pending = failed + self._pending
+                self._inflight = []
+
+    def dead_letter(self, rows: List[dict]):
+        """Append rows that could not be written to the dead-letter file."""
+        if self.dead_letter_path is None:
+            logger.error(f"Dropping {len(rows)} messages after failed writes")
+            return
+        try:
+            with open(self.dead_letter_path, "a") as file:
+                for row in rows:
+                    parameters = row["pool"].connection_parameters
+                    record = {
+                        "database": parameters["database"],
+                        "schema": parameters["schema"],
+                        "table_name": row["table_name"],
+                        "user_id": row["user_id"],
+                        "session_id": row["session_id"],
+                        "message_timereceived": row["message_timereceived"],
+                        "history": row["history"],
+                    }
+                    file.write(json.dumps(record) + "\n")
+            logger.error(
+                f"Moved {len(rows)} messages to {self.dead_letter_path} "
+                f"after {self.max_attempts} failed writes"
+            )
+        except OSError as error:
+            logger.error(f"Dropping {len(rows)} messages: {error}")
+
+    def close(self):
+        """Stop the background thread and write all queued messages."""
+        self._stopped.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.flush_interval + 30)
+        self.flush()
+
+
+history_write_buffer = HistoryWriteBuffer(
+    flush_interval=config.history_write_behind_kwargs["flush_interval"],
+    max_batch_size=config.history_write_behind_kwargs["max_batch_size"],
+    max_attempts=config.history_write_behind_kwargs["max_attempts"],
+    dead_letter_path=config.history_write_behind_kwargs["dead_letter_path"],
+)
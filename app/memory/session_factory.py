@@ -1,12 +1,15 @@
 import logging
 import re
-from typing import Callable
+from typing import Callable, Optional
 
 from fastapi import HTTPException
 from langchain_core.chat_history import BaseChatMessageHistory
 
 from ..config import config
 from .chat_history_snowflake import SnowflakeChatMessageHistory
+from .chat_history_sqlite import SQLiteChatMessageHistory
+from .snowflake_pool import get_snowflake_pool
+from .summary_memory import SummaryChatMessageHistory
 
 logger = logging.getLogger(__name__)
 
@@ -39,6 +42,7 @@ def _is_valid_session_id(value: str) -> bool:
 def create_session_factory(
     table_name: str,
     max_len_history: int = 15,
+    summarize: Optional[bool] = None,
 ) -> Callable[[str, str, str], BaseChatMessageHistory]:
     """Create a factory that can retrieve chat histories.
 
@@ -46,16 +50,66 @@ def create_session_factory(
 
     Args:
         table_name: Table name in database storing the chat histories.
+        max_len_history: Number of conversation turns to read back.
+        summarize: Whether to keep the last turns verbatim and a running
+            summary of older turns, defaults to `history_summary_kwargs`.
 
     Returns:
         A factory that can retrieve chat histories keyed by user ID and session ID.
     """
+    backend = config.memory_kwargs["backend"]
+    if backend not in ("snowflake", "sqlite"):
+        raise ValueError(f"Unknown memory backend: {backend}")
+    if summarize is None:
+        summarize = config.history_summary_kwargs["enabled"]
+    verbatim_turns = min(
+        max_len_history, config.history_summary_kwargs["verbatim_turns"]
+    )
+    # Summaries are stored as messages of a table with the same schema
+    summary_table_name = f"{table_name}_SUMMARY"
+
+    if backend == "snowflake":
+        # Created once at startup instead of on every read or write
+        pool = get_snowflake_pool(connection_parameters)
+        tables = [table_name, summary_table_name] if summarize else [table_name]
+        for name in tables:
+            pool.register_table(
+                name,
+                SnowflakeChatMessageHistory.create_table_statement(
+                    connection_parameters, name
+                ),
+            )
+
+    def get_backend_history(
+        name: str,
+        user_id: str,
+        session_id: str,
+        message_timereceived: str,
+        max_len_history: int,
+    ) -> BaseChatMessageHistory:
+        if backend == "sqlite":
+            return SQLiteChatMessageHistory(
+                database_path=config.memory_kwargs["sqlite_path"],
+                user_id=user_id,
+                session_id=session_id,
+                message_timereceived=message_timereceived,
+                table_name=name,
+                max_len_history=max_len_history,
+            )
+        return SnowflakeChatMessageHistory(
+            user_id=user_id,
+            session_id=session_id,
+            message_timereceived=message_timereceived,
+            connection_parameters=connection_parameters,
+            table_name=name,
+            max_len_history=max_len_history,
+        )
 
     def get_session_history(
         user_id: str,
         session_id: str,
         message_timereceived: str,
-    ) -> SnowflakeChatMessageHistory:
+    ) -> BaseChatMessageHistory:
         """Get a chat history from a user id and conversation id."""
         if not _is_valid_user_id(user_id):
             error_message = (
@@ -83,14 +137,24 @@ def create_session_factory(
             )
 
         # Get any chat history
-        history_langchain_format = SnowflakeChatMessageHistory(
-            user_id=user_id,
-            session_id=session_id,
-            message_timereceived=message_timereceived,
-            connection_parameters=connection_parameters,
-            table_name=table_name,
-            max_len_history=max_len_history,
+        if not summarize:
+            return get_backend_history(
+                table_name, user_id, session_id, message_timereceived, max_len_history
+            )
+        return SummaryChatMessageHistory(
+            # One more turn to find the turn dropped from the verbatim window
+            history=get_backend_history(
+                table_name,
+                user_id,
+                session_id,
+                message_timereceived,
+                verbatim_turns + 1,
+            ),
+            summary_history=get_backend_history(
+                summary_table_name, user_id, session_id, message_timereceived, 1
+            ),
+            verbatim_turns=verbatim_turns,
+            max_catchup_turns=config.history_summary_kwargs["max_catchup_turns"],
         )
-        return history_langchain_format
 
     return get_session_history
@@ -0,0 +1,252 @@
+import asyncio
+import functools
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator
+
+from snowflake.connector import SnowflakeConnection, connect
+
+from ..config import config
+
+logger = logging.getLogger(__name__)
+
+
+class SnowflakeConnectionPool:
+    """Bounded pool of long-lived Snowflake connections.
+
+    Idle connections are kept alive on the Snowflake side and checked with a
+    cheap query before being handed out again when they have been idle for a
+    while. Tables used through the pool are created once per table name.
+
+    Args:
+        connection_parameters (dict): Connection parameters for Snowflake.
+        max_size (int, optional): Maximum number of open connections. Defaults to 8.
+        connect_timeout (int, optional): Timeout for a new Snowflake connection.
+            Defaults to 30 seconds.
+        acquire_timeout (int, optional): Maximum time to wait for a free connection.
+            Defaults to 30 seconds.
+        max_idle_time (int, optional): Idle connections older than this are closed.
+            Defaults to 1800 seconds.
+        health_check_interval (int, optional): Idle connections older than this are
+            checked before reuse. Defaults to 60 seconds.
+    """
+
+    def __init__(
+        self,
+        connection_parameters: dict,
+        max_size: int = 8,
+        connect_timeout: int = 30,
+        acquire_timeout: int = 30,
+        max_idle_time: int = 1800,
+        health_check_interval: int = 60,
+    ):
+        self.connection_parameters = connection_parameters
+        self.max_size = max_size
+        self.connect_timeout = connect_timeout
+        self.acquire_timeout = acquire_timeout
+        self.max_idle_time = max_idle_time
+        self.health_check_interval = health_check_interval
+
+        self._idle: deque = deque()
+        self._closed = False
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max_size)
+        self._tables: Dict[str, str] = {}
+        self._bootstrapped_tables = set()
+        self._stats = {
+            "acquired": 0,
+            "created": 0,
+            "discarded": 0,
+            "acquire_timeouts": 0,
+            "total_wait_seconds": 0.0,
+            "max_wait_seconds": 0.0,
+        }
+
+    def _connect(self) -> SnowflakeConnection:
+        connection = connect(
+            **self.connection_parameters,
+            timeout=self.connect_timeout,
+            client_session_keep_alive=True,
+        )
+        self._stats["created"] += 1
+        return connection
+
+    def _close(self, connection: SnowflakeConnection):
+        self._stats["discarded"] += 1
+        try:
+            connection.close()
+        except Exception as error:
+            logger.warning(f"Could not close Snowflake connection: {error}")
+
+    def _is_healthy(self, connection: SnowflakeConnection) -> bool:
+        if connection.is_closed():
+            return False
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1;")
+            return True
+        except Exception as error:
+            logger.warning(f"Discarding unhealthy Snowflake connection: {error}")
+            return False
+
+    def _checkout(self) -> SnowflakeConnection:
+        """Return the most recently used healthy idle connection, or a new one."""
+        while True:
+            with self._lock:
+                if not self._idle:
+                    break
+                connection, last_used = self._idle.pop()
+            idle_time = time.monotonic() - last_used
+            if idle_time > self.max_idle_time:
+                self._close(connection)
+            elif idle_time > self.health_check_interval and not self._is_healthy(
+                connection
+            ):
+                self._close(connection)
+            else:
+                return connection
+        return self._connect()
+
+    @contextmanager
+    def connection(self) -> Iterator[SnowflakeConnection]:
+        """Borrow a connection from the pool.
+
+        The connection is returned to the pool when the block exits, or closed
+        if the block raised an error.
+
+        Raises:
+            TimeoutError: if no connection is available within acquire_timeout.
+        """
+        start = time.monotonic()
+        if not self._slots.acquire(timeout=self.acquire_timeout):
+            self._stats["acquire_timeouts"] += 1
+            raise TimeoutError(
+                f"No Snowflake connection available after {self.acquire_timeout}s"
+            )
+        wait_seconds = time.monotonic() - start
+        self._stats["acquired"] += 1
+        self._stats["total_wait_seconds"] += wait_seconds
+        self._stats["max_wait_seconds"] = max(
+            self._stats["max_wait_seconds"], wait_seconds
+        )
+
+        try:
+            connection = self._checkout()
+            try:
+                yield connection
+            except Exception:
+                self._close(connection)
+                raise
+            else:
+                with self._lock:
+                    closed = self._closed
+                    if not closed:
+                        self._idle.append((connection, time.monotonic()))
+                if closed:
+                    # Returned after the pool was closed, e.g. an evicted pool
+                    self._close(connection)
+        finally:
+            self._slots.release()
+
+    def register_table(self, table_name: str, create_table_statement: str):
+        """Register the DDL of a table to be created by bootstrap_tables."""
+        with self._lock:
+            self._tables.setdefault(table_name, create_table_statement)
+
+    def ensure_table(self, table_name: str, create_table_statement: str):
+        """Create the table if it has not been created through this pool yet."""
+        if table_name in self._bootstrapped_tables:
+            return
+        self.register_table(table_name, create_table_statement)
+        with self.connection() as connection:
+            with connection.cursor() as cursor:
+                cursor.execute(create_table_statement)
+        self._bootstrapped_tables.add(table_name)
+        logger.info(f"Snowflake table {table_name} is ready")
+
+    def bootstrap_tables(self):
+        """Create all registered tables that have not been created yet."""
+        for table_name, create_table_statement in list(self._tables.items()):
+            try:
+                self.ensure_table(table_name, create_table_statement)
+            except Exception as error:
+                # Retried lazily on first use
+                logger.error(f"Could not bootstrap {table_name}: {error}")
+
+    def close(self):
+        """Close all idle connections, and the connections in use when returned."""
+        with self._lock:
+            self._closed = True
+            idle, self._idle = self._idle, deque()
+        for connection, _ in idle:
+            self._close(connection)
+
+    def stats(self) -> dict:
+        acquired = self._stats["acquired"]
+        return {
+            **self._stats,
+            "idle": len(self._idle),
+            "in_use": self.max_size - self._slots._value,
+            "avg_wait_seconds": (
+                self._stats["total_wait_seconds"] / acquired if acquired else 0.0
+            ),
+        }
+
+
+# Dedicated bounded executor for blocking Snowflake I/O called from async code,
+# sized to the pool so that waiting threads do not pile up behind it
+snowflake_executor = ThreadPoolExecutor(
+    max_workers=config.snowflake_pool_kwargs["max_size"],
+    thread_name_prefix="snowflake",
+)
+
+
+async def run_in_snowflake_executor(func: Callable, *args: Any, **kwargs: Any) -> Any:
+    """Run a blocking Snowflake call without blocking the event loop."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        snowflake_executor, functools.partial(func, *args, **kwargs)
+    )
+
+
+# One pool per Snowflake identity, shared by memory, checkpoints and logging
+_pools: Dict[tuple, SnowflakeConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_snowflake_pool(connection_parameters: dict) -> SnowflakeConnectionPool:
+    """Return the shared connection pool of the given connection parameters."""
+    key = tuple(sorted(connection_parameters.items()))
+    with _pools_lock:
+        if key not in _pools:
+            _pools[key] = SnowflakeConnectionPool(
+                connection_parameters,
+                **config.snowflake_pool_kwargs,
+            )
+        return _pools[key]
+
+
+def bootstrap_snowflake_tables():
+    """Create the registered tables of every pool, e.g. at server startup."""
+    for pool in list(_pools.values()):
+        pool.bootstrap_tables()
+
+
+def close_snowflake_pools():
+    """Close the idle connections of every pool, e.g. at server shutdown."""
+    for pool in list(_pools.values()):
+        pool.close()
+
+
+def get_snowflake_pool_stats() -> Dict[str, dict]:
+    """Return the statistics of every pool, keyed by Snowflake user."""
+    return {
+        f"{pool.connection_parameters['user']}@"
+        f"{pool.connection_parameters['database']}."
+        f"{pool.connection_parameters['schema']}": pool.stats()
+        for pool in list(_pools.values())
+    }
@@ -0,0 +1,51 @@
+import logging
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator
+
+logger = logging.getLogger(__name__)
+
+# One connection per database file, shared by histories and checkpoints
+_connections: Dict[str, sqlite3.Connection] = {}
+_locks: Dict[str, threading.Lock] = {}
+_registry_lock = threading.Lock()
+
+
+@contextmanager
+def sqlite_connection(database_path: str) -> Iterator[sqlite3.Connection]:
+    """Borrow the shared connection of a SQLite database in WAL mode.
+
+    Statements run under a per-database lock and are committed when the block
+    exits, or rolled back if it raised an error.
+    """
+    with _registry_lock:
+        if database_path not in _connections:
+            connection = sqlite3.connect(
+                database_path,
+                check_same_thread=False,
+            )
+            connection.execute("PRAGMA journal_mode=WAL;")
+            connection.execute("PRAGMA synchronous=NORMAL;")
+            _connections[database_path] = connection
+            _locks[database_path] = threading.Lock()
+            logger.info(f"Opened SQLite memory database {database_path}")
+        connection = _connections[database_path]
+        lock = _locks[database_path]
+
+    with lock:
+        try:
+            yield connection
+            connection.commit()
+        except Exception:
+            connection.rollback()
+            raise
+
+
+def close_sqlite_connections():
+    """Close every shared SQLite connection, e.g. at server shutdown."""
+    with _registry_lock:
+        for connection in _connections.values():
+            connection.close()
+        _connections.clear()
+        _locks.clear()
@@ -0,0 +1,228 @@
+import asyncio
+import copy
+import hashlib
+import json
+import logging
+import threading
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+from langchain_core.chat_history import BaseChatMessageHistory
+from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage
+
+from ..chain.history_summarizer import history_summarizer
+from ..config import config
+
+logger = logging.getLogger(__name__)
+
+# Marks the summary message at the start of a summarized chat history
+SUMMARY_KEY = "conversation_summary"
+
+HistoryKey = Tuple[str, str, str]  # (table_name, user_id, session_id)
+
+# Sessions with a summary update running: whether another one was requested
+_summary_updates: Dict[HistoryKey, bool] = {}
+_background_tasks: Set[asyncio.Task] = set()
+
+
+def split_turns(messages: Sequence[BaseMessage]) -> List[List[BaseMessage]]:
+    """Group messages into turns, each starting with a user message."""
+    turns = []
+    for message in messages:
+        if isinstance(message, HumanMessage) or not turns:
+            turns.append([message])
+        else:
+            turns[-1].append(message)
+    return turns
+
+
+def _turn_key(turn: Sequence[BaseMessage]) -> str:
+    content = [(message.type, message.content) for message in turn]
+    return hashlib.sha1(
+        json.dumps(content, default=str, ensure_ascii=False).encode("utf-8")
+    ).hexdigest()
+
+
+def history_window(chat_history: Sequence[BaseMessage], role: str) -> List:
+    """Select the part of the chat history a chain role needs.
+
+    The summary of a summarized history is always kept, followed by the last
+    turns configured for the role in `history_summary_kwargs["windows"]`.
+    Without summaries, the chat history is left as it is.
+
+    Args:
+        chat_history: chat history of the graph state
+        role: chain role, e.g. "moderator", "grader" or "generator"
+
+    Returns:
+        The chat history of the role.
+    """
+    if not config.history_summary_kwargs["enabled"]:
+        return list(chat_history)
+    turns = config.history_summary_kwargs["windows"].get(role)
+    if turns is None:
+        return list(chat_history)
+    summary = [m for m in chat_history if m.additional_kwargs.get(SUMMARY_KEY)]
+    messages = [m for m in chat_history if not m.additional_kwargs.get(SUMMARY_KEY)]
+    recent = split_turns(messages)[-turns:] if turns > 0 else []
+    return summary + [message for turn in recent for message in turn]
+
+
+class SummaryChatMessageHistory(BaseChatMessageHistory):
+    """Chat history of the last turns and a running summary of older turns.
+
+    The messages are the summary, as a system message, followed by the last
+    `verbatim_turns` turns read from `history`, which must read one more turn
+    than that. After each turn, the turns dropped from the verbatim window are
+    folded into the summary by an LLM in the background, and the summary is
+    stored in `summary_history`, a history of the same backend. The last turn
+    folded into the summary is stored with it, so that no turn is folded twice.
+    If turns were dropped since that turn, e.g. after a failed update, the
+    history is read back to it, up to `max_catchup_turns` more turns.
+
+    Args:
+        history: chat history reading `verbatim_turns + 1` turns
+        summary_history: chat history storing the summaries
+        verbatim_turns: number of last turns kept verbatim
+        max_catchup_turns: maximum number of turns read back to the last
+            folded turn
+    """
+
+    def __init__(
+        self,
+        history: BaseChatMessageHistory,
+        summary_history: BaseChatMessageHistory,
+        verbatim_turns: int = 3,
+        max_catchup_turns: int = 20,
+    ):
+        self.history = history
+        self.summary_history = summary_history
+        self.verbatim_turns = verbatim_turns
+        self.max_catchup_turns = max_catchup_turns
+        self.key = (history.table_name, history.user_id, history.session_id)
+
+    def _compose(
+        self,
+        summaries: Sequence[BaseMessage],
+        messages: Sequence[BaseMessage],
+    ) -> List[BaseMessage]:
+        turns = split_turns(messages)[-self.verbatim_turns :]
+        composed = [message for turn in turns for message in turn]
+        if summaries:
+            composed.insert(
+                0,
+                SystemMessage(
+                    content="Summary of the earlier conversation: "
+                    f"{summaries[-1].content}",
+                    additional_kwargs={SUMMARY_KEY: True},
+                ),
+            )
+        return composed
+
+    @property
+    def messages(self) -> List[BaseMessage]:  # type: ignore
+        """Retrieve the summary and the last turns"""
+        return self._compose(self.summary_history.messages, self.history.messages)
+
+    async def aget_messages(self) -> List[BaseMessage]:
+        """Retrieve the summary and the last turns concurrently"""
+        summaries, messages = await asyncio.gather(
+            self.summary_history.aget_messages(),
+            self.history.aget_messages(),
+        )
+        return self._compose(summaries, messages)
+
+    def add_messages(self, messages: Sequence[BaseMessage]) -> None:
+        """Append the messages and update the summary in the background"""
+        self.history.add_messages(messages)
+        self._schedule_summary_update()
+
+    async def aadd_messages(self, messages: Sequence[BaseMessage]) -> None:
+        """Append the messages and update the summary in the background"""
+        await self.history.aadd_messages(messages)
+        self._schedule_summary_update()
+
+    def clear(self) -> None:
+        """Clear the messages and the summary"""
+        self.history.clear()
+        self.summary_history.clear()
+
+    async def aclear(self) -> None:
+        """Clear the messages and the summary without blocking the event loop"""
+        await asyncio.gather(self.history.aclear(), self.summary_history.aclear())
+
+    async def aupdate_summary(self) -> Optional[str]:
+        """Fold the turns dropped from the verbatim window into the summary.
+
+        Returns:
+            The updated summary, or None if there was nothing to fold.
+        """
+        turns = split_turns(await self.history.aget_messages())
+        dropped = turns[: -self.verbatim_turns]
+        if not dropped:
+            return None
+
+        summaries = await self.summary_history.aget_messages()
+        summary = summaries[-1] if summaries else None
+        keys = [_turn_key(turn) for turn in dropped]
+        last_turn = summary.additional_kwargs.get("last_turn") if summary else None
+        if last_turn not in keys and self.max_catchup_turns > 0:
+            # Turns were dropped since the last folded turn, read back to it
+            history = copy.copy(self.history)
+            history.max_len_history = (
+                self.history.max_len_history + self.max_catchup_turns
+            )
+            turns = split_turns(await history.aget_messages())
+            dropped = turns[: -self.verbatim_turns]
+            keys = [_turn_key(turn) for turn in dropped]
+        if last_turn in keys:
+            # Only fold the turns dropped since the last update
+            dropped = dropped[keys.index(last_turn) + 1 :]
+            if not dropped:
+                return None
+
+        updated = await history_summarizer.ainvoke(
+            {
+                "summary": summary.content if summary is not None else "",
+                "messages": [message for turn in dropped for message in turn],
+            }
+        )
+        await self.summary_history.aadd_messages(
+            [SystemMessage(content=updated, additional_kwargs={"last_turn": keys[-1]})]
+        )
+        logger.info(f"Summarized {len(dropped)} turns of session {self.key[2]}")
+        return updated
+
+    async def _arun_summary_updates(self):
+        try:
+            while True:
+                try:
+                    await self.aupdate_summary()
+                except Exception as e:
+                    logger.error(f"Unable to update the conversation summary: {e}")
+                if not _summary_updates[self.key]:
+                    break
+                _summary_updates[self.key] = False
+        finally:
+            del _summary_updates[self.key]
+
+    def _schedule_summary_update(self):
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # Called outside of an event loop, e.g. by a sync invoke of a chain
+            threading.Thread(
+                target=asyncio.run,
+                args=(self.aupdate_summary(),),
+                name="history-summary",
+                daemon=True,
+            ).start()
+            return
+
+        if self.key in _summary_updates:
+            # Run again once the running update of the session finishes
+            _summary_updates[self.key] = True
+            return
+        _summary_updates[self.key] = False
+        task = loop.create_task(self._arun_summary_updates())
+        _background_tasks.add(task)
+        task.add_done_callback(_background_tasks.discard)
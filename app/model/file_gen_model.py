@@ -1,4 +1,4 @@
-from typing import Dict
+from typing import Dict, Optional
 
 from pydantic import BaseModel, Field
 
@@ -18,6 +18,11 @@ class ImageGenerationInput(BaseModel):
 
 class SQLChartGenerationInput(BaseModel):
     sql_result: str = Field(description="A string with the SQL result data.")
+    sql_artifact: Optional[str] = Field(
+        None,
+        description="The ID of the stored SQL result, plotted instead of the "
+        "SQL result data while available.",
+    )
     chart_type: str = Field(
         description=("The desired chart type. Options: " "['bar', 'line', 'pie']"),
         examples=["bar", "line", "pie"],
@@ -99,3 +99,15 @@ class GradeAnswer(BaseModel):
     binary_score: str = Field(
         description="Answer addresses the question, 'yes' or 'no'"
     )
+
+
+# Data model
+class GradeGeneration(BaseModel):
+    """Binary scores for the grounding and usefulness of a generation answer."""
+
+    grounded_score: str = Field(
+        description="Answer is grounded in the facts, 'yes' or 'no'"
+    )
+    useful_score: str = Field(
+        description="Answer addresses the question, 'yes' or 'no'"
+    )
@@ -0,0 +1,5 @@
+from pydantic import BaseModel, Field
+
+
+class WebSearchQueryInput(BaseModel):
+    query: str = Field(description="The query to search the web for.")
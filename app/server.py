@@ -7,13 +7,28 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.openapi.docs import get_redoc_html, get_swagger_ui_html
 from fastapi.openapi.utils import get_openapi
 from fastapi.responses import JSONResponse, PlainTextResponse, RedirectResponse
+from starlette.concurrency import run_in_threadpool
 from starlette.exceptions import HTTPException as StarletteHTTPException
 from starlette.requests import Request
 
+from .api.api import agent_registry
 from .api.api import router as api_router
 from .config import config
+from .helpers.image_cache import image_cache
+from .helpers.request_log_shipper import request_log_shipper
 from .helpers.security import get_api_key
 from .helpers.utils import RequestLoggingMiddleware
+from .llm_model.llm_cache import get_llm_cache_stats
+from .memory.history_cache import history_cache
+from .memory.history_write_buffer import history_write_buffer
+from .memory.snowflake_pool import (
+    bootstrap_snowflake_tables,
+    close_snowflake_pools,
+    get_snowflake_pool_stats,
+)
+from .memory.sqlite_db import close_sqlite_connections
+from .vector_db.retrieval_cache import retrieval_cache
+from .vector_db.semantic_cache import semantic_answer_cache
 
 # Configure logging
 logging.basicConfig(
@@ -47,7 +62,7 @@ app = FastAPI(
     root_path=os.getenv("ROOT_PATH", ""),
 )
 
-# Add the middleware
+# Add the middleware, which also logs the response status of every request
 app.add_middleware(RequestLoggingMiddleware)
 
 # Add CORS middleware
@@ -74,19 +89,22 @@ async def startup_event():
     handler.setFormatter(logging.Formatter("%(asctime)s - %(levelname)s - %(message)s"))
     logger.addHandler(handler)
 
+    # Create the Snowflake tables used by memory, checkpoints and logging once
+    await run_in_threadpool(bootstrap_snowflake_tables)
+
+    if config.agent_registry_kwargs["warmup"]:
+        agent_registry.start_warmup()
+
 
 @app.on_event("shutdown")
 async def shutdown_event():
     logger.info("Shutting down the application...")
     # Additional shutdown logic here
-
-
-@app.middleware("http")
-async def log_requests(request: Request, call_next):
-    logger.info(f"Received request: {request.method} {request.url}")
-    response = await call_next(request)
-    logger.info(f"Response status: {response.status_code}")
-    return response
+    agent_registry.stop_warmup()
+    await run_in_threadpool(history_write_buffer.close)
+    await run_in_threadpool(request_log_shipper.close)
+    await run_in_threadpool(close_snowflake_pools)
+    await run_in_threadpool(close_sqlite_connections)
 
 
 @app.get("/", include_in_schema=False)
@@ -125,6 +143,50 @@ async def health_check():
     return {"status": "OK"}
 
 
+@app.get("/health/cache", tags=["API Health Probe"])
+async def cache_stats():
+    logger.info("Cache stats endpoint called.")
+    # Imported here to keep these clients out of the server startup
+    from .helpers.sql_result_store import sql_result_store
+    from .tools.web_search_tool import web_search_client
+    from .vector_db.context_packer import context_packer
+
+    return {
+        "llm_cache": get_llm_cache_stats(),
+        "semantic_answer_cache": {
+            "hits": semantic_answer_cache.hits,
+            "misses": semantic_answer_cache.misses,
+        },
+        "retrieval_cache": {
+            "hits": retrieval_cache.hits,
+            "misses": retrieval_cache.misses,
+        },
+        "history_cache": history_cache.stats(),
+        "image_cache": image_cache.stats(),
+        "context_packer": context_packer.stats(),
+        "web_search": web_search_client.stats(),
+        "sql_results": sql_result_store.stats(),
+    }
+
+
+@app.get("/health/snowflake", tags=["API Health Probe"])
+async def snowflake_pool_stats():
+    logger.info("Snowflake pool stats endpoint called.")
+    return get_snowflake_pool_stats()
+
+
+@app.get("/health/agents", tags=["API Health Probe"])
+async def agent_stats():
+    logger.info("Agent stats endpoint called.")
+    return agent_registry.stats()
+
+
+@app.get("/health/request-logs", tags=["API Health Probe"])
+async def request_log_stats():
+    logger.info("Request log stats endpoint called.")
+    return request_log_shipper.stats()
+
+
 @app.exception_handler(StarletteHTTPException)
 async def http_exception_handler(request, exc):
     return PlainTextResponse(str(exc.detail), status_code=exc.status_code)
@@ -145,3 +207,10 @@ app.include_router(
     dependencies=[Depends(get_api_key)],  # Apply the logging dependency to the router
 )
 logger.info(f"Included API router with prefix: {config.API_PREFIX_STR}")
+
+# Add the routes of the enabled agents, built on first use or by the warmup
+agent_registry.register(
+    app,
+    prefix=config.API_PREFIX_STR + api_router.prefix,
+    dependencies=[Depends(get_api_key)],
+)
@@ -16,7 +16,20 @@ connection_parameters = {
 }
 
 # Instantiate the SnowflakeSQLQueryTool
-tool_wrapper = SnowflakeSQLQueryWrapper(connection_parameters=connection_parameters)
+tool_wrapper = SnowflakeSQLQueryWrapper(
+    connection_parameters=connection_parameters,
+    request_timeout=config.cortex_analyst_kwargs["request_timeout"],
+    max_connections=config.cortex_analyst_kwargs["max_connections"],
+    oauth_session_ttl=config.cortex_analyst_kwargs["oauth_session_ttl"],
+    max_oauth_sessions=config.cortex_analyst_kwargs["max_oauth_sessions"],
+    oauth_pool_size=config.cortex_analyst_kwargs["oauth_pool_size"],
+    result_cache_ttl=config.sql_result_cache_kwargs["analytics"]["ttl"],
+    result_cache_max_entries=config.sql_result_cache_kwargs["analytics"]["max_entries"],
+    result_cache_max_bytes=config.sql_result_cache_kwargs["analytics"]["max_bytes"],
+    fetch_max_rows=config.sql_result_kwargs["max_rows"],
+    fetch_max_bytes=config.sql_result_kwargs["max_bytes"],
+    head_rows=config.sql_result_kwargs["head_rows"],
+)
 
 # Instantiate the SnowflakeSQLQueryTool
 tool = SnowflakeSQLQueryTool(tool_wrapper=tool_wrapper)
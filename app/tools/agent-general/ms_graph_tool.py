@@ -1,10 +1,15 @@
+from ...config import config
 from ..tool_wrapper.user_profile_ms_graph_tool_wrapper import (
     UserProfileMSGraphToolWrapper,
 )
 from ..user_profile_ms_graph_tool import UserProfileMSGraphTool
 
 # Instantiate the UserProfileMSGraphTool
-tool_wrapper = UserProfileMSGraphToolWrapper()
+tool_wrapper = UserProfileMSGraphToolWrapper(
+    timeout=config.ms_graph_kwargs["request_timeout"],
+    cache_ttl=config.ms_graph_kwargs["cache_ttl"],
+    max_cache_entries=config.ms_graph_kwargs["max_cache_entries"],
+)
 
 tool = UserProfileMSGraphTool(
     tool_wrapper=tool_wrapper,
@@ -1,15 +1,16 @@
-from typing import Any, Dict
-
-from docx import Document
+from typing import TYPE_CHECKING, Any, Dict
 
 from ...vector_db.agent_general import kbm
 from ..document_gen_tool import DocumentGeneratorTool
 from ..tool_wrapper.document_gen_tool_wrapper import DocumentGeneratorToolWrapper
 
+if TYPE_CHECKING:
+    from docx.document import Document
+
 
 # SoW template function
 def consultancy_services_sow_document_template(
-    document: Document,
+    document: "Document",
     document_input: Dict[str, Any],
 ) -> None:
     """
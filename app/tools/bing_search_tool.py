@@ -0,0 +1,89 @@
+import logging
+from typing import Dict, List, Optional, Type
+
+from langchain_core.callbacks import (
+    AsyncCallbackManagerForToolRun,
+    CallbackManagerForToolRun,
+)
+from langchain_core.tools import BaseTool
+from pydantic import BaseModel
+
+from ..model.web_search_model import WebSearchQueryInput
+from .tool_wrapper.bing_search_tool_wrapper import BingSearchToolWrapper
+
+logger = logging.getLogger(__name__)
+
+
+class BingSearchTool(BaseTool):
+    """
+    Tool for searching the web with the Bing Web Search API.
+
+    The tool returns the results as dictionaries with a `title`, `link` and
+    `snippet`, or no results if the search failed or the search quota is
+    exceeded. The tool supports both synchronous and asynchronous execution
+    of the API call.
+
+    Attributes:
+        name: The name of the tool.
+        description: A brief description of the tool's functionality.
+        args_schema: The schema for the input arguments.
+        return_direct: Whether the tool should return the result directly.
+    """
+
+    name: str = "BingSearchTool"
+    description: str = (
+        "useful for when you need to answer questions about current events "
+        "or search the web"
+    )
+    args_schema: Type[BaseModel] = WebSearchQueryInput
+    return_direct: bool = True
+    tool_wrapper: Type[BingSearchToolWrapper] = None
+
+    def __init__(
+        self,
+        tool_wrapper: Type[BingSearchToolWrapper],
+    ):
+        super().__init__()
+        self.tool_wrapper = tool_wrapper
+
+    def _run(
+        self,
+        query: str,
+        run_manager: Optional[CallbackManagerForToolRun] = None,
+    ) -> List[Dict[str, str]]:
+        """
+        Synchronously searches the web.
+
+        Args:
+            query: The search query.
+            run_manager: Optional callback manager for handling tool run callbacks.
+
+        Returns:
+            The search results.
+        """
+        try:
+            return self.tool_wrapper.search(query)
+        except Exception as e:
+            logger.error(f"Unable to search the web due to: {e}")
+            return []
+
+    async def _arun(
+        self,
+        query: str,
+        run_manager: Optional[AsyncCallbackManagerForToolRun] = None,
+    ) -> List[Dict[str, str]]:
+        """
+        Asynchronously searches the web.
+
+        Args:
+            query: The search query.
+            run_manager: Optional callback manager for handling tool run callbacks.
+
+        Returns:
+            The search results.
+        """
+        try:
+            return await self.tool_wrapper.asearch(query)
+        except Exception as e:
+            logger.error(f"Unable to search the web due to: {e}")
+            return []
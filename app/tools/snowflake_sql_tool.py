@@ -101,9 +101,19 @@ class SnowflakeSQLQueryTool(BaseTool):
         Returns:
             A dictionary containing the response from the Snowflake database.
         """
-        return self._run(
-            messages=messages,
-            user=user,
-            oauth_token=oauth_token,
-            run_manager=run_manager.get_sync(),
-        )
+        try:
+            response = await self.tool_wrapper.arun(
+                messages=messages,
+                user=user,
+                oauth_token=oauth_token,
+            )
+            return response
+        except ToolException as e:
+            logger.error(f"Unable to generate document due to: {e}")
+            return {"status": "failure", "message": "Generating document failed."}
+        except Exception as e:
+            logger.error(f"Unable to generate document due to: {e}")
+            return {
+                "status": "failure",
+                "message": "Generating document failed.",
+            }
@@ -1,5 +1,5 @@
 import logging
-from typing import Any, Dict, Optional, Type
+from typing import Any, Dict, Optional, Tuple, Type
 
 from langchain_core.callbacks import (
     AsyncCallbackManagerForToolRun,
@@ -52,7 +52,8 @@ class SQLChartGeneratorTool(BaseTool):
         chart_type: str,
         user_id: str,
         session_id: str,
-    ) -> Optional[str]:
+        sql_artifact: Optional[str] = None,
+    ) -> Tuple[str, bool]:
         """
         Synchronously generates a chart.
 
@@ -61,15 +62,18 @@ class SQLChartGeneratorTool(BaseTool):
             chart_type: The type of chart to generate ('bar', 'line', or 'pie').
             user_id: The ID of the user requesting the chart.
             session_id: The session ID for the current operation.
+            sql_artifact: Optional ID of the stored SQL result to plot instead.
             run_manager: Optional callback manager for handling tool run callbacks.
 
         Returns:
-            A dictionary containing the URL pointing to the generated chart.
+            The URL pointing to the generated chart, and whether the chart only
+            plots the first rows of an expired SQL result.
         """
         try:
-            chart_base64 = self.tool_wrapper.run(
+            chart_base64, head_only = self.tool_wrapper.run(
                 sql_result=sql_result,
                 chart_type=chart_type,
+                sql_artifact=sql_artifact,
             )
 
             chart_blob_url = self.kbm.upload_user_image_blob(
@@ -79,7 +83,7 @@ class SQLChartGeneratorTool(BaseTool):
             )
 
             logger.info("Chart generated successfully.")
-            return chart_blob_url
+            return chart_blob_url, head_only
         except Exception as e:
             logger.error(f"Unable to generate chart due to: {e}")
             raise ToolException(e)
@@ -90,6 +94,7 @@ class SQLChartGeneratorTool(BaseTool):
         chart_type: str,
         user_id: str,
         session_id: str,
+        sql_artifact: Optional[str] = None,
         run_manager: Optional[CallbackManagerForToolRun] = None,
     ) -> Dict[str, Any]:
         """
@@ -100,21 +105,24 @@ class SQLChartGeneratorTool(BaseTool):
             chart_type: The type of chart to generate ('bar', 'line', or 'pie').
             user_id: The ID of the user requesting the chart.
             session_id: The session ID for the current operation.
+            sql_artifact: Optional ID of the stored SQL result to plot instead.
             run_manager: Optional callback manager for handling tool run callbacks.
 
         Returns:
             A dictionary containing the URL pointing to the generated chart.
         """
         try:
-            chart_blob_url = self.generate_chart(
+            chart_blob_url, head_only = self.generate_chart(
                 sql_result=sql_result,
                 chart_type=chart_type,
                 user_id=user_id,
                 session_id=session_id,
+                sql_artifact=sql_artifact,
             )
             return {
                 "status": "success",
                 "chart_blob_url": chart_blob_url,
+                "head_only": head_only,
             }
         except ToolException as e:
             logger.error(f"Unable to generate chart due to: {e}")
@@ -135,6 +143,7 @@ class SQLChartGeneratorTool(BaseTool):
         chart_type: str,
         user_id: str,
         session_id: str,
+        sql_artifact: Optional[str] = None,
         run_manager: Optional[AsyncCallbackManagerForToolRun] = None,
     ) -> Dict[str, Any]:
         """
@@ -145,6 +154,7 @@ class SQLChartGeneratorTool(BaseTool):
             chart_type: The type of chart to generate ('bar', 'line', or 'pie').
             user_id: The ID of the user requesting the chart.
             session_id: The session ID for the current operation.
+            sql_artifact: Optional ID of the stored SQL result to plot instead.
             run_manager: Optional callback manager for handling tool run callbacks.
 
         Returns:
@@ -155,5 +165,6 @@ class SQLChartGeneratorTool(BaseTool):
             chart_type=chart_type,
             user_id=user_id,
             session_id=session_id,
+            sql_artifact=sql_artifact,
             run_manager=run_manager.get_sync() if run_manager else None,
         )
@@ -0,0 +1,221 @@
+import asyncio
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+import httpx
+from pydantic import BaseModel, PrivateAttr, SecretStr
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BING_SEARCH_URL = "https://api.bing.microsoft.com/v7.0/search"
+
+
+class BingSearchToolWrapper(BaseModel):
+    """
+    Wrapper for searching the web with the Bing Web Search API.
+
+    Results are parsed from the JSON response into dictionaries with a
+    `title`, `link` and `snippet`. Requests go through pooled HTTP clients
+    and results are cached by normalized query. Concurrent async searches of
+    the same query share a single request. Once the quota of the subscription
+    is exceeded, searches are skipped until `quota_cooldown` seconds have
+    passed instead of failing one request at a time.
+
+    Usage instructions:
+    1. Ensure you have the `httpx` library installed.
+    2. Use the `search` or `asearch` method to search the web.
+    """
+
+    subscription_key: Optional[SecretStr] = None
+    search_url: str = DEFAULT_BING_SEARCH_URL
+    count: int = 10
+    """Number of results to return."""
+    search_params: Dict = {
+        "offset": 0,  # Offset for pagination
+        # 'freshness': 'Month'  # Freshness of the results
+        "textDecorations": True,  # Enable text decorations
+        "textFormat": "HTML",  # Format of the text in the search results
+    }
+    timeout: float = 10.0
+    """Timeout of a search request, in seconds."""
+    max_connections: int = 20
+    """Maximum number of pooled connections per client."""
+    cache_ttl: int = 3600
+    """Time to live of cached results, in seconds."""
+    max_cache_entries: int = 1024
+    """Maximum number of cached queries."""
+    quota_cooldown: int = 3600
+    """Seconds searches are skipped after the quota is exceeded."""
+
+    _client: Optional[httpx.Client] = PrivateAttr(default=None)
+    _aclient: Optional[httpx.AsyncClient] = PrivateAttr(default=None)
+    _cache: OrderedDict = PrivateAttr(default_factory=OrderedDict)
+    _inflight: dict = PrivateAttr(default_factory=dict)
+    _lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
+    _skipped_until: float = PrivateAttr(default=0.0)
+    _stats: dict = PrivateAttr(
+        default_factory=lambda: {"requests": 0, "cache_hits": 0, "skipped": 0}
+    )
+
+    def _limits(self) -> httpx.Limits:
+        return httpx.Limits(
+            max_connections=self.max_connections,
+            max_keepalive_connections=self.max_connections,
+        )
+
+    @property
+    def client(self) -> httpx.Client:
+        if self._client is None:
+            self._client = httpx.Client(timeout=self.timeout, limits=self._limits())
+        return self._client
+
+    @property
+    def aclient(self) -> httpx.AsyncClient:
+        if self._aclient is None:
+            self._aclient = httpx.AsyncClient(
+                timeout=self.timeout, limits=self._limits()
+            )
+        return self._aclient
+
+    @property
+    def available(self) -> bool:
+        """Whether searches are sent, i.e. the quota is not exceeded."""
+        return time.monotonic() >= self._skipped_until
+
+    @staticmethod
+    def _cache_key(query: str) -> str:
+        return " ".join(query.lower().split())
+
+    def _get_cached(self, key: str) -> Optional[List[dict]]:
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is None or entry["expires_at"] <= time.monotonic():
+                self._cache.pop(key, None)
+                return None
+            self._cache.move_to_end(key)
+            self._stats["cache_hits"] += 1
+            return entry["results"]
+
+    def _set_cached(self, key: str, results: List[dict]):
+        with self._lock:
+            self._cache[key] = {
+                "results": results,
+                "expires_at": time.monotonic() + self.cache_ttl,
+            }
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.max_cache_entries:
+                self._cache.popitem(last=False)
+
+    def _skip(self) -> bool:
+        if self.available:
+            return False
+        with self._lock:
+            self._stats["skipped"] += 1
+        logger.warning("Web search skipped, the search quota is exceeded")
+        return True
+
+    def _request_kwargs(self, query: str) -> dict:
+        key = self.subscription_key.get_secret_value() if self.subscription_key else ""
+        return {
+            "headers": {"Ocp-Apim-Subscription-Key": key},
+            "params": {"q": query, "count": self.count, **self.search_params},
+        }
+
+    def _parse_response(self, response: httpx.Response) -> List[dict]:
+        with self._lock:
+            self._stats["requests"] += 1
+        if response.status_code in (403, 429):
+            # 403 when the quota is exceeded, 429 when the rate is exceeded
+            retry_after = response.headers.get("Retry-After", "")
+            if retry_after.isdigit():
+                cooldown = float(retry_after)
+            elif response.status_code == 403:
+                cooldown = float(self.quota_cooldown)
+            else:
+                cooldown = 1.0
+            self._skipped_until = time.monotonic() + cooldown
+            logger.error(
+                f"Web search quota exceeded ({response.status_code}), "
+                f"skipping web search for {cooldown:.0f}s"
+            )
+            return []
+        response.raise_for_status()
+
+        pages = response.json().get("webPages", {}).get("value", [])
+        return [
+            {"title": page["name"], "link": page["url"], "snippet": page["snippet"]}
+            for page in pages
+            if page.get("name") and page.get("url") and page.get("snippet")
+        ]
+
+    def search(self, query: str) -> List[dict]:
+        """
+        Searches the web.
+
+        Args:
+            query: The search query.
+
+        Returns:
+            The results, as dictionaries with a title, link and snippet. No
+            results are returned while the quota is exceeded.
+        """
+        key = self._cache_key(query)
+        results = self._get_cached(key)
+        if results is None:
+            if self._skip():
+                return []
+            response = self.client.get(self.search_url, **self._request_kwargs(query))
+            results = self._parse_response(response)
+            if results:
+                self._set_cached(key, results)
+        return results
+
+    async def asearch(self, query: str) -> List[dict]:
+        """
+        Asynchronously searches the web.
+
+        Args:
+            query: The search query.
+
+        Returns:
+            The results, as dictionaries with a title, link and snippet. No
+            results are returned while the quota is exceeded.
+        """
+        key = self._cache_key(query)
+        results = self._get_cached(key)
+        if results is not None:
+            return results
+        if self._skip():
+            return []
+
+        inflight = self._inflight.get(key)
+        if inflight is None:
+            # Shared by concurrent searches of the query
+            inflight = asyncio.ensure_future(self._afetch_results(key, query))
+            self._inflight[key] = inflight
+            inflight.add_done_callback(lambda task: self._fetch_done(key, task))
+        return await asyncio.shield(inflight)
+
+    def _fetch_done(self, key: str, task: asyncio.Task):
+        self._inflight.pop(key, None)
+        if not task.cancelled() and task.exception() is not None:
+            logger.error(f"Unable to search the web: {task.exception()}")
+
+    async def _afetch_results(self, key: str, query: str) -> List[dict]:
+        response = await self.aclient.get(
+            self.search_url, **self._request_kwargs(query)
+        )
+        results = self._parse_response(response)
+        if results:
+            self._set_cached(key, results)
+        return results
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["cached_queries"] = len(self._cache)
+        stats["available"] = self.available
+        return stats
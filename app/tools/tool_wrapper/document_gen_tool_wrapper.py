@@ -3,7 +3,6 @@ import io
 import logging
 from typing import TYPE_CHECKING, Any, Callable, Dict, Optional
 
-from docx import Document
 from pydantic import BaseModel, model_validator
 from typing_extensions import Self
 
@@ -55,6 +54,8 @@ class DocumentGeneratorToolWrapper(BaseModel):
         :param document_input: A dictionary containing the document content.
         :return: The base64 encoded string of the generated document.
         """
+        from docx import Document
+
         # Create a Document object
         document = Document()
 
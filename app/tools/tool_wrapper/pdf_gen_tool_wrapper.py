@@ -3,7 +3,6 @@ import io
 import logging
 
 from pydantic import BaseModel
-from weasyprint import HTML
 
 logger = logging.getLogger(__name__)
 
@@ -32,6 +31,9 @@ class PDFGeneratorToolWrapper(BaseModel):
         :param html_input: A string containing the HTML content.
         :return: The base64 encoded string of the generated PDF.
         """
+        # weasyprint loads Pango and its fonts on import, only do so when needed
+        from weasyprint import HTML
+
         # Convert the HTML string to a PDF
         pdf = HTML(string=html_input).write_pdf()
 
@@ -1,17 +1,31 @@
+import hashlib
 import json
 import logging
+import re
+import threading
 import time
+from collections import OrderedDict
 from datetime import date
 from decimal import Decimal
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
-import requests
+import httpx
 from langchain_core.messages import message_to_dict
-from pydantic import BaseModel, SecretStr
-from snowflake.connector import connect
+from pydantic import BaseModel, PrivateAttr, SecretStr
+from snowflake.connector.errors import NotSupportedError
+
+from ...helpers.sql_result_store import SQLResult, sql_result_store
+from ...memory.snowflake_pool import (
+    SnowflakeConnectionPool,
+    get_snowflake_pool,
+    run_in_snowflake_executor,
+)
 
 logger = logging.getLogger(__name__)
 
+# Error code of an expired Snowflake session token
+SESSION_EXPIRED_CODE = "390112"
+
 
 class CustomJSONEncoder(json.JSONEncoder):
     """
@@ -26,63 +40,183 @@ class CustomJSONEncoder(json.JSONEncoder):
         return super().default(obj)
 
 
+# String literals and quoted identifiers, kept as they are when normalizing SQL
+SQL_QUOTED = re.compile(r"('(?:[^'\\]|\\.|'')*'|\"(?:[^\"]|\"\")*\")")
+
+
+def normalize_sql(sql_query: str) -> str:
+    """
+    Normalizes an SQL statement for caching.
+
+    Whitespace is collapsed, unquoted text is lowercased, since unquoted
+    identifiers and keywords are case-insensitive in Snowflake, and trailing
+    semicolons are removed.
+    """
+    parts = SQL_QUOTED.split(sql_query.strip().rstrip(";").strip())
+    return "".join(
+        part if i % 2 else re.sub(r"\s+", " ", part.lower())
+        for i, part in enumerate(parts)
+    )
+
+
 class SnowflakeSQLQueryWrapper(BaseModel):
     """
     Wrapper for executing SQL queries on Snowflake.
 
     This class provides methods to connect to Snowflake, send messages,
-    and process SQL queries.
+    and process SQL queries. Connections are pooled per Snowflake identity:
+    the service account uses the shared pool of its connection parameters,
+    and each OAuth user a pool keyed by the SHA-256 hash of their token that
+    expires with it. The REST token of a pooled session authenticates the
+    Cortex Analyst requests, which go through pooled HTTP clients.
+
+    Results are fetched in Arrow batches up to `fetch_max_rows` rows and
+    `fetch_max_bytes` bytes, and kept in the SQL result store for the charts.
+    The LLM is given their schema, first `head_rows` rows and, for larger
+    results, per-column aggregates.
+
+    Results of SELECT statements are cached for `result_cache_ttl` seconds,
+    keyed by normalized statement, role, warehouse, database and schema, and
+    by identity, so that the results of an OAuth user are never served to
+    another one.
     """
 
     connection_parameters: Dict[str, Any]
     snowflake_connect_timeout: int = 30
     snowflake_connect_retries: int = 2
+    request_timeout: float = 60.0
+    """Timeout of a Cortex Analyst request, in seconds."""
+    max_connections: int = 20
+    """Maximum number of pooled HTTP connections per client."""
+    oauth_session_ttl: int = 3000
+    """Seconds the sessions of an OAuth token are reused."""
+    max_oauth_sessions: int = 256
+    """Maximum number of OAuth users with pooled sessions."""
+    oauth_pool_size: int = 2
+    """Maximum number of open connections per OAuth user."""
+    result_cache_ttl: int = 0
+    """Time to live of cached SQL results, in seconds, 0 to disable the cache."""
+    result_cache_max_entries: int = 256
+    """Maximum number of cached SQL results."""
+    result_cache_max_bytes: int = 64 * 1024 * 1024
+    """Maximum total size of the cached SQL results."""
+    fetch_max_rows: int = 100000
+    """Maximum number of rows fetched per SQL query."""
+    fetch_max_bytes: int = 64 * 1024 * 1024
+    """Maximum size of the Arrow batches fetched per SQL query."""
+    head_rows: int = 50
+    """Number of rows of a SQL result given verbatim to the LLM."""
+
+    _client: Optional[httpx.Client] = PrivateAttr(default=None)
+    _aclient: Optional[httpx.AsyncClient] = PrivateAttr(default=None)
+    _oauth_pools: OrderedDict = PrivateAttr(default_factory=OrderedDict)
+    _lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
+    _result_cache: OrderedDict = PrivateAttr(default_factory=OrderedDict)
+    _result_cache_bytes: int = PrivateAttr(default=0)
+
+    def _limits(self) -> httpx.Limits:
+        return httpx.Limits(
+            max_connections=self.max_connections,
+            max_keepalive_connections=self.max_connections,
+        )
+
+    @property
+    def client(self) -> httpx.Client:
+        if self._client is None:
+            self._client = httpx.Client(
+                timeout=self.request_timeout, limits=self._limits()
+            )
+        return self._client
+
+    @property
+    def aclient(self) -> httpx.AsyncClient:
+        if self._aclient is None:
+            self._aclient = httpx.AsyncClient(
+                timeout=self.request_timeout, limits=self._limits()
+            )
+        return self._aclient
 
-    def get_snowflake_connect(
+    def get_snowflake_pool(
         self,
         user: Optional[str] = None,
         oauth_token: Optional[SecretStr] = None,
-    ):
+    ) -> SnowflakeConnectionPool:
         """
-        Establishes a connection to Snowflake.
+        Returns the connection pool of a Snowflake identity.
 
         Args:
             user: Optional user for the Snowflake connection.
             oauth_token: Optional OAuth access token for the Snowflake connection.
 
         Returns:
-            A Snowflake connection object.
+            The connection pool of the user, or of the service account.
 
         Raises:
             ValueError: If only one of 'user' or 'oauth_token' is provided.
         """
-        if (user and not oauth_token) or (not user and oauth_token):
-            raise ValueError("Please provide both 'user' and 'oauth_token'.")
-
-        if user and oauth_token:
-            snowflake_connect = connect(
+        connection_parameters = {
+            name: value
+            for name, value in self.get_connection_parameters(
                 user=user,
-                authenticator="oauth",
-                token=oauth_token.get_secret_value(),
-                account=self.connection_parameters["account"],
-                host=self.connection_parameters["host"],
-                port=443,
-                warehouse=self.connection_parameters["warehouse"],
-                role=self.connection_parameters["role"],
-                timeout=self.snowflake_connect_timeout,
-            )
-        else:
-            snowflake_connect = connect(
-                user=self.connection_parameters["user"],
-                password=self.connection_parameters["password"],
-                account=self.connection_parameters["account"],
-                host=self.connection_parameters["host"],
-                port=443,
-                warehouse=self.connection_parameters["warehouse"],
-                role=self.connection_parameters["role"],
-                timeout=self.snowflake_connect_timeout,
+                oauth_token=oauth_token,
+            ).items()
+            if name not in ("stage", "semantic_model_file")
+        }
+        if not oauth_token:
+            return get_snowflake_pool(connection_parameters)
+
+        key = hashlib.sha256(oauth_token.get_secret_value().encode()).hexdigest()
+        expired = []
+        with self._lock:
+            entry = self._oauth_pools.get(key)
+            if entry is not None and entry["expires_at"] > time.monotonic():
+                self._oauth_pools.move_to_end(key)
+                return entry["pool"]
+            if entry is not None:
+                expired.append(self._oauth_pools.pop(key)["pool"])
+
+            pool = SnowflakeConnectionPool(
+                connection_parameters,
+                max_size=self.oauth_pool_size,
+                connect_timeout=self.snowflake_connect_timeout,
             )
-        return snowflake_connect
+            self._oauth_pools[key] = {
+                "pool": pool,
+                "expires_at": time.monotonic() + self.oauth_session_ttl,
+            }
+            while len(self._oauth_pools) > self.max_oauth_sessions:
+                _, evicted = self._oauth_pools.popitem(last=False)
+                expired.append(evicted["pool"])
+
+        for expired_pool in expired:
+            expired_pool.close()
+        return pool
+
+    def get_rest_token(
+        self,
+        user: Optional[str] = None,
+        oauth_token: Optional[SecretStr] = None,
+        renew: bool = False,
+    ) -> str:
+        """
+        Returns the REST token of a pooled Snowflake session of the identity.
+
+        The session is kept alive by the pool, but the connector only renews
+        its token when one of its own requests fails, so a token rejected by
+        Cortex Analyst is renewed with `renew`.
+
+        Args:
+            user: Optional user for the Snowflake connection.
+            oauth_token: Optional OAuth access token for the Snowflake connection.
+            renew: Whether to renew an expired session token first.
+        """
+        pool = self.get_snowflake_pool(user=user, oauth_token=oauth_token)
+        with pool.connection() as connection:
+            if renew:
+                # The connector renews the expired token of the failed request
+                with connection.cursor() as cursor:
+                    cursor.execute("SELECT 1;")
+            return connection.rest.token
 
     def get_connection_parameters(
         self,
@@ -125,32 +259,7 @@ class SnowflakeSQLQueryWrapper(BaseModel):
             connection_parameters = self.connection_parameters
         return connection_parameters
 
-    def send_message(
-        self,
-        messages: List[str],
-        user: Optional[str] = None,
-        oauth_token: Optional[SecretStr] = None,
-    ) -> Dict[str, Any]:
-        """
-        Executes the SQL query derived from the natural language input
-        and returns the response.
-
-        Args:
-            messages: The natural language query to be translated and executed.
-            user: Optional user for the Snowflake connection.
-            oauth_token: Optional OAuth access token for the Snowflake connection.
-
-        Returns:
-            A dictionary containing the response from the Snowflake database.
-
-        Raises:
-            Exception: If the request to Snowflake fails.
-        """
-        snowflake_connect = self.get_snowflake_connect(
-            user=user,
-            oauth_token=oauth_token,
-        )
-
+    def _request_body(self, messages: List[str]) -> Dict[str, Any]:
         messages = [message_to_dict(m) for m in messages]
         messages = [
             {**m, "data": {**m["data"], "content": json.loads(m["data"]["content"])}}
@@ -174,7 +283,7 @@ class SnowflakeSQLQueryWrapper(BaseModel):
             for m in messages
         ]
 
-        request_body = {
+        return {
             "messages": messages,
             "semantic_model_file": (
                 f"@{self.connection_parameters['database']}."
@@ -183,19 +292,34 @@ class SnowflakeSQLQueryWrapper(BaseModel):
                 f"{self.connection_parameters['semantic_model_file']}"
             ),
         }
-        resp = requests.post(
-            url=(
+
+    def _request_kwargs(self, messages: List[str], rest_token: str) -> Dict[str, Any]:
+        return {
+            "url": (
                 f"https://{self.connection_parameters['host']}/"
                 "api/v2/cortex/analyst/message"
             ),
-            json=request_body,
-            headers={
-                "Authorization": (
-                    "Snowflake Token=" f'"{snowflake_connect.rest.token}"'
-                ),
+            "json": self._request_body(messages),
+            "headers": {
+                "Authorization": f'Snowflake Token="{rest_token}"',
                 "Content-Type": "application/json",
             },
-        )
+        }
+
+    @staticmethod
+    def _session_expired(resp: httpx.Response) -> bool:
+        """Whether Cortex Analyst rejected the session token as expired."""
+        if resp.status_code == 401:
+            return True
+        if resp.status_code < 400:
+            return False
+        try:
+            return str(resp.json().get("code")) == SESSION_EXPIRED_CODE
+        except ValueError:
+            return False
+
+    @staticmethod
+    def _parse_response(resp: httpx.Response) -> Dict[str, Any]:
         request_id = resp.headers.get("X-Snowflake-Request-Id")
         if resp.status_code < 400:
             return {
@@ -208,51 +332,247 @@ class SnowflakeSQLQueryWrapper(BaseModel):
                 f"{resp.status_code}: {resp.text}"
             )
 
-    def process_sql_query(
+    def send_message(
         self,
-        sql_query: str,
-        request_id: str,
+        messages: List[str],
         user: Optional[str] = None,
         oauth_token: Optional[SecretStr] = None,
     ) -> Dict[str, Any]:
         """
-        Executes the SQL query on Snowflake and retrieves the result.
+        Executes the SQL query derived from the natural language input
+        and returns the response.
 
         Args:
-            sql_query: The SQL query to be executed.
-            request_id: The request ID for tracking the query.
+            messages: The natural language query to be translated and executed.
             user: Optional user for the Snowflake connection.
             oauth_token: Optional OAuth access token for the Snowflake connection.
 
         Returns:
-            A dictionary containing the results of the SQL query.
+            A dictionary containing the response from the Snowflake database.
 
         Raises:
-            Exception: If the SQL query execution fails.
+            Exception: If the request to Snowflake fails.
+        """
+        rest_token = self.get_rest_token(user=user, oauth_token=oauth_token)
+        resp = self.client.post(**self._request_kwargs(messages, rest_token))
+        if self._session_expired(resp):
+            logger.warning("Cortex Analyst session token expired, renewing it")
+            rest_token = self.get_rest_token(
+                user=user, oauth_token=oauth_token, renew=True
+            )
+            resp = self.client.post(**self._request_kwargs(messages, rest_token))
+        return self._parse_response(resp)
+
+    async def asend_message(
+        self,
+        messages: List[str],
+        user: Optional[str] = None,
+        oauth_token: Optional[SecretStr] = None,
+    ) -> Dict[str, Any]:
+        """
+        Asynchronously executes the SQL query derived from the natural language
+        input and returns the response.
+
+        Args:
+            messages: The natural language query to be translated and executed.
+            user: Optional user for the Snowflake connection.
+            oauth_token: Optional OAuth access token for the Snowflake connection.
+
+        Returns:
+            A dictionary containing the response from the Snowflake database.
+
+        Raises:
+            Exception: If the request to Snowflake fails.
         """
+        # Borrowing a pooled session may block on a health check or a login
+        rest_token = await run_in_snowflake_executor(
+            self.get_rest_token, user=user, oauth_token=oauth_token
+        )
+        resp = await self.aclient.post(**self._request_kwargs(messages, rest_token))
+        if self._session_expired(resp):
+            logger.warning("Cortex Analyst session token expired, renewing it")
+            rest_token = await run_in_snowflake_executor(
+                self.get_rest_token, user=user, oauth_token=oauth_token, renew=True
+            )
+            resp = await self.aclient.post(**self._request_kwargs(messages, rest_token))
+        return self._parse_response(resp)
+
+    @staticmethod
+    def _identity(oauth_token: Optional[SecretStr] = None) -> str:
+        if not oauth_token:
+            return "service"
+        return hashlib.sha256(oauth_token.get_secret_value().encode()).hexdigest()
+
+    def _result_cache_key(
+        self,
+        sql_query: str,
+        user: Optional[str] = None,
+        oauth_token: Optional[SecretStr] = None,
+    ) -> Optional[Tuple[str, ...]]:
+        statement = normalize_sql(sql_query)
+        if self.result_cache_ttl <= 0 or not statement.startswith(("select", "with")):
+            return None
         connection_parameters = self.get_connection_parameters(
             user=user,
             oauth_token=oauth_token,
         )
+        return (
+            self._identity(oauth_token),
+            connection_parameters["role"],
+            connection_parameters["warehouse"],
+            connection_parameters["database"],
+            connection_parameters["schema"],
+            statement,
+        )
+
+    def _get_cached_result(self, key: Tuple[str, ...]) -> Optional[SQLResult]:
+        with self._lock:
+            entry = self._result_cache.get(key)
+            if entry is None or entry["expires_at"] <= time.monotonic():
+                self._pop_cached_result(key)
+                return None
+            self._result_cache.move_to_end(key)
+            return entry["result"]
+
+    def _pop_cached_result(self, key: Tuple[str, ...]):
+        entry = self._result_cache.pop(key, None)
+        if entry is not None:
+            self._result_cache_bytes -= entry["result"].nbytes
+
+    def _set_cached_result(self, key: Tuple[str, ...], result: SQLResult):
+        if result.nbytes > self.result_cache_max_bytes:
+            return
+        with self._lock:
+            self._pop_cached_result(key)
+            self._result_cache[key] = {
+                "result": result,
+                "expires_at": time.monotonic() + self.result_cache_ttl,
+            }
+            self._result_cache_bytes += result.nbytes
+            while (
+                len(self._result_cache) > self.result_cache_max_entries
+                or self._result_cache_bytes > self.result_cache_max_bytes
+            ):
+                self._pop_cached_result(next(iter(self._result_cache)))
+
+    def _fetch_result(self, cursor) -> SQLResult:
+        """Fetch the result of an executed query in Arrow batches, up to the caps."""
+        import pyarrow as pa
+
+        tables, num_rows, num_bytes, truncated = [], 0, 0, False
+        try:
+            for batch in cursor.fetch_arrow_batches():
+                if not batch.num_rows:
+                    continue
+                fit = min(batch.num_rows, self.fetch_max_rows - num_rows)
+                if num_bytes + batch.nbytes > self.fetch_max_bytes:
+                    row_bytes = batch.nbytes / batch.num_rows
+                    fit = min(fit, int((self.fetch_max_bytes - num_bytes) / row_bytes))
+                if fit < batch.num_rows:
+                    # The rest of the result is left unfetched
+                    truncated = True
+                    batch = batch.slice(0, fit)
+                tables.append(batch)
+                num_rows += batch.num_rows
+                num_bytes += batch.nbytes
+                if truncated:
+                    break
+        except NotSupportedError:
+            # Results without Arrow batches, e.g. of DML statements
+            columns = [desc[0] for desc in cursor.description]
+            rows = cursor.fetchmany(self.fetch_max_rows + 1)
+            truncated = len(rows) > self.fetch_max_rows
+            data = [dict(zip(columns, row)) for row in rows[: self.fetch_max_rows]]
+            return SQLResult(pa.Table.from_pylist(data), truncated=truncated)
+
+        if not tables:
+            columns = [desc[0] for desc in cursor.description or []]
+            return SQLResult(pa.table({column: pa.nulls(0) for column in columns}))
+        return SQLResult(pa.concat_tables(tables), truncated=truncated)
+
+    @staticmethod
+    def _aggregate_column(column) -> Dict[str, Any]:
+        import pyarrow as pa
+        import pyarrow.compute as pc
+
+        aggregates = {"nulls": column.null_count}
+        if column.null_count == len(column):
+            return aggregates
+        if pa.types.is_integer(column.type) or pa.types.is_floating(column.type):
+            aggregates.update(pc.min_max(column).as_py())
+            aggregates["mean"] = pc.mean(column).as_py()
+            aggregates["sum"] = pc.sum(column).as_py()
+        elif pa.types.is_decimal(column.type) or pa.types.is_temporal(column.type):
+            aggregates.update(pc.min_max(column).as_py())
+        else:
+            aggregates["distinct"] = pc.count_distinct(column).as_py()
+        return aggregates
+
+    def summarize_result(self, result: SQLResult) -> str:
+        """
+        Summarizes a SQL result for the LLM.
+
+        Args:
+            result: The SQL result.
+
+        Returns:
+            A JSON string with the columns and types, number of rows, whether
+            the result was truncated, its first `head_rows` rows and, if it has
+            more rows, the aggregates of each column.
+        """
+        table = result.table
+        summary = {
+            "columns": [
+                {"name": field.name, "type": str(field.type)} for field in table.schema
+            ],
+            "num_rows": table.num_rows,
+            "truncated": result.truncated,
+            "head": table.slice(0, self.head_rows).to_pylist(),
+        }
+        if table.num_rows > self.head_rows:
+            summary["aggregates"] = {
+                name: self._aggregate_column(column)
+                for name, column in zip(table.column_names, table.columns)
+            }
+        return json.dumps(summary, cls=CustomJSONEncoder)
+
+    def _process_sql_query(
+        self,
+        sql_query: str,
+        request_id: str,
+        user: Optional[str] = None,
+        oauth_token: Optional[SecretStr] = None,
+    ) -> Tuple[SQLResult, bool]:
+        """
+        Executes the SQL query on Snowflake, or serves it from the cache.
+
+        Returns:
+            The result of the SQL query and whether it was cached.
+        """
+        key = self._result_cache_key(sql_query, user=user, oauth_token=oauth_token)
+        if key is not None:
+            result = self._get_cached_result(key)
+            if result is not None:
+                logger.info(f"SQL result of request {request_id} served from cache")
+                return result, True
+
+        pool = self.get_snowflake_pool(user=user, oauth_token=oauth_token)
         attempt = 0
         while attempt < self.snowflake_connect_retries:
             try:
-                with connect(
-                    **connection_parameters,
-                    timeout=self.snowflake_connect_timeout,
-                ) as connection:
+                with pool.connection() as connection:
                     with connection.cursor() as cursor:
                         cursor.execute(sql_query)
-                        # Commit the transaction
-                        response = cursor.fetchall()
+                        result = self._fetch_result(cursor)
 
-                if response:
-                    # Convert the response to a list of dictionaries
-                    columns = [desc[0] for desc in cursor.description]
-                    data = [dict(zip(columns, row)) for row in response]
-                else:
-                    data = []
-                return json.dumps(data, cls=CustomJSONEncoder)
+                if result.truncated:
+                    logger.warning(
+                        f"SQL result of request {request_id} truncated to "
+                        f"{result.num_rows} rows"
+                    )
+                if key is not None:
+                    self._set_cached_result(key, result)
+                return result, False
 
             except Exception as error:
                 logger.error(
@@ -266,6 +586,68 @@ class SnowflakeSQLQueryWrapper(BaseModel):
                 f"Failed Snowflake query (id: {request_id}) with error " f"'{error}'"
             )
 
+    def process_sql_query(
+        self,
+        sql_query: str,
+        request_id: str,
+        user: Optional[str] = None,
+        oauth_token: Optional[SecretStr] = None,
+    ) -> SQLResult:
+        """
+        Executes the SQL query on Snowflake and retrieves the result.
+
+        Results of SELECT statements are served from the cache while fresh.
+
+        Args:
+            sql_query: The SQL query to be executed.
+            request_id: The request ID for tracking the query.
+            user: Optional user for the Snowflake connection.
+            oauth_token: Optional OAuth access token for the Snowflake connection.
+
+        Returns:
+            The result of the SQL query, as an Arrow table.
+
+        Raises:
+            Exception: If the SQL query execution fails.
+        """
+        result, _ = self._process_sql_query(
+            sql_query=sql_query,
+            request_id=request_id,
+            user=user,
+            oauth_token=oauth_token,
+        )
+        return result
+
+    def _query_result(
+        self,
+        sql_query: str,
+        request_id: str,
+        user: Optional[str] = None,
+        oauth_token: Optional[SecretStr] = None,
+    ) -> Dict[str, Any]:
+        result, from_cache = self._process_sql_query(
+            sql_query=sql_query,
+            request_id=request_id,
+            user=user,
+            oauth_token=oauth_token,
+        )
+        return {
+            "sql_result": self.summarize_result(result),
+            "sql_artifact": sql_result_store.put(result),
+            "truncated": result.truncated,
+            "from_cache": from_cache,
+        }
+
+    @staticmethod
+    def _parse_message(response: Dict[str, Any]) -> Tuple[str, Optional[str]]:
+        """Return the interpretation and SQL statement of a Cortex response."""
+        content = response["message"]["content"]
+        human_query = [c for c in content if c["type"] == "text"]
+        sql_query = [c for c in content if c["type"] == "sql"]
+        if len(sql_query) > 0:
+            return human_query[0]["text"], sql_query[0]["statement"]
+        return "We could not interpret your question.", None
+
     def run(
         self,
         messages: List[str],
@@ -273,16 +655,19 @@ class SnowflakeSQLQueryWrapper(BaseModel):
         oauth_token: Optional[SecretStr] = None,
     ) -> str:
         """
-        Run the process to generate a document and return it as a base64
-        encoded string.
+        Run the process to translate the messages into an SQL query and
+        execute it.
 
         Args:
-            messages: A list of messages containing the document content.
+            messages: The conversation messages, ending with the human query.
             user: Optional user for the Snowflake connection.
             oauth_token: Optional OAuth access token for the Snowflake connection.
 
         Returns:
-            A dictionary containing the request ID, human query, SQL query, and SQL result.
+            A dictionary containing the request ID, human query, SQL query, the
+            summary of the SQL result for the LLM, the artifact ID of the full
+            SQL result, and whether the SQL result was truncated and served
+            from the cache.
 
         Raises:
             Exception: If any step in the process fails.
@@ -295,28 +680,87 @@ class SnowflakeSQLQueryWrapper(BaseModel):
             )
 
             request_id = response["request_id"]
-            content = response["message"]["content"]
-            human_query = [c for c in content if c["type"] == "text"]
-            sql_query = [c for c in content if c["type"] == "sql"]
-            if len(sql_query) > 0:
-                human_query = human_query[0]["text"]
-                sql_query = sql_query[0]["statement"]
-                sql_result = self.process_sql_query(
+            human_query, sql_query = self._parse_message(response)
+            if sql_query is not None:
+                query_result = self._query_result(
                     sql_query=sql_query,
                     request_id=request_id,
                     user=user,
                     oauth_token=oauth_token,
                 )
             else:
-                human_query = "We could not interpret your question."
                 sql_query = "SELECT * FROM table"
-                sql_result = "[]"
+                query_result = {
+                    "sql_result": "[]",
+                    "sql_artifact": None,
+                    "truncated": False,
+                    "from_cache": False,
+                }
             return {
                 "request_id": request_id,
                 "human_query": human_query,
                 "sql_query": sql_query,
-                "sql_result": sql_result,
+                **query_result,
             }
         except Exception as e:
             logger.error(f"Error in run method: {e}")
             raise e
+
+    async def arun(
+        self,
+        messages: List[str],
+        user: Optional[str] = None,
+        oauth_token: Optional[SecretStr] = None,
+    ) -> str:
+        """
+        Asynchronously run the process to translate the messages into an SQL
+        query and execute it.
+
+        Args:
+            messages: The conversation messages, ending with the human query.
+            user: Optional user for the Snowflake connection.
+            oauth_token: Optional OAuth access token for the Snowflake connection.
+
+        Returns:
+            A dictionary containing the request ID, human query, SQL query, the
+            summary of the SQL result for the LLM, the artifact ID of the full
+            SQL result, and whether the SQL result was truncated and served
+            from the cache.
+
+        Raises:
+            Exception: If any step in the process fails.
+        """
+        try:
+            response = await self.asend_message(
+                messages=messages,
+                user=user,
+                oauth_token=oauth_token,
+            )
+
+            request_id = response["request_id"]
+            human_query, sql_query = self._parse_message(response)
+            if sql_query is not None:
+                query_result = await run_in_snowflake_executor(
+                    self._query_result,
+                    sql_query=sql_query,
+                    request_id=request_id,
+                    user=user,
+                    oauth_token=oauth_token,
+                )
+            else:
+                sql_query = "SELECT * FROM table"
+                query_result = {
+                    "sql_result": "[]",
+                    "sql_artifact": None,
+                    "truncated": False,
+                    "from_cache": False,
+                }
+            return {
+                "request_id": request_id,
+                "human_query": human_query,
+                "sql_query": sql_query,
+                **query_result,
+            }
+        except Exception as e:
+            logger.error(f"Error in arun method: {e}")
+            raise e
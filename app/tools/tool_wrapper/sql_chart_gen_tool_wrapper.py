@@ -2,14 +2,18 @@ import base64
 import json
 import logging
 from io import BytesIO
+from typing import TYPE_CHECKING, Optional, Tuple
 
-import matplotlib.pyplot as plt
-import matplotlib.ticker as ticker
-import pandas as pd
-import seaborn as sns
 from pydantic import BaseModel, model_validator
 from typing_extensions import Self
 
+from ...helpers.sql_result_store import sql_result_store
+
+# pandas, matplotlib and seaborn take seconds to import, so they are only
+# imported when a chart is generated
+if TYPE_CHECKING:
+    import pandas as pd
+
 logger = logging.getLogger(__name__)
 
 
@@ -30,16 +34,34 @@ class SQLChartGeneratorToolWrapper(BaseModel):
         self,
         sql_result: str,
         chart_type: str,
-    ) -> pd.DataFrame:
+        sql_artifact: Optional[str] = None,
+    ) -> Tuple["pd.DataFrame", bool]:
         """
         Preprocess the SQL result to ensure it is in a suitable format for plotting.
 
         :param sql_result: A JSON string containing the SQL result.
         :param chart_type: The type of chart to generate ('bar', 'line', or 'pie').
-        :return: A pandas DataFrame ready for plotting.
+        :param sql_artifact: The ID of the stored SQL result, plotted if available.
+        :return: A pandas DataFrame ready for plotting, and whether it only holds
+            the first rows of an expired SQL result.
         """
-        data = json.loads(sql_result)
-        df = pd.DataFrame(data)
+        import pandas as pd
+
+        stored = sql_result_store.get(sql_artifact) if sql_artifact else None
+        head_only = False
+        if stored is not None:
+            df = stored.table.to_pandas()
+        else:
+            data = json.loads(sql_result)
+            if isinstance(data, dict):
+                # Summary of a SQL result, of which only the first rows are known
+                head_only = data["num_rows"] > len(data["head"])
+                data = data["head"]
+            if sql_artifact:
+                logger.warning(
+                    f"SQL result {sql_artifact} expired, plotting its first rows"
+                )
+            df = pd.DataFrame(data)
 
         if df.empty:
             raise ValueError("The provided SQL result is empty.")
@@ -67,9 +89,9 @@ class SQLChartGeneratorToolWrapper(BaseModel):
                     axis=1,
                 )
 
-        return df
+        return df, head_only
 
-    def generate_bar_chart(self, df: pd.DataFrame) -> str:
+    def generate_bar_chart(self, df: "pd.DataFrame") -> str:
         """
         Generate a bart chart from the provided DataFrame and return it
         as a base64 encoded string.
@@ -79,6 +101,10 @@ class SQLChartGeneratorToolWrapper(BaseModel):
         """
         logger.info("---PLOTTING BAR CHART---")
 
+        import matplotlib.pyplot as plt
+        import matplotlib.ticker as ticker
+        import seaborn as sns
+
         # Plotting the chart with seaborn
         plt.figure(figsize=(12, 8))
         sns.set_palette("muted")
@@ -117,7 +143,7 @@ class SQLChartGeneratorToolWrapper(BaseModel):
 
         return chart_base64
 
-    def generate_line_chart(self, df: pd.DataFrame) -> str:
+    def generate_line_chart(self, df: "pd.DataFrame") -> str:
         """
         Generate a line chart from the provided DataFrame and return
         it as a base64 encoded string.
@@ -127,6 +153,10 @@ class SQLChartGeneratorToolWrapper(BaseModel):
         """
         logger.info("---PLOTTING LINE CHART---")
 
+        import matplotlib.pyplot as plt
+        import matplotlib.ticker as ticker
+        import seaborn as sns
+
         plt.figure(figsize=(12, 8))
         sns.set_palette("muted")
         if len(df.columns) == 1:
@@ -164,7 +194,7 @@ class SQLChartGeneratorToolWrapper(BaseModel):
 
         return chart_base64
 
-    def generate_pie_chart(self, df: pd.DataFrame) -> str:
+    def generate_pie_chart(self, df: "pd.DataFrame") -> str:
         """
         Generate a pie chart from the provided DataFrame and
         return it as a base64 encoded string.
@@ -174,6 +204,9 @@ class SQLChartGeneratorToolWrapper(BaseModel):
         """
         logger.info("---PLOTTING PIE CHART---")
 
+        import matplotlib.pyplot as plt
+        import seaborn as sns
+
         category_column = df["Category"]
         value_column = df["Value"]
 
@@ -204,22 +237,25 @@ class SQLChartGeneratorToolWrapper(BaseModel):
         self,
         sql_result: str,
         chart_type: str = "bar",
-    ) -> str:
+        sql_artifact: Optional[str] = None,
+    ) -> Tuple[str, bool]:
         """
         Run the process to generate a chart and return it as a base64
         encoded string.
 
         :param sql_result: A JSON string containing the SQL result.
         :param chart_type: The type of chart to generate ('bar', 'line', or 'pie').
-        :return: The base64 encoded string of the generated chart.
+        :param sql_artifact: The ID of the stored SQL result, plotted if available.
+        :return: The base64 encoded string of the generated chart, and whether
+            it only plots the first rows of an expired SQL result.
         """
         try:
-            df = self.preprocess_data(sql_result, chart_type)
+            df, head_only = self.preprocess_data(sql_result, chart_type, sql_artifact)
             if chart_type == "line":
-                return self.generate_line_chart(df)
+                return self.generate_line_chart(df), head_only
             elif chart_type == "pie":
-                return self.generate_pie_chart(df)
+                return self.generate_pie_chart(df), head_only
             else:
-                return self.generate_bar_chart(df)
+                return self.generate_bar_chart(df), head_only
         except Exception as e:
             raise e
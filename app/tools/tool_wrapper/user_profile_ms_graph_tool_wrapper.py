@@ -1,7 +1,13 @@
+import asyncio
+import hashlib
 import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
 
-import requests
-from pydantic import BaseModel, SecretStr
+import httpx
+from pydantic import BaseModel, PrivateAttr, SecretStr
 
 logger = logging.getLogger(__name__)
 
@@ -11,13 +17,70 @@ class UserProfileMSGraphToolWrapper(BaseModel):
     Wrapper for retrieving user profile information from Microsoft Graph API.
 
     This class provides a method to retrieve user profile information
-    using an OAuth token.
+    using an OAuth token. Requests go through pooled HTTP clients and
+    profiles are cached by the SHA-256 hash of the token, so the token
+    itself is never kept in memory. Concurrent async lookups of the same
+    token share a single request.
 
     Usage instructions:
-    1. Ensure you have the `requests` library installed.
-    2. Use the `get_user_profile` method to retrieve the user profile information.
+    1. Ensure you have the `httpx` library installed.
+    2. Use the `get_user_profile` or `aget_user_profile` method to retrieve
+       the user profile information.
     """
 
+    graph_api_url: str = "https://graph.microsoft.com/v1.0/me"
+    timeout: float = 5.0
+    """Timeout of a Microsoft Graph request, in seconds."""
+    cache_ttl: int = 1800
+    """Time to live of a cached profile, in seconds."""
+    max_cache_entries: int = 4096
+    """Maximum number of cached profiles."""
+
+    _client: Optional[httpx.Client] = PrivateAttr(default=None)
+    _aclient: Optional[httpx.AsyncClient] = PrivateAttr(default=None)
+    _cache: OrderedDict = PrivateAttr(default_factory=OrderedDict)
+    _inflight: dict = PrivateAttr(default_factory=dict)
+    _lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
+
+    @property
+    def client(self) -> httpx.Client:
+        if self._client is None:
+            self._client = httpx.Client(timeout=self.timeout)
+        return self._client
+
+    @property
+    def aclient(self) -> httpx.AsyncClient:
+        if self._aclient is None:
+            self._aclient = httpx.AsyncClient(timeout=self.timeout)
+        return self._aclient
+
+    @staticmethod
+    def _cache_key(oauth_token: SecretStr) -> str:
+        return hashlib.sha256(oauth_token.get_secret_value().encode()).hexdigest()
+
+    def _get_cached(self, key: str) -> Optional[dict]:
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is None or entry["expires_at"] <= time.monotonic():
+                self._cache.pop(key, None)
+                return None
+            self._cache.move_to_end(key)
+            return entry["profile"]
+
+    def _set_cached(self, key: str, profile: dict):
+        with self._lock:
+            self._cache[key] = {
+                "profile": profile,
+                "expires_at": time.monotonic() + self.cache_ttl,
+            }
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.max_cache_entries:
+                self._cache.popitem(last=False)
+
+    @staticmethod
+    def _headers(oauth_token: SecretStr) -> dict:
+        return {"Authorization": "Bearer " + oauth_token.get_secret_value()}
+
     def get_user_profile(self, oauth_token: SecretStr) -> dict:
         """
         Retrieves the user profile information from Microsoft Graph API.
@@ -28,13 +91,55 @@ class UserProfileMSGraphToolWrapper(BaseModel):
         Returns:
             A dictionary containing the user profile information.
         """
-        graph_api_url = "https://graph.microsoft.com/v1.0/me"
-        headers = {
-            "Authorization": "Bearer " + oauth_token.get_secret_value(),
-        }
-        response = requests.get(graph_api_url, headers=headers)
+        key = self._cache_key(oauth_token)
+        profile = self._get_cached(key)
+        if profile is None:
+            response = self.client.get(
+                self.graph_api_url, headers=self._headers(oauth_token)
+            )
+            response.raise_for_status()
+            profile = response.json()
+            self._set_cached(key, profile)
+        return profile
+
+    async def aget_user_profile(self, oauth_token: SecretStr) -> dict:
+        """
+        Asynchronously retrieves the user profile information from
+        Microsoft Graph API.
+
+        Args:
+            oauth_token: The OAuth token for authenticating with Microsoft Graph API.
+
+        Returns:
+            A dictionary containing the user profile information.
+        """
+        key = self._cache_key(oauth_token)
+        profile = self._get_cached(key)
+        if profile is not None:
+            return profile
+
+        inflight = self._inflight.get(key)
+        if inflight is None:
+            # Shared by concurrent lookups of the token, and left running when
+            # a caller gives up so that the profile is cached for the next turn
+            inflight = asyncio.ensure_future(self._afetch_profile(key, oauth_token))
+            self._inflight[key] = inflight
+            inflight.add_done_callback(lambda task: self._fetch_done(key, task))
+        return await asyncio.shield(inflight)
+
+    def _fetch_done(self, key: str, task: asyncio.Task):
+        self._inflight.pop(key, None)
+        if not task.cancelled() and task.exception() is not None:
+            logger.error(f"Unable to retrieve user profile: {task.exception()}")
+
+    async def _afetch_profile(self, key: str, oauth_token: SecretStr) -> dict:
+        response = await self.aclient.get(
+            self.graph_api_url, headers=self._headers(oauth_token)
+        )
         response.raise_for_status()
-        return response.json()
+        profile = response.json()
+        self._set_cached(key, profile)
+        return profile
 
     def run(self, oauth_token: SecretStr) -> dict:
         """
@@ -51,3 +156,19 @@ class UserProfileMSGraphToolWrapper(BaseModel):
         except Exception as e:
             logger.error(f"Error in run method: {e}")
             raise e
+
+    async def arun(self, oauth_token: SecretStr) -> dict:
+        """
+        Asynchronously run the process to retrieve user profile information.
+
+        Args:
+            oauth_token: The OAuth token for authenticating with Microsoft Graph API.
+
+        Returns:
+            A dictionary containing the user profile information.
+        """
+        try:
+            return await self.aget_user_profile(oauth_token)
+        except Exception as e:
+            logger.error(f"Error in arun method: {e}")
+            raise e
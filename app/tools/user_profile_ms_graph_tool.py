@@ -95,7 +95,17 @@ class UserProfileMSGraphTool(BaseTool):
         Returns:
             A dictionary containing the user profile information.
         """
-        return self._run(
-            oauth_token=oauth_token,
-            run_manager=run_manager.get_sync(),
-        )
+        try:
+            response = await self.tool_wrapper.arun(
+                oauth_token=oauth_token,
+            )
+            return {
+                "status": "success",
+                "user_profile_details": response,
+            }
+        except ToolException as e:
+            logger.error(f"Unable to retrieve data due to: {e}")
+            return {"status": "failure", "message": "Retrieving data failed."}
+        except Exception as e:
+            logger.error(f"Unable to retrieve data due to: {e}")
+            return {"status": "failure", "message": "Retrieving data failed."}
@@ -1,19 +1,19 @@
-from langchain_community.tools.bing_search import BingSearchResults
-from langchain_community.utilities import BingSearchAPIWrapper
-
 from ..config import config
+from .bing_search_tool import BingSearchTool
+from .tool_wrapper.bing_search_tool_wrapper import (
+    DEFAULT_BING_SEARCH_URL,
+    BingSearchToolWrapper,
+)
 
-web_search = BingSearchAPIWrapper(
-    bing_subscription_key=config.BING_SUBSCRIPTION_KEY,
-    bing_search_url=config.BING_SEARCH_URL,
-    k=config.web_search_num_results,
-    search_kwargs={
-        "count": config.web_search_num_results,  # Number of results to return
-        "offset": 0,  # Offset for pagination
-        # 'freshness': 'Month'  # Freshness of the results
-        "textDecorations": True,  # Enable text decorations
-        "textFormat": "HTML",  # Format of the text in the search results
-    },
+web_search_client = BingSearchToolWrapper(
+    subscription_key=config.BING_SUBSCRIPTION_KEY,
+    search_url=config.BING_SEARCH_URL or DEFAULT_BING_SEARCH_URL,
+    count=config.web_search_num_results,
+    timeout=config.web_search_kwargs["request_timeout"],
+    max_connections=config.web_search_kwargs["max_connections"],
+    cache_ttl=config.web_search_kwargs["cache_ttl"],
+    max_cache_entries=config.web_search_kwargs["max_cache_entries"],
+    quota_cooldown=config.web_search_kwargs["quota_cooldown"],
 )
 
-web_search_tool = BingSearchResults(api_wrapper=web_search)
+web_search_tool = BingSearchTool(tool_wrapper=web_search_client)
@@ -0,0 +1,241 @@
+import hashlib
+import logging
+import math
+import re
+import threading
+from collections import OrderedDict
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+from langchain.schema import Document
+from langchain_core.embeddings import Embeddings
+
+from ..config import config
+from ..embedding_model.azure_emb import embeddings_model
+
+logger = logging.getLogger(__name__)
+
+# Sentences, lines, and table rows or paragraphs of the HTML of parsed tables
+UNIT_SEPARATOR = re.compile(r"(?<=[.!?])\s+|\n+|(?<=</tr>)|(?<=</p>)")
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimate the tokens of a text for the GPT-4o tokenizer without loading it.
+
+    Latin script averages about 4 characters per token and other scripts,
+    e.g. Arabic, about 2. Non-ASCII characters are counted from the extra
+    bytes of their UTF-8 encoding.
+    """
+    non_ascii = len(text.encode("utf-8")) - len(text)
+    return math.ceil((len(text) - non_ascii) / 4 + non_ascii / 2)
+
+
+def estimate_document_tokens(document: Document) -> int:
+    # Documents are rendered in the prompts with their metadata
+    return estimate_tokens(document.page_content) + estimate_tokens(
+        str(document.metadata)
+    )
+
+
+def _normalize_unit(unit: str) -> str:
+    return " ".join(unit.lower().split())
+
+
+class ContextPacker:
+    """Fit the retrieved context of a prompt into a token budget.
+
+    Units (sentences, lines or table rows) repeated across overlapping chunks
+    are only kept once. When the context still exceeds the budget, only the
+    units most similar to the query are kept, in their original order, and
+    documents left without units are dropped. The first unit of a document,
+    usually its title or table header, is kept with any other of its units.
+    Unit embeddings are cached locally, since the same chunks are packed again
+    on every generation attempt and by later turns.
+
+    Args:
+        embeddings: model embedding the query and units
+        token_budget: default token budget of the context
+        max_cached_embeddings: maximum number of cached unit embeddings
+    """
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        token_budget: int = 6000,
+        max_cached_embeddings: int = 20000,
+    ):
+        self.embeddings = embeddings
+        self.token_budget = token_budget
+        self.max_cached_embeddings = max_cached_embeddings
+        self._embedding_cache: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {
+            "calls": 0,
+            "compressed_calls": 0,
+            "tokens_before": 0,
+            "tokens_after": 0,
+            "embedding_hits": 0,
+            "embedding_misses": 0,
+        }
+
+    @staticmethod
+    def _normalize(vectors) -> np.ndarray:
+        matrix = np.asarray(vectors, dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+        return matrix / np.where(norms > 0, norms, 1.0)
+
+    async def _aembed_units(self, units: Sequence[str]) -> np.ndarray:
+        keys = [hashlib.sha1(unit.encode("utf-8")).hexdigest() for unit in units]
+        vectors = {}
+        with self._lock:
+            for key in keys:
+                vector = self._embedding_cache.get(key)
+                if vector is not None:
+                    self._embedding_cache.move_to_end(key)
+                    vectors[key] = vector
+
+        missing = {key: unit for key, unit in zip(keys, units) if key not in vectors}
+        if missing:
+            embedded = self._normalize(
+                await self.embeddings.aembed_documents(list(missing.values()))
+            )
+            vectors.update(zip(missing, embedded))
+            with self._lock:
+                self._embedding_cache.update(zip(missing, embedded))
+                while len(self._embedding_cache) > self.max_cached_embeddings:
+                    self._embedding_cache.popitem(last=False)
+
+        with self._lock:
+            self._stats["embedding_hits"] += len(keys) - len(missing)
+            self._stats["embedding_misses"] += len(missing)
+        return np.stack([vectors[key] for key in keys])
+
+    @staticmethod
+    def _dedupe(
+        documents: Sequence[Document],
+    ) -> List[Tuple[Document, List[str], bool]]:
+        """Split the documents into units, dropping units already seen.
+
+        Returns:
+            The documents with units left, their units and whether any unit
+            of the document was dropped.
+        """
+        seen = set()
+        deduped = []
+        for document in documents:
+            units = []
+            dropped = False
+            for unit in UNIT_SEPARATOR.split(document.page_content):
+                normalized = _normalize_unit(unit)
+                if not normalized:
+                    continue
+                if normalized in seen:
+                    dropped = True
+                    continue
+                seen.add(normalized)
+                units.append(unit.strip())
+            if units:
+                deduped.append((document, units, dropped))
+        return deduped
+
+    async def apack(
+        self,
+        query: str,
+        documents: Sequence[Document],
+        token_budget: Optional[int] = None,
+    ) -> List[Document]:
+        """Pack the documents of a prompt context into a token budget.
+
+        Args:
+            query: query the context should answer, e.g. the `rag_query`
+            documents: retrieved documents, most relevant first
+            token_budget: token budget of the context, defaults to `token_budget`
+
+        Returns:
+            The documents to put in the prompt. Documents are copied, not
+            modified, when their content changes.
+        """
+        token_budget = token_budget or self.token_budget
+        tokens_before = sum(estimate_document_tokens(doc) for doc in documents)
+
+        deduped = self._dedupe(documents)
+        packed = [
+            (
+                Document(page_content="\n".join(units), metadata=document.metadata)
+                if dropped
+                else document
+            )
+            for document, units, dropped in deduped
+        ]
+        tokens = sum(estimate_document_tokens(doc) for doc in packed)
+
+        compressed = tokens > token_budget
+        if compressed:
+            packed = await self._acompress(query, deduped, token_budget)
+            tokens = sum(estimate_document_tokens(doc) for doc in packed)
+
+        with self._lock:
+            self._stats["calls"] += 1
+            self._stats["compressed_calls"] += compressed
+            self._stats["tokens_before"] += tokens_before
+            self._stats["tokens_after"] += tokens
+        logger.info(
+            f"Context packed: documents {len(documents)} -> {len(packed)}, "
+            f"tokens {tokens_before} -> {tokens} (budget {token_budget})"
+        )
+        return packed
+
+    async def _acompress(
+        self,
+        query: str,
+        deduped: List[Tuple[Document, List[str], bool]],
+        token_budget: int,
+    ) -> List[Document]:
+        units = [
+            (i, j, unit)
+            for i, (_, doc_units, _) in enumerate(deduped)
+            for j, unit in enumerate(doc_units)
+        ]
+        # The query is embedded and cached like a unit, as it is the same
+        # on every generation attempt
+        vectors = await self._aembed_units([query] + [unit for _, _, unit in units])
+        scores = vectors[1:] @ vectors[0]
+
+        # Select the most similar units while they fit in the budget
+        selected = set()
+        tokens = 0
+        for index in np.argsort(-scores):
+            i, j, unit = units[index]
+            document, doc_units, _ = deduped[i]
+            cost = estimate_tokens(unit)
+            if (i, 0) not in selected:
+                # The first unit of the document, rendered with its metadata
+                cost += estimate_tokens(str(document.metadata))
+                if j != 0:
+                    cost += estimate_tokens(doc_units[0])
+            if tokens + cost > token_budget:
+                continue
+            tokens += cost
+            selected.update({(i, 0), (i, j)})
+
+        packed = []
+        for i, (document, doc_units, _) in enumerate(deduped):
+            kept = [unit for j, unit in enumerate(doc_units) if (i, j) in selected]
+            if kept:
+                packed.append(
+                    Document(page_content="\n".join(kept), metadata=document.metadata)
+                )
+        return packed
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["cached_embeddings"] = len(self._embedding_cache)
+        return stats
+
+
+context_packer = ContextPacker(
+    embeddings_model,
+    token_budget=config.context_packer_kwargs["token_budget"],
+    max_cached_embeddings=config.context_packer_kwargs["max_cached_embeddings"],
+)
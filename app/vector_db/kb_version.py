@@ -0,0 +1,113 @@
+import logging
+import time
+import uuid
+from typing import Optional
+
+from qdrant_client import AsyncQdrantClient
+from qdrant_client.http.exceptions import UnexpectedResponse
+from qdrant_client.models import Distance, PointStruct, VectorParams
+
+logger = logging.getLogger(__name__)
+
+# Version of a collection that was never modified through the app
+INITIAL_KB_VERSION = "0"
+
+
+class KnowledgeBaseVersion:
+    """
+    Version of the knowledge base of a collection, shared by all replicas.
+
+    The version is a random token kept in the payload of one point of a small
+    Qdrant collection, and replaced on every write to the knowledge base. Each
+    replica reuses the version it read for `ttl` seconds, so results cached
+    against an older version stop being served shortly after a write made by
+    any replica.
+
+    Args:
+        aclient: async Qdrant client
+        collection_name: name of the versioned collection
+        versions_collection: name of the Qdrant collection of the versions
+        ttl: seconds a read version is reused
+    """
+
+    def __init__(
+        self,
+        aclient: AsyncQdrantClient,
+        collection_name: str,
+        versions_collection: str = "kb-versions",
+        ttl: float = 5,
+    ):
+        self.aclient = aclient
+        self.collection_name = collection_name
+        self.versions_collection = versions_collection
+        self.ttl = ttl
+        self._point_id = str(uuid.uuid5(uuid.NAMESPACE_URL, collection_name))
+        self._collection_ready = False
+        self._version: Optional[str] = None
+        self._expires_at = 0.0
+
+    async def _aensure_collection(self):
+        if self._collection_ready:
+            return
+        if not await self.aclient.collection_exists(self.versions_collection):
+            try:
+                await self.aclient.create_collection(
+                    self.versions_collection,
+                    vectors_config=VectorParams(size=1, distance=Distance.DOT),
+                )
+            except UnexpectedResponse:
+                # Created by another replica in the meantime
+                pass
+        self._collection_ready = True
+
+    async def aget(self) -> Optional[str]:
+        """
+        Return the current version, or None if it could not be read, in which
+        case nothing should be served from or written to the caches.
+        """
+        now = time.monotonic()
+        if (self._version is not None) and (self._expires_at > now):
+            return self._version
+
+        try:
+            await self._aensure_collection()
+            points = await self.aclient.retrieve(
+                self.versions_collection,
+                ids=[self._point_id],
+                with_payload=True,
+            )
+        except Exception as e:
+            logger.error(f"{self.collection_name}: cannot read version: {e}")
+            return None
+
+        self._version = (
+            points[0].payload["kb_version"] if points else INITIAL_KB_VERSION
+        )
+        self._expires_at = now + self.ttl
+        return self._version
+
+    async def abump(self) -> Optional[str]:
+        """Replace the version after a write, and return the new one."""
+        version = uuid.uuid4().hex
+        try:
+            await self._aensure_collection()
+            await self.aclient.upsert(
+                self.versions_collection,
+                points=[
+                    PointStruct(
+                        id=self._point_id,
+                        vector=[1.0],
+                        payload={
+                            "collection_name": self.collection_name,
+                            "kb_version": version,
+                        },
+                    )
+                ],
+            )
+        except Exception as e:
+            logger.error(f"{self.collection_name}: cannot bump version: {e}")
+            return None
+
+        self._version = version
+        self._expires_at = time.monotonic() + self.ttl
+        return version
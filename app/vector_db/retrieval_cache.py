@@ -0,0 +1,182 @@
+import json
+import logging
+import time
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+
+import numpy as np
+from langchain.schema import Document
+from qdrant_client import models
+
+from ..config import config
+
+logger = logging.getLogger(__name__)
+
+
+class RetrievalResultCache:
+    """
+    In-memory cache of vector store search results.
+
+    Results are bucketed by collection, search filter and k, and matched by
+    the cosine similarity of the query embedding, so that follow-up queries
+    rewritten to (nearly) the same `rag_query` skip the vector DB round trip.
+    Entries are only served for the collection version they were fetched at.
+    As filters hold the document ids of each user, the least recently used
+    buckets are evicted beyond `max_buckets`.
+
+    Args:
+        score_threshold: minimum cosine similarity to reuse cached results
+        ttl: time to live of cached results, in seconds
+        max_entries: maximum number of cached searches per bucket
+        max_buckets: maximum number of buckets
+    """
+
+    def __init__(
+        self,
+        score_threshold: float = 0.98,
+        ttl: int = 600,
+        max_entries: int = 128,
+        max_buckets: int = 1024,
+    ):
+        self.score_threshold = score_threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_buckets = max_buckets
+        self._entries: OrderedDict = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _normalize(embedding: List[float]) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else vector
+
+    @staticmethod
+    def _bucket(
+        collection_name: str,
+        filter: Optional[models.Filter],
+        k: int,
+    ) -> Tuple[str, str, int]:
+        filter_key = (
+            json.dumps(filter.model_dump(exclude_none=True), sort_keys=True)
+            if filter is not None
+            else ""
+        )
+        return collection_name, filter_key, k
+
+    @staticmethod
+    def _copy(results: List[Tuple[Document, float]]) -> List[Tuple[Document, float]]:
+        # Callers modify the returned documents in place
+        return [
+            (
+                Document(page_content=doc.page_content, metadata=dict(doc.metadata)),
+                score,
+            )
+            for doc, score in results
+        ]
+
+    def lookup(
+        self,
+        collection_name: str,
+        filter: Optional[models.Filter],
+        k: int,
+        query_embedding: List[float],
+        kb_version: str,
+    ) -> Optional[List[Tuple[Document, float]]]:
+        """
+        Return the cached results of the closest search, if any.
+
+        Args:
+            collection_name: name of the vector store collection
+            filter: search filter
+            k: number of results of the search
+            query_embedding: embedding of the query
+            kb_version: current version of the collection
+
+        Returns:
+            A copy of the cached (document, relevance score) pairs, or None.
+        """
+        bucket = self._bucket(collection_name, filter, k)
+        now = time.monotonic()
+        entries = [
+            entry
+            for entry in self._entries.get(bucket, [])
+            if (entry["kb_version"] == kb_version) and (entry["expires_at"] > now)
+        ]
+        if not entries:
+            self._entries.pop(bucket, None)
+            self.misses += 1
+            return None
+        self._entries[bucket] = entries
+        self._entries.move_to_end(bucket)
+
+        scores = np.stack([entry["embedding"] for entry in entries]) @ self._normalize(
+            query_embedding
+        )
+        best = int(np.argmax(scores))
+        if scores[best] < self.score_threshold:
+            self.misses += 1
+            return None
+
+        # Keep the most recently used entries at the end of the list
+        entry = entries.pop(best)
+        entries.append(entry)
+        self.hits += 1
+        logger.info(
+            f"Retrieval cache hit for {collection_name} "
+            f"(similarity {scores[best]:.3f})"
+        )
+        return self._copy(entry["results"])
+
+    def store(
+        self,
+        collection_name: str,
+        filter: Optional[models.Filter],
+        k: int,
+        query_embedding: List[float],
+        kb_version: str,
+        results: List[Tuple[Document, float]],
+    ):
+        """
+        Cache the results of a search.
+
+        Args:
+            collection_name: name of the vector store collection
+            filter: search filter
+            k: number of results of the search
+            query_embedding: embedding of the query
+            kb_version: version of the collection the results were fetched at
+            results: (document, relevance score) pairs returned by the search
+        """
+        bucket = self._bucket(collection_name, filter, k)
+        entries = self._entries.setdefault(bucket, [])
+        self._entries.move_to_end(bucket)
+        entries.append(
+            {
+                "embedding": self._normalize(query_embedding),
+                "kb_version": kb_version,
+                "expires_at": time.monotonic() + self.ttl,
+                "results": self._copy(results),
+            }
+        )
+        if len(entries) > self.max_entries:
+            del entries[: len(entries) - self.max_entries]
+        while len(self._entries) > self.max_buckets:
+            self._entries.popitem(last=False)
+
+    def clear(self, collection_name: Optional[str] = None):
+        """Drop the cached results of one collection, or all of them."""
+        if collection_name is None:
+            self._entries.clear()
+        else:
+            for bucket in [b for b in self._entries if b[0] == collection_name]:
+                del self._entries[bucket]
+
+
+retrieval_cache = RetrievalResultCache(
+    score_threshold=config.retrieval_cache_kwargs["score_threshold"],
+    ttl=config.retrieval_cache_kwargs["ttl"],
+    max_entries=config.retrieval_cache_kwargs["max_entries"],
+    max_buckets=config.retrieval_cache_kwargs["max_buckets"],
+)
@@ -0,0 +1,171 @@
+import hashlib
+import logging
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from langchain.schema import Document
+
+from ..config import config
+
+logger = logging.getLogger(__name__)
+
+
+def prompt_scope(username: str, timestamp: str, enterprise_context: str) -> str:
+    """
+    Return a key of the prompt fields an answer may depend on besides the
+    query: the user greeted by name, the date and the enterprise context.
+    """
+    try:
+        date = datetime.fromisoformat(timestamp).date().isoformat()
+    except ValueError:
+        date = timestamp
+    return hashlib.sha256(
+        "\x00".join([username, date, enterprise_context]).encode()
+    ).hexdigest()
+
+
+class SemanticAnswerCache:
+    """
+    In-memory semantic cache of graded answers for public-doc RAG queries.
+
+    Entries are keyed by the AI Agent app name, the embedding of the
+    rewritten `rag_query` and the scope of the prompt, see `prompt_scope`, as
+    answers greet the user by name. A lookup is a hit when a stored query of
+    the same agent and scope has a cosine similarity above `score_threshold`,
+    the entry has not expired, and it was generated against the current
+    knowledge base version.
+
+    Args:
+        score_threshold: minimum cosine similarity to serve a cached answer
+        ttl: time to live of a cached answer, in seconds
+        max_entries: maximum number of cached answers per AI Agent app
+    """
+
+    def __init__(
+        self,
+        score_threshold: float = 0.95,
+        ttl: int = 3600,
+        max_entries: int = 256,
+    ):
+        self.score_threshold = score_threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: Dict[str, List[dict]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _normalize(embedding: List[float]) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else vector
+
+    def _evict(self, ai_agent_app_name: str, kb_version: str):
+        """Drop expired and stale entries of the given AI Agent app."""
+        now = time.monotonic()
+        self._entries[ai_agent_app_name] = [
+            entry
+            for entry in self._entries.get(ai_agent_app_name, [])
+            if (entry["kb_version"] == kb_version) and (entry["expires_at"] > now)
+        ]
+
+    def lookup(
+        self,
+        ai_agent_app_name: str,
+        query_embedding: List[float],
+        kb_version: str,
+        scope: str,
+    ) -> Optional[Tuple[str, List[Document]]]:
+        """
+        Return the cached answer and context closest to the query, if any.
+
+        Args:
+            ai_agent_app_name: name of the AI Agent application
+            query_embedding: embedding of the rewritten rag query
+            kb_version: current knowledge base version of the AI Agent app
+            scope: scope of the prompt, see `prompt_scope`
+
+        Returns:
+            A tuple with the answer content and a copy of its context, or None.
+        """
+        self._evict(ai_agent_app_name, kb_version)
+        entries = self._entries[ai_agent_app_name]
+        candidates = [i for i, entry in enumerate(entries) if entry["scope"] == scope]
+        if not candidates:
+            self.misses += 1
+            return None
+
+        query_vector = self._normalize(query_embedding)
+        scores = np.stack([entries[i]["embedding"] for i in candidates]) @ query_vector
+        best = int(np.argmax(scores))
+        if scores[best] < self.score_threshold:
+            self.misses += 1
+            return None
+
+        # Keep the most recently used entries at the end of the list
+        entry = entries.pop(candidates[best])
+        entries.append(entry)
+        self.hits += 1
+        logger.info(
+            f"Semantic cache hit for {ai_agent_app_name} "
+            f"(similarity {scores[best]:.3f})"
+        )
+        context = [
+            Document(page_content=doc.page_content, metadata=dict(doc.metadata))
+            for doc in entry["context"]
+        ]
+        return entry["answer"], context
+
+    def store(
+        self,
+        ai_agent_app_name: str,
+        query_embedding: List[float],
+        kb_version: str,
+        scope: str,
+        answer: str,
+        context: List[Document],
+    ):
+        """
+        Cache a graded answer and its context for the given rag query embedding.
+
+        Args:
+            ai_agent_app_name: name of the AI Agent application
+            query_embedding: embedding of the rewritten rag query
+            kb_version: knowledge base version the answer was generated against
+            scope: scope of the prompt the answer was generated with
+            answer: content of the final answer
+            context: documents the answer is grounded in
+        """
+        self._evict(ai_agent_app_name, kb_version)
+        entries = self._entries[ai_agent_app_name]
+        entries.append(
+            {
+                "embedding": self._normalize(query_embedding),
+                "kb_version": kb_version,
+                "scope": scope,
+                "expires_at": time.monotonic() + self.ttl,
+                "answer": answer,
+                "context": [
+                    Document(page_content=doc.page_content, metadata=dict(doc.metadata))
+                    for doc in context
+                ],
+            }
+        )
+        if len(entries) > self.max_entries:
+            del entries[: len(entries) - self.max_entries]
+
+    def clear(self, ai_agent_app_name: Optional[str] = None):
+        """Drop the cached answers of one AI Agent app, or all of them."""
+        if ai_agent_app_name is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(ai_agent_app_name, None)
+
+
+semantic_answer_cache = SemanticAnswerCache(
+    score_threshold=config.semantic_cache_kwargs["score_threshold"],
+    ttl=config.semantic_cache_kwargs["ttl"],
+    max_entries=config.semantic_cache_kwargs["max_entries"],
+)
@@ -6,25 +6,23 @@ import os
 import re
 import uuid
 from datetime import datetime
+from typing import List, Optional, Tuple
 
 import magic
 from azure.identity import ClientSecretCredential
 from azure.storage.blob import BlobClient, ContentSettings
-from langchain_community.document_loaders import (
-    UnstructuredExcelLoader,
-    UnstructuredPDFLoader,
-    UnstructuredPowerPointLoader,
-    UnstructuredWordDocumentLoader,
-)
+from langchain.schema import Document
 from langchain_qdrant import QdrantVectorStore as VectorStore
 from langchain_qdrant import RetrievalMode
 from langchain_text_splitters import RecursiveCharacterTextSplitter
-from qdrant_client.models import Distance, VectorParams
+from qdrant_client.models import Distance, Filter, VectorParams
 
 from ..chain.rag_payload_rewriter import rag_payload_rewriter
 from ..config import Config
 from ..embedding_model.azure_emb import embeddings_model
+from .kb_version import KnowledgeBaseVersion
 from .qdrant_db import aclient, client
+from .retrieval_cache import retrieval_cache
 
 logger = logging.getLogger(__name__)
 
@@ -87,6 +85,14 @@ class KnowledgeBaseManager:
         self.num_questions_per_chunk = num_questions_per_chunk
         self.search_type = config.search_type
         self.search_kwargs = config.search_kwargs
+        self.retrieval_cache_enabled = config.retrieval_cache_kwargs["enabled"]
+        # Replaced on every write to the collection to invalidate cached results
+        self.kb_version = KnowledgeBaseVersion(
+            aclient,
+            self.collection_name,
+            versions_collection=config.kb_version_kwargs["collection_name"],
+            ttl=config.kb_version_kwargs["ttl"],
+        )
         self.docs_directory = os.path.join(
             ".",
             "app",
@@ -104,6 +110,90 @@ class KnowledgeBaseManager:
         self.vectorstore = self.get_vectorstore()
         self.retriever = self.get_retriever()
 
+    async def aget_kb_version(self) -> Optional[str]:
+        """
+        Return the current knowledge base version, shared by all replicas, or
+        None if it could not be read and caches should be bypassed.
+        """
+        return await self.kb_version.aget()
+
+    async def abump_kb_version(self) -> Optional[str]:
+        """
+        Mark the knowledge base as modified so that any answer or result
+        cached against a previous version is no longer served, on any replica.
+        """
+        kb_version = await self.kb_version.abump()
+        retrieval_cache.clear(self.collection_name)
+        logger.info(f"{self.collection_name}: knowledge base version {kb_version}")
+        return kb_version
+
+    def _relevance_score(self, score: float) -> float:
+        """
+        Normalize a Qdrant score to a relevance score on a scale [0, 1], like
+        the vector store does for the cosine distance of the collection.
+        """
+        return (score + 1.0) / 2.0
+
+    def _document_from_point(self, point) -> Document:
+        metadata = point.payload.get(self.vectorstore.metadata_payload_key) or {}
+        metadata["_id"] = point.id
+        metadata["_collection_name"] = self.collection_name
+        return Document(
+            page_content=point.payload.get(self.vectorstore.content_payload_key, ""),
+            metadata=metadata,
+        )
+
+    async def asimilarity_search_by_vector_with_relevance_scores(
+        self,
+        embedding: List[float],
+        k: int,
+        filter: Optional[Filter] = None,
+    ) -> List[Tuple[Document, float]]:
+        """
+        Search the collection with an already embedded query.
+
+        Results of near-identical searches made at the current knowledge base
+        version are served from the retrieval cache instead of the vector DB.
+
+        Args:
+            embedding: embedding of the query
+            k: number of documents to return
+            filter: Qdrant filter on the payload
+
+        Returns:
+            List of (document, relevance score) pairs, most similar first.
+        """
+        # Results are cached against the version they were fetched at
+        kb_version = None
+        if self.retrieval_cache_enabled:
+            kb_version = await self.aget_kb_version()
+        if kb_version is not None:
+            results = retrieval_cache.lookup(
+                self.collection_name, filter, k, embedding, kb_version
+            )
+            if results is not None:
+                return results
+
+        response = await self.aclient.query_points(
+            collection_name=self.collection_name,
+            query=embedding,
+            using=self.vectorstore.vector_name,
+            query_filter=filter,
+            limit=k,
+            with_payload=True,
+            with_vectors=False,
+        )
+        results = [
+            (self._document_from_point(point), self._relevance_score(point.score))
+            for point in response.points
+        ]
+
+        if kb_version is not None:
+            retrieval_cache.store(
+                self.collection_name, filter, k, embedding, kb_version, results
+            )
+        return results
+
     def get_file_extension_and_content_type(
         self,
         base64_string: str,
@@ -687,6 +777,9 @@ class KnowledgeBaseManager:
         yield progress, sub_docs
 
     def process_pdf(self, file_path, partition_strategy="hi_res"):
+        # The unstructured loaders are only imported when a file is processed
+        from langchain_community.document_loaders import UnstructuredPDFLoader
+
         return UnstructuredPDFLoader(
             file_path=file_path,
             mode="elements",
@@ -706,6 +799,8 @@ class KnowledgeBaseManager:
         )
 
     def process_ppt(self, file_path, partition_strategy="hi_res"):
+        from langchain_community.document_loaders import UnstructuredPowerPointLoader
+
         return UnstructuredPowerPointLoader(
             file_path=file_path,
             mode="elements",
@@ -724,6 +819,8 @@ class KnowledgeBaseManager:
         )
 
     def process_word(self, file_path, partition_strategy="hi_res"):
+        from langchain_community.document_loaders import UnstructuredWordDocumentLoader
+
         return UnstructuredWordDocumentLoader(
             file_path=file_path,
             mode="elements",
@@ -740,6 +837,8 @@ class KnowledgeBaseManager:
         )
 
     def process_excel(self, file_path, partition_strategy="hi_res"):
+        from langchain_community.document_loaders import UnstructuredExcelLoader
+
         return UnstructuredExcelLoader(
             file_path=file_path,
             mode="elements",
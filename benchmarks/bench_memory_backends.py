@@ -0,0 +1,130 @@
+"""
+Compare the per-turn memory overhead of the chat history and checkpoint backends.
+
+A turn reads the recent history, appends the human and AI messages and, like the
+file generation nodes, appends a checkpoint delta. The SQLite backend always
+runs; the Snowflake backend only runs when the SF_MAIN_* credentials are set.
+
+Usage:
+    python -m benchmarks.bench_memory_backends --turns 50
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+import uuid
+from datetime import datetime, timezone
+
+from langchain_core.messages import AIMessage, HumanMessage
+
+from app.memory.chat_history_sqlite import SQLiteChatMessageHistory
+from app.memory.checkpointer_sqlite import SQLiteSaver
+
+USER_ID = "benchmark@example.com"
+HISTORY_TABLE = "BENCHMARK_MESSAGES_STORE"
+CHECKPOINT_TABLE = "BENCHMARK_SAVER"
+
+
+def _sqlite_backend(database_path: str, session_id: str):
+    history = SQLiteChatMessageHistory(
+        database_path=database_path,
+        user_id=USER_ID,
+        session_id=session_id,
+        message_timereceived=datetime.now(timezone.utc).isoformat(),
+        table_name=HISTORY_TABLE,
+    )
+    saver = SQLiteSaver(
+        database_path=database_path,
+        user_id=USER_ID,
+        session_id=session_id,
+        table_name=CHECKPOINT_TABLE,
+    )
+    return history, saver
+
+
+def _snowflake_backend(session_id: str):
+    from app.memory.chat_history_snowflake import SnowflakeChatMessageHistory
+    from app.memory.checkpointer_snowflake import SnowflakeSaver
+
+    connection_parameters = {
+        "account": os.environ["SF_MAIN_ACCOUNT"],
+        "user": os.environ["SF_MAIN_USER"],
+        "password": os.environ["SF_MAIN_PASSWORD"],
+        "role": os.environ.get("SF_MAIN_ROLE"),
+        "warehouse": os.environ.get("SF_MAIN_WH"),
+        "database": os.environ["SF_MAIN_DB"],
+        "schema": os.environ["SF_MAIN_SCHEMA"],
+    }
+    history = SnowflakeChatMessageHistory(
+        connection_parameters=connection_parameters,
+        user_id=USER_ID,
+        session_id=session_id,
+        message_timereceived=datetime.now(timezone.utc).isoformat(),
+        table_name=HISTORY_TABLE,
+    )
+    saver = SnowflakeSaver(
+        connection_parameters=connection_parameters,
+        user_id=USER_ID,
+        session_id=session_id,
+        table_name=CHECKPOINT_TABLE,
+    )
+    return history, saver
+
+
+async def _run_turns(history, saver, turns: int) -> list:
+    durations = []
+    for turn in range(turns):
+        start = time.perf_counter()
+        await history.aget_messages()
+        await history.aadd_messages(
+            [
+                HumanMessage(content=f"Question {turn} about the travel policy?"),
+                AIMessage(content=f"Answer {turn}: " + "policy text " * 50),
+            ]
+        )
+        saver.update_checkpoint(
+            latest={"LatestGeneratedPDFFileName": f"report_{turn}.pdf"},
+            appended={"ListGeneratedPDFFileName": f"report_{turn}.pdf"},
+        )
+        durations.append(time.perf_counter() - start)
+
+    await history.aclear()
+    saver.clear()
+    return durations
+
+
+def _report(name: str, durations: list):
+    ordered = sorted(durations)
+    p95 = ordered[max(0, int(len(ordered) * 0.95) - 1)]
+    print(
+        f"{name:<10} turns={len(durations):<4} "
+        f"mean={statistics.mean(durations) * 1000:8.2f} ms  "
+        f"p50={statistics.median(durations) * 1000:8.2f} ms  "
+        f"p95={p95 * 1000:8.2f} ms"
+    )
+
+
+async def main(turns: int):
+    session_id = f"benchmark-{uuid.uuid4().hex}"
+
+    with tempfile.TemporaryDirectory() as directory:
+        history, saver = _sqlite_backend(
+            os.path.join(directory, "memory.sqlite3"), session_id
+        )
+        _report("sqlite", await _run_turns(history, saver, turns))
+
+    if os.getenv("SF_MAIN_ACCOUNT"):
+        history, saver = _snowflake_backend(session_id)
+        _report("snowflake", await _run_turns(history, saver, turns))
+    else:
+        print("snowflake  skipped, SF_MAIN_* credentials are not set")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--turns", type=int, default=50)
+    args = parser.parse_args()
+    asyncio.run(main(args.turns))
@@ -0,0 +1,87 @@
+"""
+Measure the SSE frames and CPU spent per streamed answer, with and without coalescing.
+
+A synthetic `astream_events` stream emits a context event, then one answer event
+per word, either as a burst (like `final_answer` replaying a buffered answer) or
+spaced like LLM tokens (like stream-first generation). Each yielded frame is
+serialized and written the way the custom stream endpoints do, with the network
+write reduced to a yield to the event loop.
+
+Usage:
+    python -m benchmarks.bench_sse_coalescing --answers 50 --words 400
+"""
+
+import argparse
+import asyncio
+import json
+import time
+
+from app.helpers.sse_coalescer import coalesce_answer_events
+
+CONTEXT = [{"page_content": "Travel policy " * 40, "metadata": {"source": "a.pdf"}}]
+
+
+async def astream_events(words: int, token_interval: float):
+    yield {"event": "on_custom_event", "data": {"context": CONTEXT}}
+    for i in range(words):
+        if token_interval:
+            await asyncio.sleep(token_interval)
+        yield {"event": "on_custom_event", "data": {"answer": f"word{i} "}}
+
+
+async def custom_events(words: int, token_interval: float):
+    async for event in astream_events(words, token_interval):
+        if event["event"] == "on_custom_event":
+            data = event["data"]
+            if data:
+                yield data
+
+
+async def stream_answer(frames, words: int, token_interval: float) -> int:
+    count = 0
+    async for data in frames(custom_events(words, token_interval)):
+        frame = f"event: data\ndata: {json.dumps(data)}\n\n".encode()
+        await asyncio.sleep(0)
+        count += len(frame) > 0
+    return count
+
+
+async def passthrough(events):
+    async for data in events:
+        yield data
+
+
+async def run(name: str, frames, answers: int, words: int, token_interval: float):
+    total_frames = 0
+    wall = time.perf_counter()
+    cpu = time.process_time()
+    for _ in range(answers):
+        total_frames += await stream_answer(frames, words, token_interval)
+    cpu = time.process_time() - cpu
+    wall = time.perf_counter() - wall
+    print(
+        f"{name:<7} frames/answer={total_frames / answers:7.1f}  "
+        f"frames/sec={total_frames / wall:10.0f}  "
+        f"cpu/answer={cpu / answers * 1000:7.2f} ms"
+    )
+
+
+async def main(answers: int, words: int, token_interval: float):
+    for label, interval in (("burst", 0.0), ("tokens", token_interval)):
+        print(f"{label}: {words} words per answer")
+        await run("before", passthrough, answers, words, interval)
+        await run("after", coalesce_answer_events, answers, words, interval)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--answers", type=int, default=50)
+    parser.add_argument("--words", type=int, default=400)
+    parser.add_argument(
+        "--token-interval",
+        type=float,
+        default=0.002,
+        help="seconds between answer events of the token-spaced stream",
+    )
+    args = parser.parse_args()
+    asyncio.run(main(args.answers, args.words, args.token_interval))
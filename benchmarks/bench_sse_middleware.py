@@ -0,0 +1,133 @@
+"""
+Measure the overhead of the request logging middleware on SSE token streams.
+
+The same streaming endpoint is served behind the previous middleware stack
+(a BaseHTTPMiddleware reading the request body, below an @app.middleware("http")
+logger) and behind the pure ASGI RequestLoggingMiddleware. The ASGI app is
+driven directly, without a server, and each streamed event is timestamped when
+it reaches the outermost `send`. Request logs are discarded instead of shipped.
+
+Usage:
+    python -m benchmarks.bench_sse_middleware --requests 50 --events 500
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from app.helpers.utils import RequestLoggingMiddleware
+
+BODY = json.dumps(
+    {"input": {"query": "What is the travel policy?", "username": "a@example.com"}}
+).encode()
+
+
+class DiscardingShipper:
+    def submit(self, request_data: dict, message_timereceived: str, force=False):
+        json.dumps(request_data)
+
+
+class LegacyRequestLoggingMiddleware(BaseHTTPMiddleware):
+    """Previous request logger, without its Snowflake insert."""
+
+    async def dispatch(self, request: Request, call_next):
+        if request.method == "POST":
+            request_data = {"url": str(request.url), "body": await request.json()}
+            DiscardingShipper().submit(request_data, "")
+        return await call_next(request)
+
+
+def make_app(events: int, legacy: bool) -> FastAPI:
+    app = FastAPI()
+
+    @app.post("/stream")
+    async def stream(request: Request):
+        await request.json()
+
+        async def tokens():
+            for i in range(events):
+                await asyncio.sleep(0)
+                yield f"event: data\ndata: token {i}\n\n"
+
+        return StreamingResponse(tokens(), media_type="text/event-stream")
+
+    if legacy:
+        app.add_middleware(LegacyRequestLoggingMiddleware)
+
+        @app.middleware("http")
+        async def log_requests(request: Request, call_next):
+            response = await call_next(request)
+            return response
+
+    else:
+        app.add_middleware(RequestLoggingMiddleware, shipper=DiscardingShipper())
+
+    return app
+
+
+async def stream_once(app: FastAPI) -> list:
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "POST",
+        "scheme": "http",
+        "path": "/stream",
+        "raw_path": b"/stream",
+        "query_string": b"",
+        "root_path": "",
+        "headers": [(b"content-type", b"application/json")],
+        "client": ("127.0.0.1", 50000),
+        "server": ("127.0.0.1", 8080),
+    }
+    request_messages = [{"type": "http.request", "body": BODY, "more_body": False}]
+    timestamps = []
+
+    async def receive():
+        if request_messages:
+            return request_messages.pop(0)
+        await asyncio.sleep(3600)
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        if message["type"] == "http.response.body" and message.get("body"):
+            timestamps.append(time.perf_counter())
+
+    await app(scope, receive, send)
+    return timestamps
+
+
+async def run(name: str, app: FastAPI, requests: int):
+    events, gaps, elapsed = 0, [], 0.0
+    for _ in range(requests):
+        start = time.perf_counter()
+        timestamps = await stream_once(app)
+        elapsed += timestamps[-1] - start
+        events += len(timestamps)
+        gaps.extend(b - a for a, b in zip(timestamps, timestamps[1:]))
+
+    gaps.sort()
+    print(
+        f"{name:<7} events/sec={events / elapsed:10.0f}  "
+        f"inter-token p50={statistics.median(gaps) * 1e6:7.1f} us  "
+        f"p99={gaps[int(len(gaps) * 0.99)] * 1e6:7.1f} us"
+    )
+
+
+async def main(requests: int, events: int):
+    await run("before", make_app(events, legacy=True), requests)
+    await run("after", make_app(events, legacy=False), requests)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--events", type=int, default=500)
+    args = parser.parse_args()
+    asyncio.run(main(args.requests, args.events))
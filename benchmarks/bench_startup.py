@@ -0,0 +1,103 @@
+"""
+Measure the cold start of the API server: import-time tree and time to healthy.
+
+The import of `app.server` is profiled with `python -X importtime` in a fresh
+interpreter and the slowest top-level packages are printed with their cumulative
+import time. The server is then started with uvicorn and polled until `/health`
+answers (time to healthy) and until `/health/agents` reports every enabled agent
+built (time to agents ready). Agents, warmup and backends are configured by the
+usual environment variables, e.g. ENABLED_AGENTS and MEMORY_BACKEND.
+
+Usage:
+    python -m benchmarks.bench_startup --top 20 --port 8765
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from collections import defaultdict
+
+
+def profile_imports(top: int):
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.server"],
+        capture_output=True,
+        text=True,
+        env=os.environ.copy(),
+    )
+    if result.returncode != 0:
+        print(result.stderr[-2000:])
+        raise SystemExit("Unable to import app.server")
+
+    # import time: self [us] | cumulative | imported package
+    packages = defaultdict(int)
+    total = 0
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        _, cumulative, name = line[len("import time:") :].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        if depth == 0:
+            root = name.strip().split(".")[0]
+            packages[root] += int(cumulative)
+            total += int(cumulative)
+
+    print(f"import app.server: {total / 1e6:.2f} s")
+    for name, cumulative in sorted(packages.items(), key=lambda item: -item[1])[:top]:
+        print(f"  {name:<40} {cumulative / 1e6:7.3f} s")
+
+
+def get(url: str):
+    try:
+        with urllib.request.urlopen(url, timeout=1) as response:
+            return response.status, json.loads(response.read() or b"null")
+    except (urllib.error.URLError, ConnectionError, TimeoutError, ValueError):
+        return None, None
+
+
+def measure_startup(port: int, timeout: float):
+    base_url = f"http://127.0.0.1:{port}"
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.server:app", "--port", str(port)],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        env=os.environ.copy(),
+    )
+    healthy = ready = None
+    try:
+        while time.perf_counter() - start < timeout:
+            if server.poll() is not None:
+                raise SystemExit(f"Server exited with code {server.returncode}")
+            elapsed = time.perf_counter() - start
+            if healthy is None:
+                status, _ = get(f"{base_url}/health")
+                if status == 200:
+                    healthy = elapsed
+            else:
+                status, stats = get(f"{base_url}/health/agents")
+                if status == 200 and stats["ready"]:
+                    ready = elapsed
+                    break
+            time.sleep(0.05)
+    finally:
+        server.terminate()
+        server.wait()
+
+    print(f"time to healthy:      {healthy:.2f} s" if healthy else "never healthy")
+    print(f"time to agents ready: {ready:.2f} s" if ready else "agents never ready")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--timeout", type=float, default=600.0)
+    args = parser.parse_args()
+    profile_imports(args.top)
+    measure_startup(args.port, args.timeout)
@@ -0,0 +1,134 @@
+"""
+Tests for the lazy agent registry.
+"""
+
+import types
+
+import pytest
+from fastapi import APIRouter, Depends, FastAPI, HTTPException, Request
+from fastapi.testclient import TestClient
+
+from app.api import agent_registry as agent_registry_module
+from app.api.agent_registry import AgentRegistry
+
+API_KEY = "test_key"
+
+
+def check_api_key(request: Request):
+    if request.headers.get("Authorization") != API_KEY:
+        raise HTTPException(status_code=401, detail="Invalid or missing API Key")
+
+
+def make_agent_module() -> types.ModuleType:
+    router = APIRouter()
+
+    @router.post("/generalagent/generalagent_rag/invoke")
+    async def invoke(payload: dict):
+        return {"output": payload["input"]}
+
+    @router.get("/generalagent/generalagent_rag/input_schema")
+    async def input_schema():
+        return {"title": "Input"}
+
+    return types.SimpleNamespace(router=router)
+
+
+@pytest.fixture
+def imports(monkeypatch):
+    imports = []
+
+    def import_module(name):
+        imports.append(name)
+        return make_agent_module()
+
+    monkeypatch.setattr(agent_registry_module.importlib, "import_module", import_module)
+    return imports
+
+
+@pytest.fixture
+def bootstraps(monkeypatch):
+    bootstraps = []
+    monkeypatch.setattr(
+        agent_registry_module,
+        "bootstrap_snowflake_tables",
+        lambda: bootstraps.append(True),
+    )
+    return bootstraps
+
+
+@pytest.fixture
+def registry(imports, bootstraps):
+    app = FastAPI()
+    registry = AgentRegistry(enabled=["general"])
+    registry.register(app, prefix="/api/v1", dependencies=[Depends(check_api_key)])
+    registry.client = TestClient(app, headers={"Authorization": API_KEY})
+    return registry
+
+
+class TestAgentRegistry:
+    """Tests for AgentRegistry functionality."""
+
+    def test_first_request_builds_agent_and_reaches_its_route(
+        self, registry, imports, bootstraps
+    ):
+        response = registry.client.post(
+            "/api/v1/generalagent/generalagent_rag/invoke", json={"input": "hi"}
+        )
+
+        assert response.status_code == 200
+        assert response.json() == {"output": "hi"}
+        assert imports == ["app.api.endpoints.agent-general"]
+        assert bootstraps == [True]
+        assert registry.is_ready("general")
+
+    def test_agent_is_built_once(self, registry, imports):
+        for _ in range(3):
+            registry.client.post(
+                "/api/v1/generalagent/generalagent_rag/invoke", json={"input": "hi"}
+            )
+
+        assert len(imports) == 1
+
+    def test_get_routes_trigger_the_build(self, registry, imports):
+        response = registry.client.get(
+            "/api/v1/generalagent/generalagent_rag/input_schema"
+        )
+
+        assert response.status_code == 200
+        assert response.json() == {"title": "Input"}
+        assert len(imports) == 1
+
+    def test_unauthenticated_requests_do_not_build_agent(self, registry, imports):
+        response = registry.client.post(
+            "/api/v1/generalagent/generalagent_rag/invoke",
+            json={"input": "hi"},
+            headers={"Authorization": "wrong_key"},
+        )
+
+        assert response.status_code == 401
+        assert imports == []
+        assert not registry.is_ready("general")
+
+    def test_unknown_route_of_built_agent_is_not_found(self, registry):
+        registry.client.post(
+            "/api/v1/generalagent/generalagent_rag/invoke", json={"input": "hi"}
+        )
+
+        response = registry.client.post("/api/v1/generalagent/unknown/invoke")
+
+        assert response.status_code == 404
+
+    def test_failed_build_is_unavailable(self, registry, monkeypatch):
+        def import_module(name):
+            raise ImportError("Qdrant is unreachable")
+
+        monkeypatch.setattr(
+            agent_registry_module.importlib, "import_module", import_module
+        )
+
+        response = registry.client.post(
+            "/api/v1/generalagent/generalagent_rag/invoke", json={"input": "hi"}
+        )
+
+        assert response.status_code == 503
+        assert registry.stats()["agents"]["general"]["state"] == "failed"
@@ -0,0 +1,178 @@
+"""
+Tests for the request logging middleware.
+"""
+
+import asyncio
+from unittest.mock import MagicMock
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from starlette.responses import StreamingResponse
+
+from app.helpers.request_log_shipper import RequestLogShipper
+from app.helpers.utils import RequestLoggingMiddleware
+
+
+def make_app(shipper, events: list) -> FastAPI:
+    app = FastAPI()
+
+    @app.post("/echo")
+    async def echo(payload: dict):
+        return payload
+
+    @app.get("/stream")
+    async def stream():
+        async def generate():
+            for i in range(3):
+                events.append(f"produced {i}")
+                yield f"data: {i}\n\n"
+
+        return StreamingResponse(generate(), media_type="text/event-stream")
+
+    @app.post("/fail")
+    async def fail(payload: dict):
+        raise RuntimeError("Qdrant is unreachable")
+
+    app.add_middleware(RequestLoggingMiddleware, shipper=shipper)
+    return app
+
+
+class RecordSends:
+    """ASGI wrapper recording the response body chunks as they are sent."""
+
+    def __init__(self, app, events: list):
+        self.app = app
+        self.events = events
+
+    async def __call__(self, scope, receive, send):
+        async def record(message):
+            if message["type"] == "http.response.body" and message.get("body"):
+                self.events.append(f"sent {message['body'].decode().strip()}")
+            await send(message)
+
+        await self.app(scope, receive, record)
+
+
+def make_aborted_stream(abort: BaseException = None):
+    """ASGI app sending the first chunk of a stream and then stopping."""
+
+    async def app(scope, receive, send):
+        await receive()
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send(
+            {"type": "http.response.body", "body": b"data: 0\n\n", "more_body": True}
+        )
+        if abort is not None:
+            raise abort
+
+    return app
+
+
+async def call(app):
+    scope = {
+        "type": "http",
+        "method": "POST",
+        "path": "/stream",
+        "raw_path": b"/stream",
+        "query_string": b"",
+        "headers": [(b"host", b"testserver")],
+        "scheme": "http",
+        "server": ("testserver", 80),
+        "client": ("testclient", 50000),
+    }
+
+    async def receive():
+        return {"type": "http.request", "body": b'{"input": {}}', "more_body": False}
+
+    async def send(message):
+        pass
+
+    await app(scope, receive, send)
+
+
+class TestRequestLoggingMiddleware:
+    """Tests for RequestLoggingMiddleware functionality."""
+
+    @pytest.fixture
+    def shipper(self):
+        shipper = MagicMock(spec=RequestLogShipper)
+        shipper.redact_url.side_effect = lambda url: url
+        return shipper
+
+    @pytest.fixture
+    def events(self):
+        return []
+
+    @pytest.fixture
+    def client(self, shipper, events):
+        app = make_app(shipper, events)
+        return TestClient(RecordSends(app, events), raise_server_exceptions=False)
+
+    def test_body_reaches_the_endpoint_and_is_logged_once(self, client, shipper):
+        response = client.post("/echo", json={"input": {"query": "Hi"}})
+
+        assert response.json() == {"input": {"query": "Hi"}}
+        shipper.submit.assert_called_once()
+        request_data, _ = shipper.submit.call_args.args
+        assert request_data["body"] == {"input": {"query": "Hi"}}
+        assert request_data["method"] == "POST"
+
+    def test_streamed_response_is_not_buffered(self, client, shipper, events):
+        response = client.get("/stream")
+
+        assert response.text == "data: 0\n\ndata: 1\n\ndata: 2\n\n"
+        # Each chunk is sent before the next one is produced
+        assert events == [
+            "produced 0",
+            "sent data: 0",
+            "produced 1",
+            "sent data: 1",
+            "produced 2",
+            "sent data: 2",
+        ]
+
+    def test_get_requests_are_not_logged(self, client, shipper):
+        client.get("/stream")
+
+        shipper.submit.assert_not_called()
+
+    def test_failed_request_is_logged_once_with_error(self, client, shipper):
+        response = client.post("/fail", json={"input": {}})
+
+        assert response.status_code == 500
+        shipper.submit.assert_called_once()
+        request_data, _ = shipper.submit.call_args.args
+        assert request_data["error"] == {
+            "API Endpoint Exception": "Qdrant is unreachable"
+        }
+        assert shipper.submit.call_args.kwargs == {"force": True}
+
+    @pytest.mark.asyncio
+    async def test_stream_stopped_by_client_disconnect_is_logged(self, shipper):
+        app = RequestLoggingMiddleware(make_aborted_stream(), shipper=shipper)
+
+        await call(app)
+
+        shipper.submit.assert_called_once()
+        request_data, _ = shipper.submit.call_args.args
+        assert request_data["body"] == {"input": {}}
+        assert request_data["error"] == {
+            "API Endpoint Exception": "Response was not completed"
+        }
+
+    @pytest.mark.asyncio
+    async def test_cancelled_stream_is_logged(self, shipper):
+        app = RequestLoggingMiddleware(
+            make_aborted_stream(asyncio.CancelledError()), shipper=shipper
+        )
+
+        with pytest.raises(asyncio.CancelledError):
+            await call(app)
+
+        shipper.submit.assert_called_once()
+        request_data, _ = shipper.submit.call_args.args
+        assert request_data["error"] == {
+            "API Endpoint Exception": "Response was not completed"
+        }
+        assert shipper.submit.call_args.kwargs == {"force": True}
@@ -0,0 +1,133 @@
+"""
+Tests for the routing of graded generations.
+"""
+
+import logging
+from unittest.mock import MagicMock, patch
+
+import pytest
+from langchain_core.documents import Document
+from langchain_core.language_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.runnables import RunnableLambda
+
+from app.graph import utils_graph_edge
+from app.graph.utils_graph_edge import decide_how_to_respond
+from app.model.grader_model import GradeGeneration
+
+STATE = {
+    "query": "How many days of leave?",
+    "timestamp": "2026-01-01 00:00:00",
+    "chat_history": [],
+    "enterprise_context": "",
+    "image_context": "",
+    "context": [Document(page_content="Leave is 30 days.")],
+    "answer": AIMessage(content="Employees get 30 days of leave."),
+    "num_generations": 1,
+}
+
+
+def make_grader(grounded_score: str, useful_score: str) -> RunnableLambda:
+    """Combined grader recording its inputs and returning the given scores."""
+
+    def grade(grader_input: dict) -> GradeGeneration:
+        grader.inputs.append(grader_input)
+        return GradeGeneration(grounded_score=grounded_score, useful_score=useful_score)
+
+    grader = RunnableLambda(grade)
+    grader.inputs = []
+    return grader
+
+
+@pytest.fixture
+def separate_graders():
+    with (
+        patch.object(
+            utils_graph_edge, "hallucination_grader", MagicMock()
+        ) as hallucination_grader,
+        patch.object(utils_graph_edge, "answer_grader", MagicMock()) as answer_grader,
+    ):
+        yield hallucination_grader, answer_grader
+
+
+class TestDecideHowToRespond:
+    """Tests for decide_how_to_respond with the combined generation grader."""
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize(
+        "grounded_score, useful_score, decision",
+        [
+            ("yes", "yes", "useful"),
+            ("yes", "no", "not useful"),
+            ("no", "yes", "not supported"),
+            ("no", "no", "not supported"),
+        ],
+    )
+    async def test_scores_are_routed(
+        self, separate_graders, grounded_score, useful_score, decision
+    ):
+        grader = make_grader(grounded_score, useful_score)
+
+        with patch.object(utils_graph_edge, "generation_grader", grader):
+            assert await decide_how_to_respond(STATE, combined_grader=True) == decision
+
+        # Grounding and usefulness are graded in a single call
+        assert len(grader.inputs) == 1
+        for separate_grader in separate_graders:
+            separate_grader.ainvoke.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_answer_is_graded_against_packed_context(self, separate_graders):
+        grader = make_grader("yes", "yes")
+        packed_context = [Document(page_content="30 days.")]
+        state = {**STATE, "packed_context": packed_context}
+
+        with patch.object(utils_graph_edge, "generation_grader", grader):
+            await decide_how_to_respond(state, combined_grader=True)
+
+        assert grader.inputs[0]["context"] == packed_context
+        assert grader.inputs[0]["generation"] == STATE["answer"]
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("num_generations", [3, 4])
+    async def test_too_many_generations_request_a_refined_query(
+        self, separate_graders, num_generations
+    ):
+        grader = make_grader("yes", "yes")
+        state = {**STATE, "num_generations": num_generations}
+
+        with patch.object(utils_graph_edge, "generation_grader", grader):
+            decision = await decide_how_to_respond(state, combined_grader=True)
+
+        assert decision == "need refined query"
+        assert grader.inputs == []
+
+    @pytest.mark.asyncio
+    async def test_last_allowed_generation_is_graded(self, separate_graders):
+        grader = make_grader("yes", "yes")
+        state = {**STATE, "num_generations": 2}
+
+        with patch.object(utils_graph_edge, "generation_grader", grader):
+            assert await decide_how_to_respond(state, combined_grader=True) == "useful"
+
+    @pytest.mark.asyncio
+    async def test_grader_input_tokens_are_logged(self, separate_graders, caplog):
+        score = AIMessage(
+            content='{"grounded_score": "yes", "useful_score": "yes"}',
+            response_metadata={"model_name": "grader"},
+            usage_metadata={"input_tokens": 42, "output_tokens": 8, "total_tokens": 50},
+        )
+        grader = (
+            RunnableLambda(lambda grader_input: grader_input["query"])
+            | GenericFakeChatModel(messages=iter([score]))
+            | RunnableLambda(
+                lambda message: GradeGeneration.model_validate_json(message.content)
+            )
+        )
+
+        with patch.object(utils_graph_edge, "generation_grader", grader):
+            with caplog.at_level(logging.INFO, logger=utils_graph_edge.__name__):
+                decision = await decide_how_to_respond(STATE, combined_grader=True)
+
+        assert decision == "useful"
+        assert "Generation grader input tokens: 42" in caplog.text
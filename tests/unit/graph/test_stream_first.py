@@ -0,0 +1,173 @@
+"""
+Tests for the stream-first generation of RAG answers.
+"""
+
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from langchain_core.documents import Document
+from langchain_core.language_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage
+
+from app.config import config as app_config
+from app.graph import response_graph_node, utils_graph_node
+from app.graph.response_graph_node import (
+    generate,
+    request_refined_query,
+    retract_streamed_answer,
+)
+from app.graph.utils_graph_node import final_answer
+
+ANSWER = "Employees get 30 days of leave."
+
+STATE = {
+    "query": "How many days of leave?",
+    "username": "John Doe",
+    "timestamp": "2026-01-01 00:00:00",
+    "image_type_data": ([], []),
+    "chat_history": [],
+    "enterprise_context": "",
+    "context": [Document(page_content="Leave is 30 days.")],
+}
+
+
+def make_chat_model(*answers: str) -> GenericFakeChatModel:
+    """Chat model streaming each answer word by word."""
+    return GenericFakeChatModel(messages=iter([AIMessage(content=a) for a in answers]))
+
+
+def event_names(dispatch: AsyncMock) -> list:
+    return [call.args[0] for call in dispatch.call_args_list]
+
+
+def streamed_answer(dispatch: AsyncMock) -> str:
+    return "".join(
+        call.args[1]["answer"]
+        for call in dispatch.call_args_list
+        if call.args[0] == "final_answer"
+    )
+
+
+@pytest.fixture
+def dispatch():
+    dispatch = AsyncMock()
+    with (
+        patch.object(response_graph_node, "adispatch_custom_event", dispatch),
+        patch.object(utils_graph_node, "adispatch_custom_event", dispatch),
+    ):
+        yield dispatch
+
+
+@pytest.fixture(autouse=True)
+def no_context_packing():
+    with patch.dict(app_config.context_packer_kwargs, {"enabled": False}):
+        yield
+
+
+class TestStreamFirstGeneration:
+    """Tests for the stream-first mode of the generate node."""
+
+    @pytest.mark.asyncio
+    async def test_answer_is_streamed_while_generated(self, dispatch):
+        with patch.object(response_graph_node, "chat_model", make_chat_model(ANSWER)):
+            result = await generate(STATE, {}, stream_first=True)
+
+        assert event_names(dispatch)[0] == "final_context"
+        assert streamed_answer(dispatch) == ANSWER
+        assert result["answer"].content == ANSWER
+        assert result["answer_streamed"]
+        assert result["num_generations"] == 1
+
+    @pytest.mark.asyncio
+    async def test_answer_is_not_streamed_by_default(self, dispatch):
+        with (
+            patch.object(response_graph_node, "chat_model", make_chat_model(ANSWER)),
+            patch.dict(app_config.stream_first_kwargs, {"enabled": False}),
+        ):
+            result = await generate(STATE, {})
+
+        dispatch.assert_not_called()
+        assert result["answer"].content == ANSWER
+        assert not result["answer_streamed"]
+
+    @pytest.mark.asyncio
+    async def test_regenerated_answer_retracts_the_streamed_one(self, dispatch):
+        state = {**STATE, "answer_streamed": True, "num_generations": 1}
+
+        with patch.object(
+            response_graph_node, "chat_model", make_chat_model("30 days.")
+        ):
+            result = await generate(state, {}, stream_first=True)
+
+        assert event_names(dispatch)[:2] == ["final_answer_retract", "final_context"]
+        assert dispatch.call_args_list[0].args[1] == {
+            "retract_answer": True,
+            "reason": "regenerating answer",
+        }
+        assert streamed_answer(dispatch) == "30 days."
+        assert result["num_generations"] == 2
+
+
+class TestRetractStreamedAnswer:
+    """Tests for the retraction of streamed answers."""
+
+    @pytest.mark.asyncio
+    async def test_answer_not_streamed_is_not_retracted(self, dispatch):
+        await retract_streamed_answer({"answer_streamed": False}, {}, "failed")
+        await retract_streamed_answer({}, {}, "failed")
+
+        dispatch.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_failed_grade_retracts_the_streamed_answer(self, dispatch):
+        state = {**STATE, "answer_streamed": True}
+
+        with patch.object(
+            response_graph_node, "chat_model", make_chat_model("Please rephrase.")
+        ):
+            await request_refined_query(state, {})
+
+        assert event_names(dispatch)[0] == "final_answer_retract"
+        assert dispatch.call_args_list[0].args[1] == {
+            "retract_answer": True,
+            "reason": "could not generate a grounded answer",
+        }
+        assert streamed_answer(dispatch) == "Please rephrase."
+
+
+class TestFinalAnswerReplay:
+    """Tests for the replay of the answer by the final answer node."""
+
+    @pytest.mark.asyncio
+    async def test_streamed_answer_is_not_replayed(self, dispatch):
+        state = {**STATE, "answer": AIMessage(content=ANSWER), "answer_streamed": True}
+
+        await final_answer(state, {})
+
+        dispatch.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_buffered_answer_is_replayed(self, dispatch):
+        state = {**STATE, "answer": AIMessage(content=ANSWER)}
+
+        await final_answer(state, {})
+
+        assert event_names(dispatch)[0] == "final_context"
+        assert streamed_answer(dispatch).strip() == ANSWER
+
+    @pytest.mark.asyncio
+    async def test_streamed_answer_is_still_cached(self, dispatch):
+        semantic_cache_key = {"query": STATE["query"]}
+        state = {
+            **STATE,
+            "answer": AIMessage(content=ANSWER),
+            "answer_streamed": True,
+            "semantic_cache_key": semantic_cache_key,
+        }
+
+        with patch.object(utils_graph_node, "semantic_answer_cache") as cache:
+            await final_answer(state, {})
+
+        cache.store.assert_called_once_with(
+            **semantic_cache_key, answer=ANSWER, context=STATE["context"]
+        )
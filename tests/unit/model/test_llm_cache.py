@@ -0,0 +1,124 @@
+"""
+Tests for the LLM response store.
+"""
+
+import sqlite3
+from unittest.mock import patch
+
+import pytest
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration
+
+from app.llm_model.llm_cache import (
+    LLMResponseCache,
+    LLMResponseStore,
+    get_llm_cache_stats,
+)
+
+
+def generation(content: str) -> list:
+    return [ChatGeneration(message=AIMessage(content=content))]
+
+
+def count_rows(database_path: str) -> int:
+    with sqlite3.connect(database_path) as connection:
+        return connection.execute("SELECT COUNT(*) FROM LLM_CACHE;").fetchone()[0]
+
+
+class TestLLMResponseStore:
+    """Tests for LLMResponseStore functionality."""
+
+    @pytest.fixture
+    def database_path(self, tmp_path):
+        return str(tmp_path / "llm_cache.sqlite3")
+
+    def make_store(self, database_path=None, **kwargs):
+        kwargs = {"ttl": 60, "max_entries": 2, "trim_every": 2, **kwargs}
+        return LLMResponseStore("grader_model", database_path, **kwargs)
+
+    def test_memory_hit(self):
+        store = self.make_store()
+
+        store.set("key", generation("yes"))
+
+        assert store.get("key")[0].message.content == "yes"
+
+    def test_memory_only_by_default(self):
+        store = self.make_store()
+
+        store.set("key", generation("yes"))
+        store.flush()
+
+        assert store._connection is None
+
+    def test_disk_hit_after_restart(self, database_path):
+        store = self.make_store(database_path)
+        store.set("key", generation("yes"))
+        store.flush()
+
+        restarted = self.make_store(database_path)
+
+        assert restarted.get_from_memory("key") is None
+        assert restarted.get("key")[0].message.content == "yes"
+        # Loaded back into memory
+        assert restarted.get_from_memory("key") is not None
+
+    def test_miss_after_ttl(self, database_path):
+        store = self.make_store(database_path)
+        with patch("app.llm_model.llm_cache.time.time", return_value=0):
+            store.set("key", generation("yes"))
+            store.flush()
+        with patch("app.llm_model.llm_cache.time.time", return_value=61):
+            assert store.get("key") is None
+
+    def test_memory_keeps_most_recently_used(self):
+        store = self.make_store()
+        store.set("first", generation("1"))
+        store.set("second", generation("2"))
+        store.get("first")
+
+        store.set("third", generation("3"))
+
+        assert store.get("first") is not None
+        assert store.get("second") is None
+
+    def test_disk_is_trimmed_every_n_writes(self, database_path):
+        store = self.make_store(database_path, trim_every=3)
+        for i in range(3):
+            store.set(f"key-{i}", generation(str(i)))
+        store.flush()
+        assert count_rows(database_path) == 2
+
+        store.set("key-3", generation("3"))
+        store.flush()
+        assert count_rows(database_path) == 3
+
+    def test_clear(self, database_path):
+        store = self.make_store(database_path)
+        store.set("key", generation("yes"))
+
+        store.clear()
+
+        assert store.get("key") is None
+        assert count_rows(database_path) == 0
+
+
+class TestLLMResponseCache:
+    """Tests for LLMResponseCache functionality."""
+
+    @pytest.mark.asyncio
+    async def test_hits_and_misses_are_counted(self):
+        cache = LLMResponseCache(
+            LLMResponseStore("grader_model", None, ttl=60, max_entries=2),
+            chain_name="test_grader",
+        )
+
+        assert await cache.alookup("prompt", "llm") is None
+        await cache.aupdate("prompt", "llm", generation("yes"))
+        assert (await cache.alookup("prompt", "llm"))[0].message.content == "yes"
+
+        assert get_llm_cache_stats()["test_grader"] == {
+            "hits": 1,
+            "misses": 1,
+            "hit_rate": 0.5,
+        }
@@ -0,0 +1,188 @@
+"""
+Tests for the in-process conversation history cache.
+"""
+
+from unittest.mock import patch
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage
+
+from app.memory.chat_history_snowflake import SnowflakeChatMessageHistory
+from app.memory.history_cache import HistoryCache
+
+KEY = ("HRAGENT_MESSAGES_STORE", "john.doe@example.com", "session-1")
+
+
+class TestHistoryCache:
+    """Tests for HistoryCache functionality."""
+
+    @pytest.fixture
+    def cache(self):
+        return HistoryCache(max_sessions=2, ttl=60, check_interval=0)
+
+    def test_miss_then_hit(self, cache):
+        assert cache.get(KEY, limit=4) is None
+
+        cache.put(KEY, 4, [HumanMessage(content="Hi")], cache.generation(KEY), 0.5, 1)
+        messages = cache.get(KEY, limit=4)
+
+        assert [m.content for m in messages] == ["Hi"]
+        assert cache.stats()["hits"] == 1
+        assert cache.stats()["snowflake_read_seconds_saved"] == 0.5
+
+    def test_append_keeps_last_messages(self, cache):
+        cache.put(KEY, 2, [HumanMessage(content="1")], cache.generation(KEY), 0.1, 1)
+
+        cache.append(KEY, [AIMessage(content="2"), HumanMessage(content="3")])
+
+        assert [m.content for m in cache.get(KEY, limit=2)] == ["2", "3"]
+
+    def test_stale_read_is_not_cached(self, cache):
+        generation = cache.generation(KEY)
+        cache.append(KEY, [HumanMessage(content="written meanwhile")])
+
+        cache.put(KEY, 4, [], generation, 0.1, 0)
+
+        assert cache.get(KEY, limit=4) is None
+
+    def test_reset_empties_entry(self, cache):
+        cache.put(KEY, 4, [HumanMessage(content="Hi")], cache.generation(KEY), 0.1, 1)
+
+        cache.reset(KEY)
+
+        assert cache.get(KEY, limit=4) == []
+
+    def test_evicts_least_recently_used_session(self, cache):
+        other = (KEY[0], KEY[1], "session-2")
+        third = (KEY[0], KEY[1], "session-3")
+        cache.put(KEY, 4, [], cache.generation(KEY), 0.1, 0)
+        cache.put(other, 4, [], cache.generation(other), 0.1, 0)
+        cache.get(KEY, limit=4)
+        cache.put(third, 4, [], cache.generation(third), 0.1, 0)
+
+        assert cache.get(other, limit=4) is None
+        assert cache.get(KEY, limit=4) == []
+
+    def test_entry_is_served_while_message_count_matches(self, cache):
+        cache.put(KEY, 4, [HumanMessage(content="1")], cache.generation(KEY), 0.1, 1)
+        cache.append(KEY, [AIMessage(content="2")])
+
+        messages = cache.get(KEY, limit=4, count_messages=lambda: 2)
+
+        assert [m.content for m in messages] == ["1", "2"]
+
+    def test_entry_written_by_another_replica_is_dropped(self, cache):
+        cache.put(KEY, 4, [HumanMessage(content="1")], cache.generation(KEY), 0.1, 1)
+
+        # Two messages were written while the session was on another replica
+        assert cache.get(KEY, limit=4, count_messages=lambda: 3) is None
+        assert cache.get(KEY, limit=4) is None
+        assert cache.stats()["stale"] == 1
+
+    def test_entry_cleared_by_another_replica_is_dropped(self, cache):
+        cache.put(KEY, 4, [HumanMessage(content="1")], cache.generation(KEY), 0.1, 1)
+
+        assert cache.get(KEY, limit=4, count_messages=lambda: 0) is None
+
+    def test_count_is_checked_once_per_interval(self, cache):
+        cache.ttl = 600
+        cache.check_interval = 30
+        counts = []
+
+        def count_messages():
+            counts.append(True)
+            return 1
+
+        with patch("app.memory.history_cache.time.monotonic", return_value=0):
+            cache.put(KEY, 4, [HumanMessage(content="1")], cache.generation(KEY), 1, 1)
+        for now in (10, 29, 30, 45, 60):
+            with patch("app.memory.history_cache.time.monotonic", return_value=now):
+                assert cache.get(KEY, limit=4, count_messages=count_messages)
+
+        # Checked at 30 and 60
+        assert len(counts) == 2
+
+    def test_saved_read_seconds_exclude_count_checks(self, cache):
+        with patch("app.memory.history_cache.time.monotonic", return_value=0):
+            cache.get(KEY, limit=4)
+            cache.put(KEY, 4, [], cache.generation(KEY), 0.5, 0)
+        with patch("app.memory.history_cache.time.monotonic", side_effect=[10, 10.2]):
+            cache.get(KEY, limit=4, count_messages=lambda: 0)
+
+        assert cache.stats()["snowflake_check_seconds"] == 0.2
+        assert cache.stats()["snowflake_read_seconds_saved"] == 0.3
+
+    def test_writes_to_uncached_sessions_are_not_tracked(self, cache):
+        for i in range(10):
+            cache.append((KEY[0], KEY[1], f"session-{i}"), [HumanMessage(content="1")])
+
+        assert cache._generations == {}
+
+    def test_read_racing_with_write_to_uncached_session_is_not_cached(self, cache):
+        generation = cache.generation(KEY)
+        cache.append(KEY, [HumanMessage(content="written meanwhile")])
+
+        cache.put(KEY, 4, [], generation, 0.1, 0)
+
+        assert cache.get(KEY, limit=4) is None
+
+    def test_read_racing_with_expiry_and_write_is_not_cached(self, cache):
+        cache.put(KEY, 4, [], cache.generation(KEY), 0.1, 0)
+        cache.append(KEY, [HumanMessage(content="1")])
+        generation = cache.generation(KEY)
+        with patch("app.memory.history_cache.time.monotonic", return_value=1e9):
+            assert cache.get(KEY, limit=4) is None
+        cache.put(KEY, 4, [], cache.generation(KEY), 0.1, 0)
+        cache.append(KEY, [HumanMessage(content="2")])
+
+        cache.put(KEY, 4, [], generation, 0.1, 0)
+
+        assert [m.content for m in cache.get(KEY, limit=4)] == ["2"]
+
+
+class TestSnowflakeChatMessageHistoryCache:
+    """Tests for the history cache of SnowflakeChatMessageHistory."""
+
+    @pytest.fixture
+    def cache(self):
+        cache = HistoryCache(max_sessions=2, ttl=60, check_interval=0)
+        with patch("app.memory.chat_history_snowflake.history_cache", cache):
+            yield cache
+
+    @pytest.fixture
+    def history(self, cache):
+        with patch("app.memory.chat_history_snowflake.get_snowflake_pool"):
+            history = SnowflakeChatMessageHistory(
+                connection_parameters={},
+                user_id=KEY[1],
+                session_id=KEY[2],
+                message_timereceived="2026-01-01 00:00:00",
+                table_name=KEY[0],
+                max_len_history=2,
+            )
+        history.use_cache = True
+        return history
+
+    def test_session_back_from_another_replica_is_read_again(self, history):
+        stored = [HumanMessage(content="1"), AIMessage(content="2")]
+        with (
+            patch.object(
+                SnowflakeChatMessageHistory,
+                "_select_messages",
+                side_effect=lambda: (list(stored), len(stored)),
+            ) as select,
+            patch.object(
+                SnowflakeChatMessageHistory,
+                "_count_messages",
+                side_effect=lambda: len(stored),
+            ),
+        ):
+            assert [m.content for m in history.messages] == ["1", "2"]
+            assert [m.content for m in history.messages] == ["1", "2"]
+            assert select.call_count == 1
+
+            # Written while the session was on another replica
+            stored.append(HumanMessage(content="3"))
+
+            assert [m.content for m in history.messages] == ["1", "2", "3"]
+            assert select.call_count == 2
@@ -0,0 +1,138 @@
+"""
+Tests for the write-behind buffer of chat history messages.
+"""
+
+import json
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage
+
+from app.memory.history_write_buffer import HistoryWriteBuffer
+
+TABLE = "HRAGENT_MESSAGES_STORE"
+
+
+@pytest.fixture
+def pool():
+    pool = MagicMock()
+    pool.connection_parameters = {"database": "TEST_DB", "schema": "TEST_SCHEMA"}
+    return pool
+
+
+@pytest.fixture
+def inserts():
+    inserts = []
+    with patch.object(
+        HistoryWriteBuffer,
+        "insert_rows",
+        side_effect=lambda rows: inserts.append(list(rows)),
+    ):
+        yield inserts
+
+
+def make_rows(pool, session_id, *contents, table_name=TABLE):
+    return HistoryWriteBuffer.make_rows(
+        pool=pool,
+        table_name=table_name,
+        create_table_statement="CREATE TABLE",
+        user_id="john.doe@example.com",
+        session_id=session_id,
+        message_timereceived="2026-01-01 00:00:00",
+        messages=[
+            HumanMessage(content=content) if i % 2 == 0 else AIMessage(content=content)
+            for i, content in enumerate(contents)
+        ],
+    )
+
+
+def contents(rows):
+    return [json.loads(row["history"])["data"]["content"] for row in rows]
+
+
+class TestHistoryWriteBuffer:
+    """Tests for HistoryWriteBuffer functionality."""
+
+    @pytest.fixture
+    def buffer(self, tmp_path):
+        # Long enough that only explicit flushes write in the tests
+        buffer = HistoryWriteBuffer(
+            flush_interval=60,
+            max_batch_size=100,
+            max_attempts=2,
+            dead_letter_path=str(tmp_path / "dead_letter.jsonl"),
+        )
+        yield buffer
+        buffer._stopped.set()
+        buffer._wakeup.set()
+
+    def test_sessions_of_a_table_are_written_in_one_batch(self, buffer, pool, inserts):
+        buffer.enqueue(make_rows(pool, "session-1", "Hi", "Hello"))
+        buffer.enqueue(make_rows(pool, "session-2", "Hey"))
+        buffer.enqueue(make_rows(pool, "session-1", "Bye", table_name="OTHER_STORE"))
+
+        buffer.flush()
+
+        assert [contents(rows) for rows in inserts] == [["Hi", "Hello", "Hey"], ["Bye"]]
+
+    def test_messages_keep_their_order_across_failed_flushes(
+        self, buffer, pool, inserts
+    ):
+        buffer.enqueue(make_rows(pool, "session-1", "1", "2"))
+        with patch.object(
+            HistoryWriteBuffer, "insert_rows", side_effect=ConnectionError
+        ):
+            buffer.flush()
+        buffer.enqueue(make_rows(pool, "session-1", "3"))
+
+        buffer.flush()
+
+        assert [contents(rows) for rows in inserts] == [["1", "2", "3"]]
+
+    def test_flush_if_pending_reads_own_writes(self, buffer, pool, inserts):
+        buffer.enqueue(make_rows(pool, "session-1", "Hi"))
+
+        buffer.flush_if_pending(TABLE, "john.doe@example.com", "session-2")
+        assert inserts == []
+
+        buffer.flush_if_pending(TABLE, "john.doe@example.com", "session-1")
+        assert [contents(rows) for rows in inserts] == [["Hi"]]
+        assert not buffer.has_pending(TABLE, "john.doe@example.com", "session-1")
+
+    def test_full_buffer_is_flushed_early(self, buffer, pool, inserts):
+        buffer.max_batch_size = 2
+
+        buffer.enqueue(make_rows(pool, "session-1", "Hi", "Hello"))
+        # Written by the background thread, long before the flush interval
+        deadline = time.monotonic() + 5
+        while not inserts and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        assert [contents(rows) for rows in inserts] == [["Hi", "Hello"]]
+
+    def test_close_writes_queued_messages(self, buffer, pool, inserts):
+        buffer.enqueue(make_rows(pool, "session-1", "Hi"))
+
+        buffer.close()
+
+        assert [contents(rows) for rows in inserts] == [["Hi"]]
+        assert not buffer._thread.is_alive()
+
+    def test_failed_messages_go_to_dead_letter_file(self, buffer, pool):
+        buffer.enqueue(make_rows(pool, "session-1", "Hi"))
+
+        with patch.object(
+            HistoryWriteBuffer, "insert_rows", side_effect=ConnectionError
+        ):
+            buffer.flush()
+            assert buffer.has_pending(TABLE, "john.doe@example.com", "session-1")
+            buffer.flush()
+
+        assert not buffer.has_pending(TABLE, "john.doe@example.com", "session-1")
+        with open(buffer.dead_letter_path) as file:
+            records = [json.loads(line) for line in file]
+        assert len(records) == 1
+        assert records[0]["table_name"] == TABLE
+        assert records[0]["database"] == "TEST_DB"
+        assert json.loads(records[0]["history"])["data"]["content"] == "Hi"
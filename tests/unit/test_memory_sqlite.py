@@ -0,0 +1,103 @@
+"""
+Tests for the SQLite chat history and checkpoint backends.
+"""
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage
+
+from app.memory.chat_history_sqlite import SQLiteChatMessageHistory
+from app.memory.checkpointer_sqlite import SQLiteSaver
+
+USER_ID = "john.doe@example.com"
+
+
+class TestSQLiteChatMessageHistory:
+    """Tests for SQLiteChatMessageHistory functionality."""
+
+    @pytest.fixture
+    def database_path(self, tmp_path):
+        return str(tmp_path / "memory.sqlite3")
+
+    def make_history(self, database_path, session_id="session-1"):
+        return SQLiteChatMessageHistory(
+            database_path=database_path,
+            user_id=USER_ID,
+            session_id=session_id,
+            message_timereceived="2024-01-01T00:00:00+00:00",
+            max_len_history=1,
+        )
+
+    def test_messages_round_trip_in_order(self, database_path):
+        history = self.make_history(database_path)
+
+        history.add_messages([HumanMessage(content="Hi"), AIMessage(content="Hello")])
+
+        assert [m.content for m in history.messages] == ["Hi", "Hello"]
+
+    def test_messages_keeps_last_turns(self, database_path):
+        history = self.make_history(database_path)
+        history.add_messages([HumanMessage(content="1"), AIMessage(content="2")])
+        history.add_messages([HumanMessage(content="3"), AIMessage(content="4")])
+
+        assert [m.content for m in history.messages] == ["3", "4"]
+
+    def test_clear_only_affects_session(self, database_path):
+        history = self.make_history(database_path)
+        other = self.make_history(database_path, session_id="session-2")
+        history.add_message(HumanMessage(content="Hi"))
+        other.add_message(HumanMessage(content="Hey"))
+
+        history.clear()
+
+        assert history.messages == []
+        assert [m.content for m in other.messages] == ["Hey"]
+
+
+class TestSQLiteSaver:
+    """Tests for SQLiteSaver functionality."""
+
+    @pytest.fixture
+    def saver(self, tmp_path):
+        return SQLiteSaver(
+            database_path=str(tmp_path / "memory.sqlite3"),
+            user_id=USER_ID,
+            session_id="session-1",
+            compact_every=3,
+        )
+
+    def test_load_returns_latest_checkpoint(self, saver):
+        assert saver._load_checkpoint == {}
+
+        saver.add_checkpoint({"step": 1})
+        saver.add_checkpoint({"step": 2})
+
+        assert saver._load_checkpoint == {"step": 2}
+
+    def test_deltas_are_folded_onto_snapshot(self, saver):
+        saver.add_checkpoint({"ListFiles": ["a.pdf"], "LatestFile": "a.pdf"})
+
+        saver.update_checkpoint(
+            latest={"LatestFile": "b.pdf"}, appended={"ListFiles": "b.pdf"}
+        )
+
+        assert saver._load_checkpoint == {
+            "ListFiles": ["a.pdf", "b.pdf"],
+            "LatestFile": "b.pdf",
+        }
+
+    def test_compaction_keeps_checkpoint_and_bounds_rows(self, saver):
+        for i in range(7):
+            saver.update_checkpoint(
+                latest={"LatestFile": f"{i}.pdf"}, appended={"ListFiles": f"{i}.pdf"}
+            )
+
+        assert saver._load_checkpoint["ListFiles"] == [f"{i}.pdf" for i in range(7)]
+        assert saver._count_deltas() < 3
+        assert len(saver._load_rows()) <= 3
+
+    def test_clear_removes_checkpoints(self, saver):
+        saver.add_checkpoint({"step": 1})
+
+        saver.clear()
+
+        assert saver._load_checkpoint == {}
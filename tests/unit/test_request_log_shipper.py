@@ -0,0 +1,119 @@
+"""
+Tests for the batched shipper of API request logs.
+"""
+
+import json
+from unittest.mock import patch
+
+import pytest
+
+from app.helpers.request_log_shipper import RequestLogShipper
+
+
+def shipped_urls(rows):
+    return [json.loads(request_json)["url"] for request_json, _, _ in rows]
+
+
+class TestRequestLogShipper:
+    """Tests for RequestLogShipper functionality."""
+
+    @pytest.fixture
+    def shipper(self):
+        # Long enough that only explicit flushes write in the tests
+        shipper = RequestLogShipper(
+            max_queue_size=3,
+            flush_interval=60,
+            max_batch_size=10,
+            max_field_size=64,
+            max_attempts=2,
+        )
+        yield shipper
+        shipper._stopped.set()
+        shipper._wakeup.set()
+
+    @pytest.fixture
+    def inserts(self):
+        inserts = []
+        with patch.object(
+            RequestLogShipper,
+            "insert_rows",
+            side_effect=lambda rows: inserts.append(list(rows)),
+        ):
+            yield inserts
+
+    def test_sensitive_query_params_are_redacted(self, shipper, inserts):
+        shipper.submit(
+            {"url": "https://host/api/v1/invoke?api-key=secret&lang=en"}, "now"
+        )
+        shipper.flush()
+
+        assert shipped_urls(inserts[0]) == [
+            "https://host/api/v1/invoke?api-key=[redacted]&lang=en"
+        ]
+
+    def test_url_without_query_is_unchanged(self, shipper):
+        assert shipper.redact_url("https://host/health") == "https://host/health"
+
+    def test_headers_and_fields_are_redacted(self, shipper, inserts):
+        shipper.submit(
+            {
+                "headers": {"Authorization": "Bearer secret", "Accept": "*/*"},
+                "body": {"file": "base64", "query": "x" * 80},
+            },
+            "now",
+        )
+        shipper.flush()
+
+        request_data = json.loads(inserts[0][0][0])
+        assert request_data["headers"] == {
+            "Authorization": "[redacted]",
+            "Accept": "*/*",
+        }
+        assert request_data["body"]["file"]["size"] == 6
+        assert request_data["body"]["query"].startswith("x" * 64 + "...")
+
+    def test_successful_requests_are_sampled(self, shipper):
+        shipper.sample_rate = 0.0
+
+        shipper.submit({"url": "https://host/a"}, "now")
+        shipper.submit({"url": "https://host/b"}, "now", force=True)
+
+        assert shipper.stats()["sampled_out"] == 1
+        assert shipper.stats()["queued"] == 1
+
+    def test_full_queue_drops_oldest(self, shipper, inserts):
+        for name in "abcd":
+            shipper.submit({"url": f"https://host/{name}"}, "now")
+        shipper.flush()
+
+        assert shipped_urls(inserts[0]) == [
+            "https://host/b",
+            "https://host/c",
+            "https://host/d",
+        ]
+        assert shipper.stats()["dropped"] == 1
+
+    def test_failed_batch_is_retried(self, shipper, inserts):
+        shipper.submit({"url": "https://host/a"}, "now")
+        with patch.object(
+            RequestLogShipper, "insert_rows", side_effect=ConnectionError
+        ):
+            shipper.flush()
+        shipper.submit({"url": "https://host/b"}, "now")
+
+        shipper.flush()
+
+        assert shipped_urls(inserts[0]) == ["https://host/a", "https://host/b"]
+        assert shipper.stats()["failed"] == 0
+
+    def test_batch_is_dropped_after_max_attempts(self, shipper):
+        shipper.submit({"url": "https://host/a"}, "now")
+
+        with patch.object(
+            RequestLogShipper, "insert_rows", side_effect=ConnectionError
+        ):
+            shipper.flush()
+            shipper.flush()
+
+        assert shipper.stats()["queued"] == 0
+        assert shipper.stats()["failed"] == 1
@@ -0,0 +1,75 @@
+"""
+Tests for the shared Snowflake connection pool.
+"""
+
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from app.memory.snowflake_pool import SnowflakeConnectionPool
+
+CONNECTION_PARAMETERS = {
+    "account": "test_account",
+    "user": "test_user",
+    "database": "TEST_DB",
+    "schema": "TEST_SCHEMA",
+}
+
+
+class TestSnowflakeConnectionPool:
+    """Tests for SnowflakeConnectionPool functionality."""
+
+    @pytest.fixture
+    def mock_connect(self):
+        with patch("app.memory.snowflake_pool.connect") as mock_connect:
+            mock_connect.side_effect = lambda **kwargs: MagicMock(
+                is_closed=MagicMock(return_value=False)
+            )
+            yield mock_connect
+
+    def test_reuses_connection(self, mock_connect):
+        pool = SnowflakeConnectionPool(CONNECTION_PARAMETERS, max_size=2)
+
+        with pool.connection() as first:
+            pass
+        with pool.connection() as second:
+            pass
+
+        assert first is second
+        assert mock_connect.call_count == 1
+        assert pool.stats()["acquired"] == 2
+
+    def test_discards_connection_on_error(self, mock_connect):
+        pool = SnowflakeConnectionPool(CONNECTION_PARAMETERS, max_size=2)
+
+        with pytest.raises(RuntimeError):
+            with pool.connection() as first:
+                raise RuntimeError("query failed")
+        with pool.connection() as second:
+            pass
+
+        first.close.assert_called_once()
+        assert first is not second
+
+    def test_acquire_timeout(self, mock_connect):
+        pool = SnowflakeConnectionPool(
+            CONNECTION_PARAMETERS, max_size=1, acquire_timeout=0
+        )
+
+        with pool.connection():
+            with pytest.raises(TimeoutError):
+                with pool.connection():
+                    pass
+
+        assert pool.stats()["acquire_timeouts"] == 1
+
+    def test_table_is_created_once(self, mock_connect):
+        pool = SnowflakeConnectionPool(CONNECTION_PARAMETERS, max_size=1)
+        pool.register_table("MESSAGES_STORE", "CREATE TABLE IF NOT EXISTS ...;")
+
+        pool.bootstrap_tables()
+        pool.ensure_table("MESSAGES_STORE", "CREATE TABLE IF NOT EXISTS ...;")
+
+        connection = pool._idle[0][0]
+        cursor = connection.cursor.return_value.__enter__.return_value
+        cursor.execute.assert_called_once_with("CREATE TABLE IF NOT EXISTS ...;")
@@ -0,0 +1,140 @@
+"""
+Tests for the pooled Snowflake sessions of the Snowflake SQL wrapper.
+"""
+
+from unittest.mock import MagicMock, patch
+
+import httpx
+import pytest
+from langchain_core.messages import HumanMessage
+from pydantic import SecretStr
+
+from app.tools.tool_wrapper.snowflake_sql_tool_wrapper import SnowflakeSQLQueryWrapper
+
+# An account of its own, as the pool of the service account is shared
+CONNECTION_PARAMETERS = {
+    "account": "cortex_test_account",
+    "host": "cortex_test_account.snowflakecomputing.com",
+    "user": "test_user",
+    "password": "test_password",
+    "role": "TEST_ROLE",
+    "warehouse": "TEST_WH",
+    "database": "TEST_DB",
+    "schema": "TEST_SCHEMA",
+    "stage": "TEST_STAGE",
+    "semantic_model_file": "model.yaml",
+}
+
+CORTEX_RESPONSE = {
+    "message": {
+        "content": [
+            {"type": "text", "text": "Total sales"},
+            {"type": "sql", "statement": "SELECT SUM(SALES) FROM ORDERS"},
+        ]
+    }
+}
+
+
+def make_connection(number: int) -> MagicMock:
+    connection = MagicMock()
+    connection.is_closed.return_value = False
+    connection.rest.token = f"token-{number}"
+    cursor = connection.cursor.return_value.__enter__.return_value
+
+    def execute(statement):
+        # Like the connector, renew the session token on a request
+        connection.rest.token = f"renewed-token-{number}"
+
+    cursor.execute.side_effect = execute
+    return connection
+
+
+@pytest.fixture
+def connections():
+    connections = []
+
+    def connect(**kwargs):
+        connections.append(make_connection(len(connections)))
+        return connections[-1]
+
+    with patch("app.memory.snowflake_pool.connect", side_effect=connect):
+        yield connections
+
+
+@pytest.fixture
+def cortex():
+    cortex = {"requests": [], "expired_tokens": set()}
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        token = request.headers["Authorization"].split('"')[1]
+        cortex["requests"].append(token)
+        if token in cortex["expired_tokens"]:
+            return httpx.Response(
+                401, json={"code": "390112", "message": "Session expired"}
+            )
+        return httpx.Response(
+            200, headers={"X-Snowflake-Request-Id": "rid"}, json=CORTEX_RESPONSE
+        )
+
+    cortex["transport"] = httpx.MockTransport(handler)
+    return cortex
+
+
+@pytest.fixture
+def wrapper(cortex):
+    wrapper = SnowflakeSQLQueryWrapper(
+        connection_parameters=CONNECTION_PARAMETERS,
+        max_oauth_sessions=1,
+    )
+    wrapper._client = httpx.Client(transport=cortex["transport"])
+    wrapper._aclient = httpx.AsyncClient(transport=cortex["transport"])
+    return wrapper
+
+
+class TestSnowflakeSQLQueryWrapperSessions:
+    """Tests for the pooled sessions of SnowflakeSQLQueryWrapper."""
+
+    @pytest.mark.asyncio
+    async def test_sessions_are_reused_per_identity(self, wrapper, connections, cortex):
+        oauth = {"user": "john.doe@example.com", "oauth_token": SecretStr("oauth")}
+        for _ in range(2):
+            await wrapper.asend_message([HumanMessage(content="Total sales?")])
+            await wrapper.asend_message([HumanMessage(content="Total sales?")], **oauth)
+
+        assert len(connections) == 2
+        assert cortex["requests"] == ["token-0", "token-1", "token-0", "token-1"]
+
+    @pytest.mark.asyncio
+    async def test_expired_session_token_is_renewed_once(
+        self, wrapper, connections, cortex
+    ):
+        oauth = {"user": "john.doe@example.com", "oauth_token": SecretStr("oauth")}
+        await wrapper.asend_message([HumanMessage(content="Total sales?")], **oauth)
+        cortex["expired_tokens"].add("token-0")
+
+        response = await wrapper.asend_message(
+            [HumanMessage(content="Total sales?")], **oauth
+        )
+
+        assert response["request_id"] == "rid"
+        assert cortex["requests"] == ["token-0", "token-0", "renewed-token-0"]
+
+    def test_expired_session_token_is_renewed_sync(self, wrapper, connections, cortex):
+        oauth = {"user": "john.doe@example.com", "oauth_token": SecretStr("oauth")}
+        wrapper.send_message([HumanMessage(content="Total sales?")], **oauth)
+        cortex["expired_tokens"].add("token-0")
+
+        wrapper.send_message([HumanMessage(content="Total sales?")], **oauth)
+
+        assert cortex["requests"][-1] == "renewed-token-0"
+
+    def test_connection_in_use_of_evicted_pool_is_closed(self, wrapper, connections):
+        first = {"user": "john.doe@example.com", "oauth_token": SecretStr("first")}
+        second = {"user": "jane.doe@example.com", "oauth_token": SecretStr("second")}
+
+        with wrapper.get_snowflake_pool(**first).connection() as connection:
+            # Evicts the pool of the first user, at most one is kept
+            wrapper.get_snowflake_pool(**second)
+            connection.close.assert_not_called()
+
+        connection.close.assert_called_once()
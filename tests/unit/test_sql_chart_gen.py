@@ -0,0 +1,75 @@
+"""
+Tests for the data preparation of the SQL chart generator.
+"""
+
+import json
+
+import pyarrow as pa
+import pytest
+
+from app.helpers.sql_result_store import SQLResult, sql_result_store
+from app.tools.tool_wrapper.sql_chart_gen_tool_wrapper import (
+    SQLChartGeneratorToolWrapper,
+)
+
+SUMMARY = json.dumps(
+    {
+        "columns": [{"name": "REGION", "type": "string"}],
+        "num_rows": 3,
+        "truncated": False,
+        "head": [{"REGION": "EU", "SALES": 1}, {"REGION": "US", "SALES": 2}],
+    }
+)
+
+
+class TestSQLChartData:
+    """Tests for SQLChartGeneratorToolWrapper.preprocess_data."""
+
+    @pytest.fixture
+    def wrapper(self):
+        return SQLChartGeneratorToolWrapper()
+
+    def test_stored_result_is_plotted_in_full(self, wrapper):
+        table = pa.table({"REGION": ["EU", "US", "APAC"], "SALES": [1, 2, 3]})
+        artifact = sql_result_store.put(SQLResult(table))
+
+        df, head_only = wrapper.preprocess_data(SUMMARY, "bar", artifact)
+
+        assert len(df.index) == 3
+        assert not head_only
+
+    def test_truncated_stored_result_is_not_flagged(self, wrapper):
+        # A SQL result fetched in part is reported by the SQL query node
+        table = pa.table({"REGION": ["EU"], "SALES": [1]})
+        artifact = sql_result_store.put(SQLResult(table, truncated=True))
+
+        df, head_only = wrapper.preprocess_data(SUMMARY, "bar", artifact)
+
+        assert not head_only
+
+    def test_expired_result_plots_head_and_is_flagged(self, wrapper):
+        df, head_only = wrapper.preprocess_data(SUMMARY, "bar", "expired")
+
+        assert len(df.index) == 2
+        assert head_only
+
+    def test_expired_result_with_all_rows_in_head_is_not_flagged(self, wrapper):
+        summary = json.dumps(
+            {
+                "columns": [{"name": "REGION", "type": "string"}],
+                "num_rows": 2,
+                "truncated": True,
+                "head": [{"REGION": "EU", "SALES": 1}, {"REGION": "US", "SALES": 2}],
+            }
+        )
+
+        df, head_only = wrapper.preprocess_data(summary, "bar", "expired")
+
+        assert not head_only
+
+    def test_plain_rows_are_not_flagged(self, wrapper):
+        rows = json.dumps([{"REGION": "EU", "SALES": 1}])
+
+        df, head_only = wrapper.preprocess_data(rows, "bar")
+
+        assert not head_only
@@ -0,0 +1,151 @@
+"""
+Tests for the Arrow result fetching and the result cache of the Snowflake SQL
+wrapper.
+"""
+
+import json
+from contextlib import contextmanager
+from unittest.mock import MagicMock, patch
+
+import pyarrow as pa
+import pytest
+from pydantic import SecretStr
+
+from app.tools.tool_wrapper.snowflake_sql_tool_wrapper import (
+    SnowflakeSQLQueryWrapper,
+    normalize_sql,
+)
+
+CONNECTION_PARAMETERS = {
+    "account": "test_account",
+    "host": "test_account.snowflakecomputing.com",
+    "user": "test_user",
+    "password": "test_password",
+    "role": "TEST_ROLE",
+    "warehouse": "TEST_WH",
+    "database": "TEST_DB",
+    "schema": "TEST_SCHEMA",
+    "stage": "TEST_STAGE",
+    "semantic_model_file": "model.yaml",
+}
+
+
+@pytest.fixture
+def cursor():
+    cursor = MagicMock()
+    cursor.__enter__.return_value = cursor
+    cursor.fetch_arrow_batches.side_effect = lambda: iter(
+        [pa.table({"A": [1], "B": ["x"]})]
+    )
+    cursor.description = [("A",), ("B",)]
+    return cursor
+
+
+class TestSQLResultFetch:
+    """Tests for the Arrow result fetching of SnowflakeSQLQueryWrapper."""
+
+    @pytest.fixture
+    def wrapper(self):
+        return SnowflakeSQLQueryWrapper(
+            connection_parameters=CONNECTION_PARAMETERS,
+            fetch_max_rows=25,
+            head_rows=2,
+        )
+
+    def test_result_is_capped_and_flagged(self, wrapper, cursor):
+        cursor.fetch_arrow_batches.side_effect = lambda: iter(
+            [pa.table({"A": list(range(10))}) for _ in range(5)]
+        )
+
+        result = wrapper._fetch_result(cursor)
+
+        assert result.num_rows == 25
+        assert result.truncated
+
+    def test_result_within_caps_is_complete(self, wrapper, cursor):
+        result = wrapper._fetch_result(cursor)
+
+        assert result.table.to_pylist() == [{"A": 1, "B": "x"}]
+        assert not result.truncated
+
+    def test_summary_has_schema_head_and_aggregates(self, wrapper, cursor):
+        cursor.fetch_arrow_batches.side_effect = lambda: iter(
+            [pa.table({"A": [1, 2, 3, 4], "B": ["x", "y", "x", None]})]
+        )
+
+        summary = json.loads(wrapper.summarize_result(wrapper._fetch_result(cursor)))
+
+        assert summary["columns"] == [
+            {"name": "A", "type": "int64"},
+            {"name": "B", "type": "string"},
+        ]
+        assert summary["num_rows"] == 4
+        assert summary["head"] == [{"A": 1, "B": "x"}, {"A": 2, "B": "y"}]
+        assert summary["aggregates"]["A"] == {
+            "nulls": 0,
+            "min": 1,
+            "max": 4,
+            "mean": 2.5,
+            "sum": 10,
+        }
+        assert summary["aggregates"]["B"] == {"nulls": 1, "distinct": 2}
+
+
+class TestSQLResultCache:
+    """Tests for the SQL result cache of SnowflakeSQLQueryWrapper."""
+
+    @pytest.fixture
+    def wrapper(self, cursor):
+        @contextmanager
+        def connection():
+            yield MagicMock(cursor=MagicMock(return_value=cursor))
+
+        wrapper = SnowflakeSQLQueryWrapper(
+            connection_parameters=CONNECTION_PARAMETERS,
+            result_cache_ttl=60,
+            result_cache_max_entries=2,
+        )
+        pool = MagicMock(connection=connection)
+        with patch.object(
+            SnowflakeSQLQueryWrapper, "get_snowflake_pool", return_value=pool
+        ):
+            yield wrapper
+
+    def test_normalize_sql_keeps_quoted_text(self):
+        assert (
+            normalize_sql("SELECT  A,\n \"Col X\" FROM T WHERE N = 'It''s  X';")
+            == "select a, \"Col X\" from t where n = 'It''s  X'"
+        )
+
+    def test_normalized_statements_are_cached(self, wrapper, cursor):
+        first, first_cached = wrapper._process_sql_query("SELECT A, B FROM T", "1")
+        second, second_cached = wrapper._process_sql_query(
+            "select a,   b\nfrom t;", "2"
+        )
+
+        assert (first_cached, second_cached) == (False, True)
+        assert second.table.to_pylist() == [{"A": 1, "B": "x"}]
+        assert cursor.execute.call_count == 1
+
+    def test_oauth_users_are_isolated(self, wrapper, cursor):
+        for token in ("token-1", "token-2", "token-1"):
+            wrapper._process_sql_query(
+                "SELECT A, B FROM T",
+                "1",
+                user="john.doe@example.com",
+                oauth_token=SecretStr(token),
+            )
+
+        assert cursor.execute.call_count == 2
+
+    def test_only_select_statements_are_cached(self, wrapper, cursor):
+        wrapper.process_sql_query("UPDATE T SET A = 1", "1")
+        wrapper.process_sql_query("UPDATE T SET A = 1", "2")
+
+        assert cursor.execute.call_count == 2
+
+    def test_least_recently_used_results_are_evicted(self, wrapper, cursor):
+        for table in ("T1", "T2", "T3", "T1"):
+            wrapper.process_sql_query(f"SELECT A, B FROM {table}", "1")
+
+        assert cursor.execute.call_count == 4
@@ -0,0 +1,85 @@
+"""
+Tests for the coalescing of answer events in the custom streams.
+"""
+
+import asyncio
+
+import pytest
+
+from app.helpers.sse_coalescer import coalesce_answer_events
+
+
+async def make_events(*items):
+    for item in items:
+        if isinstance(item, float):
+            await asyncio.sleep(item)
+        else:
+            yield item
+
+
+async def collect(events, **kwargs):
+    return [data async for data in coalesce_answer_events(events, **kwargs)]
+
+
+class TestCoalesceAnswerEvents:
+    """Tests for coalesce_answer_events functionality."""
+
+    @pytest.mark.asyncio
+    async def test_consecutive_answers_are_merged(self):
+        events = make_events({"answer": "Hello "}, {"answer": "world "})
+
+        assert await collect(events) == [{"answer": "Hello world "}]
+
+    @pytest.mark.asyncio
+    async def test_structural_events_flush_and_keep_order(self):
+        events = make_events(
+            {"context": []},
+            {"answer": "a "},
+            {"answer": "b "},
+            {"retract_answer": True, "reason": "regenerating answer"},
+            {"answer": "c "},
+        )
+
+        assert await collect(events) == [
+            {"context": []},
+            {"answer": "a b "},
+            {"retract_answer": True, "reason": "regenerating answer"},
+            {"answer": "c "},
+        ]
+
+    @pytest.mark.asyncio
+    async def test_size_threshold_flushes(self):
+        events = make_events(*({"answer": "abcd"} for _ in range(5)))
+
+        result = await collect(events, max_chars=8)
+
+        assert result == [{"answer": "abcdabcd"}] * 2 + [{"answer": "abcd"}]
+
+    @pytest.mark.asyncio
+    async def test_window_flushes_while_producer_is_idle(self):
+        received = []
+
+        async def consume():
+            events = make_events({"answer": "a "}, 0.5, {"answer": "b "})
+            async for data in coalesce_answer_events(events, window=0.01):
+                received.append(data)
+
+        task = asyncio.create_task(consume())
+        await asyncio.sleep(0.2)
+
+        assert received == [{"answer": "a "}]
+        await task
+        assert received == [{"answer": "a "}, {"answer": "b "}]
+
+    @pytest.mark.asyncio
+    async def test_producer_errors_are_raised_after_flush(self):
+        async def failing():
+            yield {"answer": "a "}
+            raise RuntimeError("stream failed")
+
+        received = []
+        with pytest.raises(RuntimeError):
+            async for data in coalesce_answer_events(failing()):
+                received.append(data)
+
+        assert received == [{"answer": "a "}]
@@ -0,0 +1,145 @@
+"""
+Tests for the summarizing chat history.
+"""
+
+from unittest.mock import AsyncMock
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+
+from app.memory import summary_memory
+from app.memory.chat_history_sqlite import SQLiteChatMessageHistory
+from app.memory.summary_memory import (
+    SUMMARY_KEY,
+    SummaryChatMessageHistory,
+    history_window,
+)
+
+USER_ID = "john.doe@example.com"
+
+
+def make_turn(number):
+    return [HumanMessage(content=f"Q{number}"), AIMessage(content=f"A{number}")]
+
+
+class TestSummaryChatMessageHistory:
+    """Tests for SummaryChatMessageHistory functionality."""
+
+    @pytest.fixture
+    def history(self, tmp_path):
+        def make(table_name, max_len_history):
+            return SQLiteChatMessageHistory(
+                database_path=str(tmp_path / "memory.sqlite3"),
+                user_id=USER_ID,
+                session_id="session-1",
+                message_timereceived="2024-01-01T00:00:00+00:00",
+                table_name=table_name,
+                max_len_history=max_len_history,
+            )
+
+        return SummaryChatMessageHistory(
+            history=make("MESSAGES_STORE", 3),
+            summary_history=make("MESSAGES_STORE_SUMMARY", 1),
+            verbatim_turns=2,
+        )
+
+    @pytest.fixture
+    def summarizer(self, monkeypatch):
+        summarizer = AsyncMock()
+        summarizer.ainvoke.return_value = "The user asked Q1."
+        monkeypatch.setattr(summary_memory, "history_summarizer", summarizer)
+        return summarizer
+
+    @pytest.mark.asyncio
+    async def test_messages_are_summary_and_last_turns(self, history, summarizer):
+        for number in range(1, 4):
+            history.history.add_messages(make_turn(number))
+
+        await history.aupdate_summary()
+        messages = await history.aget_messages()
+
+        assert messages[0].additional_kwargs[SUMMARY_KEY]
+        assert "The user asked Q1." in messages[0].content
+        assert [m.content for m in messages[1:]] == ["Q2", "A2", "Q3", "A3"]
+
+    @pytest.mark.asyncio
+    async def test_dropped_turns_are_summarized_once(self, history, summarizer):
+        for number in range(1, 4):
+            history.history.add_messages(make_turn(number))
+
+        assert await history.aupdate_summary() == "The user asked Q1."
+        assert await history.aupdate_summary() is None
+
+        summarizer.ainvoke.assert_awaited_once()
+        assert [m.content for m in summarizer.ainvoke.call_args[0][0]["messages"]] == [
+            "Q1",
+            "A1",
+        ]
+
+    @pytest.mark.asyncio
+    async def test_turns_of_failed_update_are_folded_later(self, history, summarizer):
+        for number in range(1, 4):
+            history.history.add_messages(make_turn(number))
+        await history.aupdate_summary()
+        # The update after turns 4 and 5 failed or was skipped
+        for number in range(4, 7):
+            history.history.add_messages(make_turn(number))
+
+        await history.aupdate_summary()
+
+        assert [m.content for m in summarizer.ainvoke.call_args[0][0]["messages"]] == [
+            "Q2",
+            "A2",
+            "Q3",
+            "A3",
+            "Q4",
+            "A4",
+        ]
+
+    @pytest.mark.asyncio
+    async def test_no_summary_within_verbatim_window(self, history, summarizer):
+        history.history.add_messages(make_turn(1))
+
+        assert await history.aupdate_summary() is None
+        assert [m.content for m in await history.aget_messages()] == ["Q1", "A1"]
+        summarizer.ainvoke.assert_not_awaited()
+
+
+class TestHistoryWindow:
+    """Tests for history_window functionality."""
+
+    @pytest.fixture
+    def enabled(self, monkeypatch):
+        monkeypatch.setitem(
+            summary_memory.config.history_summary_kwargs, "enabled", True
+        )
+
+    def test_keeps_summary_and_last_turns_of_role(self, monkeypatch, enabled):
+        monkeypatch.setitem(
+            summary_memory.config.history_summary_kwargs["windows"], "grader", 1
+        )
+        summary = SystemMessage(
+            content="Summary", additional_kwargs={SUMMARY_KEY: True}
+        )
+        chat_history = [summary] + make_turn(1) + make_turn(2)
+
+        assert history_window(chat_history, "grader") == [summary] + make_turn(2)
+
+    def test_unbounded_role_keeps_everything(self, monkeypatch, enabled):
+        monkeypatch.setitem(
+            summary_memory.config.history_summary_kwargs["windows"], "generator", None
+        )
+        chat_history = make_turn(1) + make_turn(2)
+
+        assert history_window(chat_history, "generator") == chat_history
+
+    def test_no_window_without_summaries(self, monkeypatch):
+        monkeypatch.setitem(
+            summary_memory.config.history_summary_kwargs, "enabled", False
+        )
+        monkeypatch.setitem(
+            summary_memory.config.history_summary_kwargs["windows"], "grader", 1
+        )
+        chat_history = make_turn(1) + make_turn(2)
+
+        assert history_window(chat_history, "grader") == chat_history
@@ -0,0 +1,117 @@
+"""
+Tests for the Bing web search client, against a local fake search server.
+"""
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+from app.tools.tool_wrapper.bing_search_tool_wrapper import BingSearchToolWrapper
+
+
+class FakeBingSearchServer(ThreadingHTTPServer):
+    """Local server answering like the Bing Web Search API."""
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), FakeBingSearchHandler)
+        self.queries = []
+        self.status = 200
+        self.response_headers = {}
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}/v7.0/search"
+
+
+class FakeBingSearchHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        query = parse_qs(urlparse(self.path).query)["q"][0]
+        self.server.queries.append(query)
+        if self.server.status == 200:
+            body = {
+                "webPages": {
+                    "value": [
+                        {
+                            "name": "Today's weather",
+                            "url": "https://example.com/weather",
+                            "snippet": f"It's sunny, says the <b>{query}</b> page.",
+                        },
+                        {"name": "No snippet", "url": "https://example.com/empty"},
+                    ]
+                }
+            }
+        else:
+            body = {"error": {"code": "403", "message": "Quota Exceeded"}}
+        payload = json.dumps(body).encode("utf-8")
+        self.send_response(self.server.status)
+        for name, value in self.server.response_headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    server = FakeBingSearchServer()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def client(server):
+    return BingSearchToolWrapper(subscription_key="test_key", search_url=server.url)
+
+
+class TestBingSearchToolWrapper:
+    """Tests for BingSearchToolWrapper functionality."""
+
+    @pytest.mark.asyncio
+    async def test_results_are_parsed_with_apostrophes(self, client):
+        results = await client.asearch("weather in Abu Dhabi")
+
+        assert results == [
+            {
+                "title": "Today's weather",
+                "link": "https://example.com/weather",
+                "snippet": "It's sunny, says the <b>weather in Abu Dhabi</b> page.",
+            }
+        ]
+
+    @pytest.mark.asyncio
+    async def test_normalized_queries_are_cached(self, client, server):
+        await client.asearch("Weather in Abu Dhabi")
+        await client.asearch("  weather   in abu dhabi ")
+        client.search("WEATHER IN ABU DHABI")
+
+        assert server.queries == ["Weather in Abu Dhabi"]
+
+    @pytest.mark.asyncio
+    async def test_quota_exceeded_skips_searches(self, client, server):
+        server.status = 403
+
+        assert await client.asearch("first query") == []
+        assert not client.available
+        assert await client.asearch("second query") == []
+
+        assert server.queries == ["first query"]
+        assert client.stats()["skipped"] == 1
+
+    def test_rate_limit_skips_searches_for_retry_after(self, client, server):
+        server.status = 429
+        server.response_headers = {"Retry-After": "0"}
+
+        assert client.search("first query") == []
+        assert client.available
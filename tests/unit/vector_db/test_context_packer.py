@@ -0,0 +1,114 @@
+"""
+Tests for the context packer.
+"""
+
+from typing import List
+
+import pytest
+from langchain.schema import Document
+from langchain_core.embeddings import Embeddings
+
+from app.vector_db.context_packer import ContextPacker, estimate_document_tokens
+
+KEYWORDS = ["leave", "salary", "travel"]
+
+
+class KeywordEmbeddings(Embeddings):
+    """Embeds texts by the keywords they contain, recording every call."""
+
+    def __init__(self):
+        self.calls = []
+
+    def embed_query(self, text: str) -> List[float]:
+        return [float(keyword in text.lower()) for keyword in KEYWORDS] + [0.01]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        self.calls.append(list(texts))
+        return [self.embed_query(text) for text in texts]
+
+
+HANDBOOK = Document(
+    page_content=(
+        "HR handbook\n"
+        "Employees get 30 days of leave.\n"
+        "Salary is paid monthly.\n"
+        "Travel is booked by HR."
+    ),
+    metadata={},
+)
+
+
+class TestContextPacker:
+    """Tests for ContextPacker functionality."""
+
+    @pytest.fixture
+    def embeddings(self):
+        return KeywordEmbeddings()
+
+    @pytest.fixture
+    def packer(self, embeddings):
+        return ContextPacker(embeddings, token_budget=1000)
+
+    @pytest.mark.asyncio
+    async def test_units_repeated_across_overlapping_chunks_are_kept_once(self, packer):
+        first = Document(page_content="Leave is 30 days. It accrues monthly.")
+        second = Document(page_content="It accrues monthly. Unused leave expires.")
+
+        packed = await packer.apack("leave", [first, second])
+
+        assert packed[0] is first
+        assert packed[1].page_content == "Unused leave expires."
+        assert second.page_content.startswith("It accrues monthly.")
+
+    @pytest.mark.asyncio
+    async def test_documents_left_without_units_are_dropped(self, packer):
+        document = Document(page_content="Leave is 30 days.")
+
+        packed = await packer.apack("leave", [document, Document(page_content="")])
+
+        assert packed == [document]
+
+    @pytest.mark.asyncio
+    async def test_context_within_budget_is_not_compressed(self, packer, embeddings):
+        packed = await packer.apack("leave", [HANDBOOK])
+
+        assert packed == [HANDBOOK]
+        assert embeddings.calls == []
+
+    @pytest.mark.asyncio
+    async def test_first_unit_is_kept_with_selected_units(self, packer):
+        packed = await packer.apack("How many days of leave?", [HANDBOOK], 14)
+
+        assert packed[0].page_content == (
+            "HR handbook\nEmployees get 30 days of leave."
+        )
+
+    @pytest.mark.asyncio
+    async def test_packed_context_stays_within_budget(self, packer):
+        documents = [HANDBOOK] + [
+            Document(page_content=f"Policy {i}.\nSalary bands are reviewed yearly {i}.")
+            for i in range(5)
+        ]
+
+        packed = await packer.apack("salary", documents, 40)
+
+        assert sum(estimate_document_tokens(doc) for doc in packed) <= 40
+        assert packer.stats()["compressed_calls"] == 1
+
+    @pytest.mark.asyncio
+    async def test_unit_embeddings_are_cached(self, packer, embeddings):
+        await packer.apack("leave", [HANDBOOK], 14)
+        await packer.apack("leave", [HANDBOOK], 14)
+
+        # The query and the 4 units are embedded once
+        assert [len(texts) for texts in embeddings.calls] == [5]
+        assert packer.stats()["embedding_hits"] == 5
+        assert packer.stats()["cached_embeddings"] == 5
+
+    @pytest.mark.asyncio
+    async def test_embedding_cache_is_bounded(self, embeddings):
+        packer = ContextPacker(embeddings, max_cached_embeddings=3)
+
+        await packer.apack("leave", [HANDBOOK], 14)
+
+        assert packer.stats()["cached_embeddings"] == 3
@@ -0,0 +1,87 @@
+"""
+Tests for the knowledge base version shared by all replicas.
+"""
+
+from unittest.mock import patch
+
+import pytest
+
+from app.vector_db.kb_version import INITIAL_KB_VERSION, KnowledgeBaseVersion
+
+
+class FakeQdrantClient:
+    """Async Qdrant client keeping the points of the versions collection."""
+
+    def __init__(self):
+        self.collections = set()
+        self.points = {}
+        self.retrieves = 0
+
+    async def collection_exists(self, collection_name):
+        return collection_name in self.collections
+
+    async def create_collection(self, collection_name, vectors_config):
+        self.collections.add(collection_name)
+
+    async def retrieve(self, collection_name, ids, with_payload):
+        self.retrieves += 1
+        return [self.points[id] for id in ids if id in self.points]
+
+    async def upsert(self, collection_name, points):
+        for point in points:
+            self.points[point.id] = point
+
+
+class TestKnowledgeBaseVersion:
+    """Tests for KnowledgeBaseVersion functionality."""
+
+    @pytest.fixture
+    def aclient(self):
+        return FakeQdrantClient()
+
+    @pytest.mark.asyncio
+    async def test_initial_version(self, aclient):
+        version = KnowledgeBaseVersion(aclient, "HR")
+
+        assert await version.aget() == INITIAL_KB_VERSION
+        assert "kb-versions" in aclient.collections
+
+    @pytest.mark.asyncio
+    async def test_bump_is_seen_by_other_replicas_after_ttl(self, aclient):
+        replica_a = KnowledgeBaseVersion(aclient, "HR", ttl=5)
+        replica_b = KnowledgeBaseVersion(aclient, "HR", ttl=5)
+
+        with patch("app.vector_db.kb_version.time.monotonic", return_value=0):
+            assert await replica_b.aget() == INITIAL_KB_VERSION
+            bumped = await replica_a.abump()
+            assert await replica_a.aget() == bumped
+            assert await replica_b.aget() == INITIAL_KB_VERSION
+        with patch("app.vector_db.kb_version.time.monotonic", return_value=6):
+            assert await replica_b.aget() == bumped
+
+    @pytest.mark.asyncio
+    async def test_version_is_reused_within_ttl(self, aclient):
+        version = KnowledgeBaseVersion(aclient, "HR", ttl=5)
+
+        for _ in range(3):
+            await version.aget()
+
+        assert aclient.retrieves == 1
+
+    @pytest.mark.asyncio
+    async def test_collections_are_versioned_apart(self, aclient):
+        hr = KnowledgeBaseVersion(aclient, "HR")
+        finance = KnowledgeBaseVersion(aclient, "Finance")
+
+        await hr.abump()
+
+        assert await finance.aget() == INITIAL_KB_VERSION
+
+    @pytest.mark.asyncio
+    async def test_unreadable_version_is_none(self, aclient):
+        async def retrieve(*args, **kwargs):
+            raise ConnectionError("Qdrant is unreachable")
+
+        aclient.retrieve = retrieve
+
+        assert await KnowledgeBaseVersion(aclient, "HR").aget() is None
@@ -0,0 +1,111 @@
+"""
+Tests for the retrieval result cache.
+"""
+
+from unittest.mock import patch
+
+import pytest
+from langchain.schema import Document
+from qdrant_client import models
+
+from app.vector_db.retrieval_cache import RetrievalResultCache
+
+PUBLIC_DOCS = models.Filter(
+    must=[
+        models.FieldCondition(
+            key="metadata.public_doc", match=models.MatchValue(value="true")
+        )
+    ]
+)
+
+
+class TestRetrievalResultCache:
+    """Tests for RetrievalResultCache functionality."""
+
+    @pytest.fixture
+    def cache(self):
+        return RetrievalResultCache(
+            score_threshold=0.98, ttl=60, max_entries=2, max_buckets=2
+        )
+
+    @pytest.fixture
+    def results(self):
+        return [(Document(page_content="Leave policy", metadata={"page": 1}), 0.9)]
+
+    def test_hit_on_near_identical_query(self, cache, results):
+        cache.store("HR", PUBLIC_DOCS, 10, [1.0, 0.0], "v1", results)
+
+        cached = cache.lookup("HR", PUBLIC_DOCS, 10, [0.999, 0.01], "v1")
+
+        assert cached[0][0].page_content == "Leave policy"
+        assert cached[0][1] == 0.9
+        assert cache.hits == 1
+
+    def test_hit_is_a_copy(self, cache, results):
+        cache.store("HR", PUBLIC_DOCS, 10, [1.0, 0.0], "v1", results)
+
+        cache.lookup("HR", PUBLIC_DOCS, 10, [1.0, 0.0], "v1")[0][0].metadata.pop("page")
+
+        cached = cache.lookup("HR", PUBLIC_DOCS, 10, [1.0, 0.0], "v1")
+        assert cached[0][0].metadata == {"page": 1}
+
+    def test_miss_on_other_filter_or_k(self, cache, results):
+        cache.store("HR", PUBLIC_DOCS, 10, [1.0, 0.0], "v1", results)
+
+        assert cache.lookup("HR", None, 10, [1.0, 0.0], "v1") is None
+        assert cache.lookup("HR", PUBLIC_DOCS, 20, [1.0, 0.0], "v1") is None
+
+    def test_miss_on_dissimilar_query(self, cache, results):
+        cache.store("HR", PUBLIC_DOCS, 10, [1.0, 0.0], "v1", results)
+
+        assert cache.lookup("HR", PUBLIC_DOCS, 10, [0.9, 0.4], "v1") is None
+        assert cache.misses == 1
+
+    def test_miss_after_ttl(self, cache, results):
+        with patch("app.vector_db.retrieval_cache.time.monotonic", return_value=0):
+            cache.store("HR", PUBLIC_DOCS, 10, [1.0, 0.0], "v1", results)
+        with patch("app.vector_db.retrieval_cache.time.monotonic", return_value=61):
+            assert cache.lookup("HR", PUBLIC_DOCS, 10, [1.0, 0.0], "v1") is None
+
+    def test_miss_after_kb_version_change(self, cache, results):
+        cache.store("HR", PUBLIC_DOCS, 10, [1.0, 0.0], "v1", results)
+
+        assert cache.lookup("HR", PUBLIC_DOCS, 10, [1.0, 0.0], "v2") is None
+        # Entries of the older version are dropped
+        assert cache.lookup("HR", PUBLIC_DOCS, 10, [1.0, 0.0], "v1") is None
+
+    def test_evicts_least_recently_used(self, cache, results):
+        cache.store("HR", None, 10, [1.0, 0.0], "v1", results)
+        cache.store("HR", None, 10, [0.0, 1.0], "v1", results)
+        cache.lookup("HR", None, 10, [1.0, 0.0], "v1")
+        cache.store("HR", None, 10, [0.7, 0.7], "v1", results)
+
+        assert cache.lookup("HR", None, 10, [1.0, 0.0], "v1") is not None
+        assert cache.lookup("HR", None, 10, [0.0, 1.0], "v1") is None
+
+    def test_clear_collection(self, cache, results):
+        cache.store("HR", None, 10, [1.0, 0.0], "v1", results)
+        cache.store("Finance", None, 10, [1.0, 0.0], "v1", results)
+
+        cache.clear("HR")
+
+        assert cache.lookup("HR", None, 10, [1.0, 0.0], "v1") is None
+        assert cache.lookup("Finance", None, 10, [1.0, 0.0], "v1") is not None
+
+    def test_evicts_least_recently_used_bucket(self, cache, results):
+        cache.store("HR", None, 10, [1.0, 0.0], "v1", results)
+        cache.store("HR", PUBLIC_DOCS, 10, [1.0, 0.0], "v1", results)
+        cache.lookup("HR", None, 10, [1.0, 0.0], "v1")
+        cache.store("HR", None, 20, [1.0, 0.0], "v1", results)
+
+        assert len(cache._entries) == 2
+        assert cache.lookup("HR", PUBLIC_DOCS, 10, [1.0, 0.0], "v1") is None
+        assert cache.lookup("HR", None, 10, [1.0, 0.0], "v1") is not None
+
+    def test_empty_bucket_is_dropped(self, cache, results):
+        cache.store("HR", PUBLIC_DOCS, 10, [1.0, 0.0], "v1", results)
+
+        cache.lookup("HR", PUBLIC_DOCS, 10, [1.0, 0.0], "v2")
+        cache.lookup("HR", None, 10, [1.0, 0.0], "v2")
+
+        assert len(cache._entries) == 0
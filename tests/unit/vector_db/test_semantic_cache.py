@@ -0,0 +1,86 @@
+"""
+Tests for the semantic answer cache.
+"""
+
+from unittest.mock import patch
+
+import pytest
+from langchain.schema import Document
+
+from app.vector_db.semantic_cache import SemanticAnswerCache, prompt_scope
+
+SCOPE = prompt_scope("John Doe", "2026-01-01T09:00:00", "HR guidelines")
+
+
+class TestSemanticAnswerCache:
+    """Tests for SemanticAnswerCache functionality."""
+
+    @pytest.fixture
+    def cache(self):
+        return SemanticAnswerCache(score_threshold=0.95, ttl=60, max_entries=2)
+
+    @pytest.fixture
+    def context(self):
+        return [Document(page_content="Leave policy", metadata={"source": "hr.pdf"})]
+
+    def test_hit_on_similar_query(self, cache, context):
+        cache.store("HRAgent", [1.0, 0.0], 0, SCOPE, "answer", context)
+
+        answer, cached_context = cache.lookup("HRAgent", [0.99, 0.05], 0, SCOPE)
+
+        assert answer == "answer"
+        assert cached_context[0].page_content == "Leave policy"
+        assert cached_context[0] is not context[0]
+        assert cache.hits == 1
+
+    def test_miss_on_dissimilar_query(self, cache, context):
+        cache.store("HRAgent", [1.0, 0.0], 0, SCOPE, "answer", context)
+
+        assert cache.lookup("HRAgent", [0.0, 1.0], 0, SCOPE) is None
+        assert cache.misses == 1
+
+    def test_miss_on_other_agent(self, cache, context):
+        cache.store("HRAgent", [1.0, 0.0], 0, SCOPE, "answer", context)
+
+        assert cache.lookup("FinanceAgent", [1.0, 0.0], 0, SCOPE) is None
+
+    def test_miss_after_kb_version_bump(self, cache, context):
+        cache.store("HRAgent", [1.0, 0.0], 0, SCOPE, "answer", context)
+
+        assert cache.lookup("HRAgent", [1.0, 0.0], 1, SCOPE) is None
+
+    def test_miss_after_ttl(self, cache, context):
+        with patch("app.vector_db.semantic_cache.time.monotonic", return_value=0):
+            cache.store("HRAgent", [1.0, 0.0], 0, SCOPE, "answer", context)
+        with patch("app.vector_db.semantic_cache.time.monotonic", return_value=61):
+            assert cache.lookup("HRAgent", [1.0, 0.0], 0, SCOPE) is None
+
+    def test_evicts_least_recently_used(self, cache, context):
+        cache.store("HRAgent", [1.0, 0.0], 0, SCOPE, "first", context)
+        cache.store("HRAgent", [0.0, 1.0], 0, SCOPE, "second", context)
+        cache.lookup("HRAgent", [1.0, 0.0], 0, SCOPE)
+        cache.store("HRAgent", [0.7, 0.7], 0, SCOPE, "third", context)
+
+        assert cache.lookup("HRAgent", [0.0, 1.0], 0, SCOPE) is None
+        assert cache.lookup("HRAgent", [1.0, 0.0], 0, SCOPE)[0] == "first"
+
+    def test_miss_for_other_user(self, cache, context):
+        cache.store("HRAgent", [1.0, 0.0], 0, SCOPE, "Hi John, answer", context)
+        other_user = prompt_scope("Jane Doe", "2026-01-01T09:00:00", "HR guidelines")
+
+        assert cache.lookup("HRAgent", [1.0, 0.0], 0, other_user) is None
+
+    @pytest.mark.parametrize(
+        "username, timestamp, enterprise_context, same_scope",
+        [
+            ("John Doe", "2026-01-01T17:30:00", "HR guidelines", True),
+            ("John Doe", "2026-01-02T09:00:00", "HR guidelines", False),
+            ("John Doe", "2026-01-01T09:00:00", "FIN guidelines", False),
+        ],
+    )
+    def test_scope_depends_on_the_date_only(
+        self, username, timestamp, enterprise_context, same_scope
+    ):
+        scope = prompt_scope(username, timestamp, enterprise_context)
+
+        assert (scope == SCOPE) == same_scope